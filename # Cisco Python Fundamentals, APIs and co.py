@@ -685,3 +685,505 @@ device.session_timeout
 # 180
 
       
+#################################################################
+# Running tasks over whole inventory (fleet.py)
+# - devnet.configure_bgp() and devnet.verify_bgp() walk inventory one router at a time
+# - with 2000 routers run time is sum of all SSH round trips, so push can take hours
+# - fleet.run_fleet() runs same per-device task on bounded pool of worker threads:
+# workers = how many routers are worked on at once
+# per_device_limit = how many tasks can talk to same router at once
+# timeout = seconds each task is allowed to run, hung router is reported as TimeoutError
+# - results come back in same order as inventory, one Result(host, ok, value, error, elapsed) per router
+# Example:
+from devnet import fleet
+results = fleet.configure_bgp(workers=200, timeout=60)
+for result in results:
+    if not result.ok:
+        print("{} failed: {}".format(result.host, result.error))
+
+# - fakedevice.FakeDevice behaves like ConnectHandler without real router, so code can be tried on laptop:
+from devnet.fakedevice import FakeDevice, fake_inventory
+devnet.inventory = fake_inventory(1000)
+fleet.verify_bgp(connection_class=FakeDevice)
+# student@student-vm:~$ python benchmarks/bench_fleet.py --hosts 1000
+
+#################################################################
+# Reusing sessions (pool.py)
+# - every workflow above builds new ConnectHandler and ends with disconnect()
+# - SSH handshake and login take longer than most show commands, so repeated sweeps spend most time logging in
+# - pool.SessionPool keeps one warm session per host and hands it out again on next call:
+# - is_alive() is checked before session is reused
+# - session idle longer than its session_timeout is stale, establish_connection() reconnects it
+# - max_sessions caps open sessions, least recently used idle session is disconnected first
+# Example:
+from devnet.pool import SessionPool
+with SessionPool(max_sessions=500) as pool:
+    for sweep in range(3):
+        for router in devnet.inventory:
+            pool.send_command(router, "show version")
+    print(pool.stats)
+# {'reused': 4, 'logins': 2, 'reconnects': 0, 'evictions': 0}
+
+#################################################################
+# asyncio version of issue_command (aio.py)
+# - issue_command(hostname, command) above only prints, and blocking version needs thread per device
+# - threads stop scaling after few hundred devices, event loop can keep thousands of idle sessions open
+# - aio.issue_commands() sends commands to every host in device_data.INVENTORY from one event loop:
+# concurrency = semaphore, how many routers are worked on at once
+# per_host_rate = max commands per second to same router
+# - results are returned, not printed: CommandResult(host, command, ok, output, error, elapsed)
+# Example:
+from devnet import aio
+results = aio.run(["show version", "show ip bgp summary"], concurrency=2000, per_host_rate=5)
+for result in results:
+    print(result.host, result.command, result.ok)
+# - inside async code await it directly:
+# results = await aio.issue_commands("show version", hosts)
+# - default open_session uses asyncssh package, mockserver.py + aio.stream_sessions() are used to try it locally
+# student@student-vm:~$ python benchmarks/bench_async.py --hosts 2000 --latency 0.05
+
+#################################################################
+# Sending many show commands at once (batch.py)
+# - send_command() waits for prompt before next command is sent, 20 commands = 20 round trips
+# - send_command_batch(device, commands) writes all commands to channel at once
+#   and splits output back per command using prompt (csr1kv1#) as separator
+# - on high latency link wall time per device drops to roughly one round trip
+# Example:
+from devnet.batch import send_command_batch
+outputs = send_command_batch(device, ["show version", "show ip interface brief", "show ip bgp summary"])
+outputs["show version"]
+# 'Cisco IOS XE Software, Version 16.09.03\n...'
+# - sits next to send_command() (one command) and send_config_set() (configuration commands)
+# student@student-vm:~$ python benchmarks/bench_batch.py --commands 20 --latency 0.05
+
+#################################################################
+# Generating configuration files from templates (render.py)
+# - CSR challenge solution starts with "generate configuration file using templates and information from inventory dictionary"
+# - hostname_conf(name) above formats one line, templates/csr_challenge.cfg holds whole configuration:
+# hostname {hostname}
+# line vty 0 4
+#  transport input ssh
+# interface Loopback0
+#  ip address {loopback_ip} 255.255.255.255
+# - render.get_template() compiles template once and caches it (recompiled only when file changes)
+# - render_to_files() goes through inventory one device at a time and writes <hostname>.cfg
+# Example:
+from devnet import render
+for hostname, path in render.render_to_files("templates/csr_challenge.cfg", inventory, "/home/student/config_files",
+                                             defaults={"domain": "lab.local"}):
+    print(hostname, path)
+# csr1kv1 /home/student/config_files/csr1kv1.cfg
+# - written file is pushed with device.send_config_from_file(path)
+# student@student-vm:~$ python benchmarks/bench_render.py --devices 50000
+
+#################################################################
+# Parsing show output (parsers.py)
+# - send_command("show version") returns one big string, facts dictionary above was built by hand
+# - parsers.py turns output into records (namedtuples), fields are accessed by name:
+from devnet import parsers
+version = parsers.parse_show_version(device.send_command("show version"))
+version.os, version.version
+# ('ios-xe', '16.09.03')
+for interface in parsers.parse_show_interfaces(device.send_command("show interfaces")):
+    print(interface.name, interface.state, interface.crc)
+# GigabitEthernet1 no shutdown 0
+# - each record is matched by one precompiled regular expression, no line by line split()
+# - ParseCache remembers result per (device, command, hash of output), unchanged output is not parsed again:
+cache = parsers.ParseCache()
+cache.parse("csr1kv1", "show version", device.send_command("show version"))
+# - parsers.interfaces_to_if_state() gives back if_state list: [{"name": "Gi0/1", "state": "shutdown"}]
+# student@student-vm:~$ python benchmarks/bench_parse.py --interfaces 5000
+
+#################################################################
+# Storing facts for many devices (factstore.py)
+# - facts dictionary above is nested dict of lists, with thousands of devices it uses lot of memory
+#   and question like "all Gi interfaces shut on IOS-XE 16.09" means looping over every device
+# - factstore.FactsStore keeps same data in columns (array.array of integers):
+# - every string ("ios-xe", "shutdown", "Gi0/1") is stored only once and columns refer to it by number
+# - indexes on os, version and interface state find matching rows without looping over whole fleet
+# Example:
+from devnet.factstore import FactsStore
+store = FactsStore.from_nested(facts)
+store.query_interfaces(os="ios-xe", version_prefix="16.09", state="shutdown", name_prefix="Gi")
+# [(None, 'Gi0/1')]   <- if_state in notes is not under any device
+store.set_interface("csr1kv1", "Gi0/2", "shutdown")
+store.to_nested()
+# - to_nested() gives back dictionary in same shape as facts
+# student@student-vm:~$ python benchmarks/bench_facts.py --devices 100000
+
+#################################################################
+# Pushing only what changed (confdiff.py)
+# - send_config_set() and send_config_from_file() push every command, even when device already has it
+# - with large ACLs and prefix-lists most of push time is spent on lines that change nothing
+# - confdiff.parse_config() turns running config into tree, indentation shows which lines belong to which section:
+# {"interface GigabitEthernet1": {"description HR": {}, "ip address 10.0.0.1 255.255.255.0": {}}}
+# - diff_config(desired, running) returns only missing commands, ready for send_config_set()
+# - ConfigPusher remembers running config tree per device, next run with same config sends nothing
+# Example:
+from devnet.confdiff import ConfigPusher
+pusher = ConfigPusher()
+pusher.push_file(device, "csr1kv1", "/home/student/config_files/csr1kv1.cfg")
+# ['interface GigabitEthernet1', ' description HR']
+pusher.push_file(device, "csr1kv1", "/home/student/config_files/csr1kv1.cfg")
+# []
+# - if someone changes device by hand, call pusher.invalidate("csr1kv1") so running config is read again
+# student@student-vm:~$ python benchmarks/bench_confdiff.py --lines 2000 --changed 10
+
+#################################################################
+# Keeping large inventory on disk (inventory_store.py)
+# - devnet.inventory and device_data.INVENTORY are written as Python literals, whole inventory is loaded on import
+# - with 100k devices import takes seconds and memory, even if job works with ten routers
+# - inventory_store.build_inventory() writes inventory once into sharded SQLite files
+# - SQLiteInventory reads only what is asked for and behaves like dictionary, so print_routers() works unchanged
+# Example:
+from devnet.inventory_store import SQLiteInventory, build_inventory
+build_inventory("/home/student/inventory", devnet.inventory, shards=16)
+devnet.inventory = SQLiteInventory("/home/student/inventory")
+devnet.print_routers()
+# csr1kv1
+# csr1kv2
+devnet.inventory["csr1kv1"]
+# {'username': 'cisco', 'password': 'cisco', 'device_type': 'cisco_ios'}
+list(devnet.inventory.by_device_type("cisco_ios"))
+# - "group" key in inventory entry is indexed too: devnet.inventory.by_group("dc1")
+
+#################################################################
+# Installing devnet as package (pyproject.toml)
+# - options 1-4 above (cd into modules, __init__.py, sys.path.insert, copying into dist-packages) work,
+#   but every new script or cron job has to repeat them, and search of extra paths costs time on each start
+# - modules/devnet is now package with pyproject.toml in repository root, so it is installed once:
+# student@student-vm:~$ pip install /home/student/Python56            (add [ssh] to also install netmiko)
+import devnet
+devnet.inventory
+devnet.issue_command("csr1kv1", "show version")
+# - "import devnet" loads only devnet/__init__.py, netmiko is imported when first connection is opened
+#   and devnet.fleet, devnet.aio, ... are imported on first use
+# - package also installs devnet command:
+# student@student-vm:~$ devnet routers
+# student@student-vm:~$ devnet configure-bgp --workers 200
+# - startup cost of every entry point is measured with python -X importtime:
+# student@student-vm:~$ python benchmarks/bench_importtime.py
+
+#################################################################
+# Logging many sessions at once (devnet.sessionlog)
+# - device.open_session_log("/home/student/logs/CSR.log") keeps one open file per session and writes while reading output
+# - with thousand sessions that is thousand open files and disk writes in middle of SSH work
+# - SessionLogger puts every write on queue, one background thread writes them:
+# - entries are grouped into blocks and every block is compressed (gzip, or zstd with zstandard package)
+# - log file rotates when it reaches max_bytes, index.sqlite remembers where each device's entry is
+# Example (same as open_session_log(), but device is first argument):
+from devnet.sessionlog import SessionLogger
+logger = SessionLogger("/home/student/logs", max_bytes=64 * 2 ** 20, compression="gzip")
+logger.open_session_log(device, "/home/student/logs/CSR.log")
+device.send_command("show version")
+logger.close()
+logger.read("/home/student/logs/CSR.log")
+# [(1700000000.0, 'csr1kv1#show version\nCisco IOS XE Software, Version 16.09.03\n...')]
+# student@student-vm:~$ zcat /home/student/logs/session-000001.log.gz
+
+#################################################################
+# Timeouts that follow device latency (devnet.scheduler)
+# - session_timeout is same fixed number for every device (60, 120, 180 above)
+# - slow devices time out, and when fast device hangs, whole timeout window is wasted
+# - LatencyTracker records how long each device takes and sets its timeout from that (p99 x 3, between 5 and 300 s)
+# - run_scheduled() starts slowest devices first, so they do not finish long after everybody else,
+#   gives every device its own session_timeout and retries failures after random (jittered) wait
+# Example:
+from devnet.scheduler import LatencyTracker, run_scheduled
+tracker = LatencyTracker.load("/home/student/latency.json")
+results = run_scheduled(devnet.configure_bgp_device, devnet.inventory, tracker, workers=200, retries=2)
+tracker.timeout("csr1kv1")
+# 5.0
+tracker.save("/home/student/latency.json")
+
+#################################################################
+# Verifying configuration on whole fleet (devnet.verify)
+# - last step of challenge is "verify that configuration was successfully applied",
+#   verify_bgp() above only prints "BGP session is active"
+# - checks are declared as Check(name, show command, test function), test returns None or what is wrong
+# - every device gets all needed show commands in one batch, output is parsed (devnet.parsers, confdiff)
+#   only when check needs it, and checks stop at first failure of device
+# - devices are verified in parallel (fleet.run_fleet), result is one report for whole fleet
+# - "loopback_ip" in inventory entry is IP address expected on Loopback0 (it is not passed to ConnectHandler)
+# Example:
+from devnet.verify import CSR_CHECKS, verify_fleet, format_report
+report = verify_fleet(checks=CSR_CHECKS, workers=200)
+print(format_report(report))
+# 1000 devices in 0.37 s: 997 passed, 3 failed, 0 errors
+# FAIL  csr1kv4: hostname: hostname is 'wrong'
+# FAIL  csr1kv6: loopback: Loopback0 has 1.1.1.1, expected 10.1.0.6
+# FAIL  csr1kv8: vty ssh only: line vty 0 4: transport input telnet ssh
+# - own checks are plain functions:
+from devnet.verify import Check
+def domain_set(tree, host, details):
+    return None if "ip domain-name abc.com" in tree else "domain-name missing"
+checks = CSR_CHECKS + [Check("domain", "show running-config", domain_set)]
+
+#################################################################
+# Caching show command output (devnet.showcache)
+# - many scripts send "show version" to same routers within minutes, output is the same every time
+# - ShowCache keeps output by (host, command) in memory and in SQLite file shared by all scripts
+# - every command has own TTL in seconds (DEFAULT_TTLS: show version 3600, show interfaces 30, ...),
+#   only show commands are cached, oldest entries are dropped after maxsize
+# - send_config_set() / send_config_from_file() drop cached output of that router (also for other scripts)
+# Example:
+from devnet.showcache import ShowCache
+cache = ShowCache("/home/student/showcache.sqlite", ttls={"show clock": 0})
+device = cache.wrap(devnet.connect("csr1kv1"), "csr1kv1")
+device.send_command("show version")                  # asks router
+device.send_command("show version")                  # from memory, few microseconds
+device.send_config_from_file("/home/student/config_files/csr1kv1.cfg")
+device.send_command("show version")                  # asks router again
+cache.stats
+# {'hits': 1, 'disk_hits': 0, 'misses': 2, 'invalidations': 1}
+# - cache.purge() removes expired rows from file
+
+#################################################################
+# Measuring workflows without routers (benchmarks/bench_farm.py)
+# - ConnectHandler, send_command, send_config_set and configure_bgp can be measured only with real routers
+# - devnet.mockserver.MockFarm starts local server that answers like csr1kv: prompt, show version,
+#   configure terminal with (config)# / (config-if)# prompts, end; latency and jitter are seconds per answer
+# - MockConnection works as connection_class, so every function above runs against it unchanged:
+from devnet.mockserver import MockFarm
+with MockFarm(latency=0.005, jitter=0.002) as farm:
+    devnet.configure_bgp_device("csr1kv1", connection_class=farm.connection_class())
+# - benchmark runs every workflow on 10, 100 and 1000 simulated routers, prints throughput,
+#   p50 / p99 latency and peak memory, and can compare with earlier run:
+# student@student-vm:~$ python benchmarks/bench_farm.py --save farm.json
+# student@student-vm:~$ python benchmarks/bench_farm.py --baseline farm.json --tolerance 0.2
+#  devices workflow            devices/s     p50 ms     p99 ms   peak MiB
+#     1000 configure_bgp            1639      115.4      138.5       18.8
+# - exit code 1 and REGRESSION lines when throughput dropped or p99 grew more than 20 %
+
+#################################################################
+# Where does time go? (devnet.trace)
+# - issue_command(), configure_bgp() and fleet runs do not show if time goes to TCP connect, login,
+#   finding prompt, running command or parsing output
+# - every phase is wrapped in span("phase", host); spans inside other span become its children
+#   (configure_bgp;connect;auth), nothing is recorded until tracing is enabled
+# - enabled span costs about 1.5 microseconds, so tracing can stay on in production
+# Example:
+from devnet import trace
+trace.enable(trace.JsonLinesExporter("/home/student/trace.jsonl"),
+             trace.PrometheusExporter("/var/lib/node_exporter/devnet.prom"))
+fleet.configure_bgp(workers=200)
+trace.disable()
+# - own code can be timed same way:
+with trace.span("backup", "csr1kv1"):
+    output = device.send_command("show running-config")
+# - same from command line, then summary of slowest phases and devices:
+# student@student-vm:~$ devnet --trace trace.jsonl configure-bgp --workers 200
+# student@student-vm:~$ devnet trace-summary trace.jsonl --top 10
+# phase                                       total s    calls
+# configure_bgp                                 9.164      200 ########################################
+#   config                                      6.889      200 ##############################
+#   connect                                     2.270      200 #########
+#     auth                                      2.212      200 #########
+#     tcp_connect                               0.039      200 #
+# slowest devices:
+# csr1kv1                 0.102 s  config 0.050  connect 0.031  command 0.021
+# student@student-vm:~$ devnet trace-summary trace.jsonl --folded | flamegraph.pl > trace.svg
+
+#################################################################
+# Reading very large output (devnet.stream)
+# - send_command() returns output only when all of it is in one string
+# - "show running-config" on big router or "show ip route" with full table is tens of megabytes per call,
+#   and every session running at same time holds its own copy
+# - iter_output() yields output in pieces as they arrive, iter_lines() turns pieces into lines,
+#   so memory per session stays around one read whatever size of output is
+# Example:
+from devnet.stream import iter_output, iter_lines, save_output
+bgp_routes = 0
+for line in iter_lines(iter_output(device, "show ip route")):
+    if line.startswith("B "):
+        bgp_routes += 1
+save_output(device, "show running-config", "/home/student/backups/csr1kv1.cfg")
+# - parsers that read as output arrives take the pieces directly:
+interfaces = parsers.parse_show_interfaces(iter_output(device, "show interfaces"))
+running = confdiff.parse_config(iter_lines(iter_output(device, "show running-config")))
+# student@student-vm:~$ python benchmarks/bench_stream.py --routes 900000 --sessions 1 4
+#  sessions reader             routes    seconds   peak MiB
+#         4 send_command       900000      17.31      315.0
+#         4 iter_output        900000      14.89        2.0
+
+#################################################################
+# Many VLANs and interfaces in few lines (devnet.ranges)
+# - "for vlan in vlans" and "while interface_id <= 4" loops above make one line per VLAN / interface
+# - in data centre that is thousands of lines and send_config_set() waits for router after each of them
+# - consecutive IDs can be written as range, router expands them itself:
+from devnet import ranges
+ranges.vlan_commands([100, 101, 102, 103, 200, 300, 301])
+# ['vlan 100-103,200,300-301']
+ports = {}
+interface_id = 1
+while interface_id <= 48:
+    ports["Ethernet1/{}".format(interface_id)] = ["switchport access vlan 100"]
+    interface_id += 1
+ranges.interface_commands(ports, style="nxos")
+# ['interface Ethernet1/1-48', ' switchport access vlan 100']
+ranges.interface_commands(ports)            # IOS syntax, at most 5 ranges in one line
+# ['interface range Ethernet1/1 - 48', ' switchport access vlan 100']
+# - interfaces with same commands end up in same range, push() sends commands in batches of send_config_set()
+ranges.push(device, ranges.vlan_commands(vlans) + ranges.interface_commands(ports), batch_size=500)
+# student@student-vm:~$ python benchmarks/bench_ranges.py --vlans 4000 --switches 8 --latency 0.001
+# generator         lines      bytes    apply s
+# per item           5072      67036       5.69
+# ranges               34       2074       0.04
+
+#################################################################
+# Parsing on all cores (devnet.parsepool)
+# - parsing output is CPU work; done in fleet threads right after send_command(), threads take turns on one core (GIL)
+# - ingest(): fleet threads only connect and read output, every output is handed to pool of parser processes
+#   through shared memory (big text is not copied through pipe), parsed results go into facts
+# - facts is nested dictionary like facts above, or FactsStore:
+from devnet import parsepool
+facts = {}
+results = parsepool.ingest(devnet.inventory, facts, commands=("show version", "show interfaces"), workers=200)
+facts["csr1kv1"]["version"]
+# '16.09.03'
+facts["csr1kv1"]["if_state"]
+# [{'name': 'GigabitEthernet1', 'state': 'no shutdown'}, {'name': 'GigabitEthernet2', 'state': 'no shutdown'}, ...]
+store = FactsStore()
+parsepool.ingest(devnet.inventory, store, processes=4)
+# - pool can also be used directly, result is same as parsers.parse():
+with parsepool.ParsePool() as pool:
+    interfaces = pool.submit("show interfaces", output).result()
+# student@student-vm:~$ python benchmarks/bench_parsepool.py --hosts 500 --interfaces 2000 --processes 4
+
+#################################################################
+# Removing duplicate devices from merged inventories (devnet.inventory_index)
+# - set(devices) above keeps both 'ASA' and 'asa'; inventories merged from several sources also list same router
+#   as "csr1kv1", "CSR1KV1.abc.com" or by its IP address, and fleet run then connects to it twice
+# - InventoryIndex normalizes names (lowercase, without domain), IP addresses and device_type ("IOS-XE" -> "cisco_xe"),
+#   entries sharing hostname, IP address or alias become one device:
+from devnet.inventory_index import InventoryIndex
+index = InventoryIndex(domains=["abc.com"])
+index.merge(device_data.INVENTORY, devnet.inventory, {"CSR1KV1.abc.com": {"ip": "10.254.0.1", "device_type": "IOS-XE"}})
+index.resolve("10.254.0.1")
+# 'csr1kv1'
+index.unique(["csr1kv1", "CSR1KV1", "10.254.0.1", "csr1kv2"])
+# ['csr1kv1', 'csr1kv2']
+index.duplicates
+# 3
+clean_inventory = index.inventory()          # one entry per device, same shape as devnet.inventory
+# - merge of 1,000,000 entries (250,000 devices) takes about 4 s, every entry is one dictionary lookup per key
+
+#################################################################
+# Rolling out change in waves, spines before leaves (devnet.rollout)
+# - spine_switch and leaf_switch above are not equal: broken change on all spines at once takes down whole fabric,
+#   while leaves can be changed fifty at a time
+# - inventory entry gets "role" and "depends_on" (host or role names that must be done and verified first),
+#   connect() leaves these keys out of ConnectHandler arguments
+devnet.inventory["csr1kv1"].update(role="spine")
+devnet.inventory["csr1kv2"].update(role="leaf", depends_on=["spine"])
+from devnet import rollout
+waves = rollout.plan(limits={"spine": 1, "leaf": 50})
+print(rollout.format_plan(waves))
+# wave 0   spine       1 devices  after -          csr1kv1
+# wave 1   leaf        1 devices  after 0          csr1kv2
+# - each wave is pushed in parallel and verified; next wave starts as soon as all waves it waits for passed,
+#   failed wave stops only waves that depend on it
+report = rollout.run_rollout(devnet.configure_bgp_device, waves, verify=devnet.verify_bgp_device)
+print(rollout.format_report(report))
+# 2 waves in 1.84 s: 2 passed, 0 failed, 0 skipped
+
+#################################################################
+# Keeping every night's running-config without storing it every night (devnet.snapshots)
+# - backup as send_command("show running-config") written to new file per device per night is mostly same text:
+#   same template on every router, and same config as yesterday on most of them
+# - SnapshotStore cuts config into chunks (whole sections), stores each different chunk once, and keeps
+#   per-device history as small deltas; config that did not change since last night is not written at all
+from devnet.snapshots import SnapshotStore
+store = SnapshotStore("/home/student/backups/configs.sqlite")
+for router in devnet.inventory:
+    device = devnet.connect(router)
+    store.backup(device, router)                 # True when config changed, False when nothing was written
+    device.disconnect()
+# - results of fleet run can be backed up same way: fleet.run_fleet(task, hosts) with task calling store.backup()
+store.get("csr1kv1")                             # latest config
+store.get("csr1kv1", at=time.time() - 7 * 86400) # config as it was week ago
+store.history("csr1kv1")
+# [Snapshot(host='csr1kv1', ts=1700000000.0, digest='713425122a8593c5275ea76ca5948032'), ...]
+# student@student-vm:~$ python benchmarks/bench_snapshots.py --devices 200 --nights 30 --changes 5
+# storage                               MiB
+# file per night                      64.53
+# gzip file per night                  7.60
+# SnapshotStore                        0.56
+# put: 0.17 ms per config   get: 0.06 ms per config
+
+#################################################################
+# Spreading inventory over collector nodes (devnet.distributed)
+# - issue_command() workers of one collector process hit its GIL and open file limit long before big inventory is done
+# - Coordinator splits inventory between nodes with consistent hashing: host always lands on same node, and when
+#   node dies only its hosts move; jobs and results go through queue
+# - SQLiteQueue is file on local disk, nodes are worker processes on this host; SQLite WAL does not work over
+#   NFS / SMB, nodes on several machines need network queue (Redis, broker) with same methods
+# - every node runs worker, worker that finished its own shard takes over half of pending jobs of busiest node
+# student@student-vm:~$ devnet worker /home/student/queue.sqlite node1 --workers 200 &
+# student@student-vm:~$ devnet worker /home/student/queue.sqlite node2 --workers 200 &
+from devnet import distributed
+queue = distributed.SQLiteQueue("/home/student/queue.sqlite")
+coordinator = distributed.Coordinator(queue, ["node1", "node2"], node_timeout=30)
+run = coordinator.submit(devnet.inventory, "issue_command", command="show version")
+for result in coordinator.results(run):          # results of all nodes in one stream, as they finish
+    print(result.host, "ok" if result.ok else result.error)
+# student@student-vm:~$ devnet distribute /home/student/queue.sqlite "show version" --nodes node1 node2
+# student@student-vm:~$ python benchmarks/bench_distributed.py --jobs 2000 --workers 16 --latency 0.02
+# scenario                              seconds       jobs/s
+# 1 nodes                                  2.65          756
+# 2 nodes                                  1.38         1445
+# 4 nodes                                  0.80         2513
+# 4 nodes, 1 slow, no stealing             2.97          673
+# 4 nodes, 1 slow, stealing                0.89         2253
+
+#################################################################
+# Reading prompt as soon as it arrives (devnet.prompts)
+# - loop that waits for "csr1kv1#" or "csr1kv1(config-if)#" by reading channel and sleeping fixed delay
+#   between reads waits out rest of that delay after prompt already arrived, on every single command
+# - ChannelWaiter wakes up when channel has data (selectors on netmiko's remote_conn), prompt patterns are compiled
+#   once per platform and only last line of output is checked after each read;
+#   batch.send_command_batch() and stream.iter_output() wait this way
+from devnet import prompts
+prompts.prompt_pattern("cisco_ios", "csr1kv1").fullmatch("csr1kv1(config-if)#")
+# <re.Match object; span=(0, 19), match='csr1kv1(config-if)#'>
+device = devnet.connect("csr1kv1")
+output = prompts.send_command(device, "show ip interface brief")
+device.write_channel("show version\n")
+output, prompt = prompts.read_until_prompt(device)   # prompt pattern from device_type and base_prompt
+# student@student-vm:~$ python benchmarks/bench_prompts.py --commands 200 --latency 0.002
+# loop                          mean ms       p99 ms  idle ms/command
+# sleep-and-read 0.01 s           10.23        10.38             8.23
+# sleep-and-read 0.05 s           50.25        50.41            48.25
+# sleep-and-read 0.2 s           200.39       201.43           198.39
+# event-driven                     2.33         2.57             0.33
+
+#################################################################
+# Checking whole fleet against compliance rules (devnet.compliance)
+# - nested ifs above (if hostname == "csr1kv-1": if os_version == "16.09.03": ...) check one rule on one device;
+#   thousands of rules run this way against every device in facts is rules x devices checks
+# - Rule(name, require, when): conditions are (fact, operator, value), operators: == != in "not in" prefix
+#   < <= > >= (versions compared as numbers) present absent contains missing
+# - ComplianceEngine compiles rules: same condition is evaluated once, conditions on one fact are answered by one
+#   dictionary lookup, and rule is looked at only on devices its "when" condition selects
+from devnet.compliance import ComplianceEngine, Rule
+engine = ComplianceEngine([
+    Rule("baseline", [("version", "==", "16.09.03")], when=[("hostname", "==", "csr1kv-1")]),
+    Rule("gi1 up", [("if_state.GigabitEthernet1", "==", "no shutdown")], when=[("os", "==", "ios-xe")]),
+    Rule("min version", [("version", ">=", "16.09.03")]),
+    Rule("no telnet", [("features", "missing", "telnet")]),
+])
+for violation in engine.evaluate(facts):          # nested facts dictionary or FactsStore
+    print(violation)
+# Violation(device='csr1kv-1', rule='baseline', message="version == '16.09.03' (is '16.12.04')")
+# Violation(device='csr1kv-1', rule='no telnet', message="features missing 'telnet' (is ['ssh', 'telnet'])")
+# Violation(device='csr1kv2', rule='gi1 up', message="if_state.GigabitEthernet1 == 'no shutdown' (is 'shutdown')")
+# - when facts of one device change, only that device is checked again and only difference is reported:
+facts["csr1kv-1"]["version"] = "16.09.03"
+engine.update("csr1kv-1", facts["csr1kv-1"])
+# Change(added=[], resolved=[Violation(device='csr1kv-1', rule='baseline', message="version == '16.09.03' (is '16.12.04')")])
+# student@student-vm:~$ python benchmarks/bench_compliance.py --devices 20000 --rules 5000
+# evaluation                            seconds
+# every rule on every device              43.10
+# compile rules                            0.05
+# ComplianceEngine.evaluate                0.46
+# update of one device: 33.8 us (415 violation changes in 10000 updates)
@@ -0,0 +1,45 @@
+# bench_async.py
+# - throughput of aio.issue_commands against local mockserver at different concurrency levels
+# - mockserver speaks plain text over TCP, so numbers show event loop scaling, not SSH crypto cost
+# student@student-vm:~$ python benchmarks/bench_async.py --hosts 2000 --latency 0.05
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet import aio
+from devnet.mockserver import start_mock_server
+
+
+async def bench(args):
+    server = await start_mock_server(latency=args.latency)
+    address = server.sockets[0].getsockname()[:2]
+    hosts = ["csr1kv{}".format(index) for index in range(1, args.hosts + 1)]
+    commands = ["show version"] * args.commands
+    print("{:>12} {:>10} {:>12} {:>8}".format("concurrency", "seconds", "commands/s", "failed"))
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        results = await aio.issue_commands(commands, hosts, concurrency=concurrency,
+                                           open_session=aio.stream_sessions(address))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for result in results if not result.ok)
+        print("{:>12} {:>10.2f} {:>12.0f} {:>8}".format(concurrency, elapsed, len(results) / elapsed, failed))
+    server.close()
+    await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--commands", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500, 2000])
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
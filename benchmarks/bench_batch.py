@@ -0,0 +1,43 @@
+# bench_batch.py
+# - per-device wall time of N send_command() calls versus one send_command_batch() on simulated router
+# student@student-vm:~$ python benchmarks/bench_batch.py --commands 20 --latency 0.05
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.batch import send_command_batch
+from devnet.fakedevice import FakeDevice
+
+SHOW_COMMANDS = ["show version", "show ip interface brief", "show ip bgp summary", "show running-config"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    commands = [SHOW_COMMANDS[index % len(SHOW_COMMANDS)] for index in range(args.commands)]
+    device = FakeDevice("csr1kv1", latency=args.latency)
+
+    start = time.perf_counter()
+    for command in commands:
+        device.send_command(command)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    send_command_batch(device, commands)
+    batched = time.perf_counter() - start
+
+    print("commands: {}  latency: {} s".format(args.commands, args.latency))
+    print("send_command loop:  {:6.3f} s".format(one_by_one))
+    print("send_command_batch: {:6.3f} s".format(batched))
+    print("speedup:            {:6.1f}x".format(one_by_one / batched))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# bench_compliance.py
+# - rule set against fleet facts: every rule checked as Python against every device (nested ifs from notes,
+#   written generically) versus compiled devnet.compliance.ComplianceEngine
+# - rules: version baseline per device (when hostname == ...), interface state rules per OS,
+#   minimum version and feature rules for whole fleet
+# - update: facts of one device change, engine re-checks only rules that use changed facts
+# student@student-vm:~$ python benchmarks/bench_compliance.py --devices 20000 --rules 5000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.compliance import ComplianceEngine, Rule, flatten
+
+VERSIONS = ["16.09.03", "16.09.05", "16.12.04", "17.03.02"]
+OSES = ["ios-xe", "ios-xe", "ios-xe", "nx-os"]
+FEATURES = ["ssh", "bgp", "ospf", "snmp", "telnet", "netconf"]
+
+_COMPARE = {
+    "==": lambda value, operand: value == operand,
+    "!=": lambda value, operand: value != operand,
+    "in": lambda value, operand: value in operand,
+    ">=": lambda value, operand: value is not None and
+    tuple(map(int, value.split("."))) >= tuple(map(int, operand.split("."))),
+    "contains": lambda value, operand: value is not None and operand in value,
+    "missing": lambda value, operand: value is None or operand not in value,
+}
+
+
+def make_facts(devices, interfaces):
+    random.seed(1)
+    facts = {}
+    for index in range(devices):
+        facts["csr1kv{}".format(index)] = {
+            "os": OSES[index % len(OSES)],
+            "version": VERSIONS[index % len(VERSIONS)],
+            "if_state": [{"name": "GigabitEthernet{}".format(port),
+                          "state": "shutdown" if random.random() < 0.05 else "no shutdown"}
+                         for port in range(1, interfaces + 1)],
+            "features": random.sample(FEATURES, 3),
+        }
+    return facts
+
+
+def make_rules(devices, count, interfaces):
+    rules = [Rule("min version", [("version", ">=", "16.09.05")]),
+             Rule("no telnet", [("features", "missing", "telnet")]),
+             Rule("ssh", [("features", "contains", "ssh")], when=[("os", "in", ["ios-xe", "nx-os"])])]
+    for port in range(1, interfaces + 1):
+        for os_name in ("ios-xe", "nx-os"):
+            rules.append(Rule("Gi{} up on {}".format(port, os_name),
+                              [("if_state.GigabitEthernet{}".format(port), "==", "no shutdown")],
+                              when=[("os", "==", os_name)]))
+    while len(rules) < count:
+        device = len(rules) % devices
+        rules.append(Rule("baseline csr1kv{}".format(device), [("version", "==", VERSIONS[device % 3])],
+                          when=[("hostname", "==", "csr1kv{}".format(device))]))
+    return rules
+
+
+def interpreted(rules, facts):
+    violations = []
+    for device, details in facts.items():
+        flat = flatten(device, details)
+        for rule in rules:
+            if all(_COMPARE[op](flat.get(fact), value) for fact, op, value in rule.when) and \
+                    not all(_COMPARE[op](flat.get(fact), value) for fact, op, value in rule.require):
+                violations.append((device, rule.name))
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=20000)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--interfaces", type=int, default=16)
+    parser.add_argument("--updates", type=int, default=10000)
+    args = parser.parse_args()
+
+    facts = make_facts(args.devices, args.interfaces)
+    rules = make_rules(args.devices, args.rules, args.interfaces)
+
+    start = time.perf_counter()
+    expected = interpreted(rules, facts)
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = ComplianceEngine(rules)
+    compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = engine.evaluate(facts)
+    compiled = time.perf_counter() - start
+    assert sorted((item.device, item.rule) for item in found) == sorted(expected)
+
+    devices = list(facts)
+    start = time.perf_counter()
+    changes = 0
+    for step in range(args.updates):
+        device = devices[step * 7919 % len(devices)]
+        details = dict(facts[device], version=VERSIONS[step % len(VERSIONS)])
+        added, resolved = engine.update(device, details)
+        changes += len(added) + len(resolved)
+    update = (time.perf_counter() - start) / args.updates
+
+    print("{} devices, {} rules ({} distinct predicates), {} violations".format(
+        args.devices, len(rules), len(engine.predicates), len(found)))
+    print("{:<34} {:>10}".format("evaluation", "seconds"))
+    print("{:<34} {:>10.2f}".format("every rule on every device", naive))
+    print("{:<34} {:>10.2f}".format("compile rules", compile_time))
+    print("{:<34} {:>10.2f}".format("ComplianceEngine.evaluate", compiled))
+    print("update of one device: {:.1f} us ({} violation changes in {} updates)".format(
+        update * 1e6, changes, args.updates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_confdiff.py
+# - pushing large prefix-list: full send_config_set() every run versus ConfigPusher delta push
+# student@student-vm:~$ python benchmarks/bench_confdiff.py --lines 2000 --changed 10 --latency 0.001
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.confdiff import ConfigPusher
+from devnet.fakedevice import FakeDevice
+
+
+def prefix_list(lines, offset=0):
+    return ["ip prefix-list BIG seq {} permit 10.{}.{}.0/24".format(
+        (index + 1) * 5, (index + offset) >> 8 & 255, (index + offset) & 255) for index in range(lines)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.001)
+    args = parser.parse_args()
+
+    first = prefix_list(args.lines)
+    second = first[:args.lines - args.changed] + prefix_list(args.changed, offset=args.lines)[:args.changed]
+
+    device = FakeDevice("csr1kv1", latency=args.latency)
+    device.running_config.extend(first)
+    start = time.perf_counter()
+    device.send_config_set(second)
+    full = time.perf_counter() - start
+
+    device = FakeDevice("csr1kv1", latency=args.latency)
+    device.running_config.extend(first)
+    pusher = ConfigPusher()
+    start = time.perf_counter()
+    pushed = pusher.push(device, "csr1kv1", "\n".join(second))
+    delta = time.perf_counter() - start
+    start = time.perf_counter()
+    pusher.push(device, "csr1kv1", "\n".join(second))
+    repeat = time.perf_counter() - start
+
+    print("lines: {}  changed: {}  latency: {} s per command".format(args.lines, args.changed, args.latency))
+    print("full send_config_set:     {:8.3f} s  ({} commands)".format(full, len(second)))
+    print("ConfigPusher first run:   {:8.3f} s  ({} commands)".format(delta, len(pushed)))
+    print("ConfigPusher repeat run:  {:8.3f} s  (0 commands, cached tree)".format(repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_distributed.py
+# - devnet.distributed on one machine: every node is own process with --workers threads (cap of one collector),
+#   every job is simulated device round trip of --latency seconds, jobs go through SQLiteQueue file
+# - scaling: same jobs over 1, 2, 4, 8 nodes
+# - straggler: one node --slow times slower, with and without work stealing
+# - failure: one node is killed after half a second, Coordinator moves only its shard
+# student@student-vm:~$ python benchmarks/bench_distributed.py --jobs 2000 --workers 16 --latency 0.02
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.distributed import Coordinator, SQLiteQueue, Worker
+
+
+def collect(host, latency):
+    time.sleep(latency)
+    return len(host)
+
+
+def node_process(path, node, workers, factor, steal):
+    queue = SQLiteQueue(path)
+    worker = Worker(queue, node, workers=workers, steal=steal, heartbeat=0.2, lease=30.0,
+                    actions={"collect": lambda host, latency: collect(host, latency * factor)})
+    worker.serve(until_idle=True, poll=0.05)
+
+
+def run(args, nodes, slow=None, steal=True, kill=None):
+    path = os.path.join(tempfile.mkdtemp(), "queue.sqlite")
+    queue = SQLiteQueue(path)
+    names = ["node{}".format(index) for index in range(nodes)]
+    coordinator = Coordinator(queue, names, node_timeout=1.0)
+    hosts = ["router{}".format(index) for index in range(args.jobs)]
+    start = time.perf_counter()
+    run_id = coordinator.submit(hosts, "collect", latency=args.latency)
+    processes = {}
+    for name in names:
+        factor = args.slow if name == slow else 1.0
+        process = multiprocessing.Process(target=node_process, args=(path, name, args.workers, factor, steal))
+        process.start()
+        processes[name] = process
+    if kill is not None:
+        threading.Timer(0.5, processes[kill].kill).start()
+    results = list(coordinator.results(run_id, poll=0.05))
+    elapsed = time.perf_counter() - start
+    for process in processes.values():
+        process.join()
+    assert len(results) == args.jobs and all(result.ok for result in results)
+    return elapsed, coordinator.dead
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16, help="threads per node")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--slow", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print("{} jobs, {} threads per node, {} s per job".format(args.jobs, args.workers, args.latency))
+    print("{:<34} {:>10} {:>12}".format("scenario", "seconds", "jobs/s"))
+    for nodes in (1, 2, 4, 8):
+        elapsed, _ = run(args, nodes)
+        print("{:<34} {:>10.2f} {:>12.0f}".format("{} nodes".format(nodes), elapsed, args.jobs / elapsed))
+    for steal in (False, True):
+        elapsed, _ = run(args, 4, slow="node0", steal=steal)
+        label = "4 nodes, 1 slow, {}".format("stealing" if steal else "no stealing")
+        print("{:<34} {:>10.2f} {:>12.0f}".format(label, elapsed, args.jobs / elapsed))
+    elapsed, dead = run(args, 4, kill="node1")
+    label = "4 nodes, {} killed".format(",".join(dead))
+    print("{:<34} {:>10.2f} {:>12.0f}".format(label, elapsed, args.jobs / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench_facts.py
+# - memory and query time: nested facts dictionary versus factstore.FactsStore
+# - query: all Gi interfaces shut on ios-xe 16.09.x
+# - update: state of every interface flipped once, in random order (re-ingest of facts)
+# student@student-vm:~$ python benchmarks/bench_facts.py --devices 100000 --interfaces 8
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.factstore import FactsStore
+
+VERSIONS = ["16.09.03", "16.09.05", "16.12.04", "17.03.02"]
+OSES = ["ios-xe", "ios-xe", "ios-xe", "nx-os"]
+
+
+def make_facts(devices, interfaces):
+    facts = {}
+    for index in range(devices):
+        facts["csr1kv{}".format(index)] = {
+            "os": OSES[index % len(OSES)],
+            "version": VERSIONS[index % len(VERSIONS)],
+            "if_state": [
+                {"name": "{}0/{}".format("Gi" if port % 2 else "Te", port),
+                 "state": "shutdown" if (index + port) % 7 == 0 else "no shutdown"}
+                for port in range(interfaces)
+            ],
+        }
+    return facts
+
+
+def scan(facts):
+    return [(device, interface["name"])
+            for device, details in facts.items()
+            if details["os"] == "ios-xe" and details["version"].startswith("16.09")
+            for interface in details["if_state"]
+            if interface["state"] == "shutdown" and interface["name"].startswith("Gi")]
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=100000)
+    parser.add_argument("--interfaces", type=int, default=8)
+    args = parser.parse_args()
+
+    facts, nested_size = measure(lambda: make_facts(args.devices, args.interfaces))
+    store, store_size = measure(lambda: FactsStore.from_nested(facts))
+
+    start = time.perf_counter()
+    expected = scan(facts)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = store.query_interfaces(os="ios-xe", version_prefix="16.09", state="shutdown", name_prefix="Gi")
+    query_time = time.perf_counter() - start
+    assert sorted(found) == sorted(expected)
+
+    print("devices: {}  interfaces: {}  matches: {}".format(args.devices, args.devices * args.interfaces, len(found)))
+    print("{:<12} {:>10} {:>10}".format("", "MiB", "query ms"))
+    print("{:<12} {:>10.1f} {:>10.1f}".format("nested dict", nested_size / 2 ** 20, scan_time * 1000))
+    print("{:<12} {:>10.1f} {:>10.1f}".format("FactsStore", store_size / 2 ** 20, query_time * 1000))
+
+    updates = [(device, interface["name"], "no shutdown" if interface["state"] == "shutdown" else "shutdown")
+               for device, details in facts.items() for interface in details["if_state"]]
+    random.Random(1).shuffle(updates)
+    start = time.perf_counter()
+    for device, name, state in updates:
+        store.set_interface(device, name, state)
+    update_time = time.perf_counter() - start
+    print("{} interface updates: {:.2f} s ({:.1f} us each)".format(
+        len(updates), update_time, update_time / len(updates) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
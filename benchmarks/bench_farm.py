@@ -0,0 +1,160 @@
+# bench_farm.py
+# - workflows from notes (ConnectHandler, send_command, send_config_set, configure_bgp) against simulated
+#   csr1kv farm of 10, 100 and 1000 routers, no real routers needed
+# - "mock" backend talks to mockserver.MockFarm over local TCP (prompts, show version, config mode),
+#   "fake" backend uses fakedevice.FakeDevice in process (no sockets, only simulated latency)
+# - every workflow runs once on every router through fleet.run_fleet, latency is per router,
+#   throughput is routers per second of wall time
+# - memory is peak of Python allocations (tracemalloc) in second, separate run of same workflow,
+#   it includes mock server, which runs in same process
+# - --save writes results to JSON file, --baseline compares with saved file and exits with 1 when
+#   throughput dropped or p99 grew more than --tolerance
+# student@student-vm:~$ python benchmarks/bench_farm.py --latency 0.005 --jitter 0.002 --save farm.json
+# student@student-vm:~$ python benchmarks/bench_farm.py --latency 0.005 --jitter 0.002 --baseline farm.json
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+import devnet
+from devnet import fleet
+from devnet.fakedevice import FakeDevice, fake_inventory
+from devnet.mockserver import MockFarm
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def connect_disconnect(connection_class, host):
+    devnet.connect(host, connection_class).disconnect()
+
+
+def send_command(sessions, host):
+    return sessions[host].send_command("show version")
+
+
+def send_config_set(sessions, host):
+    return sessions[host].send_config_set(devnet.bgp_config(host))
+
+
+def workflows(connection_class, sessions):
+    return [
+        ("ConnectHandler", partial(connect_disconnect, connection_class)),
+        ("send_command", partial(send_command, sessions)),
+        ("send_config_set", partial(send_config_set, sessions)),
+        ("configure_bgp", partial(devnet.configure_bgp_device, connection_class=connection_class)),
+    ]
+
+
+def run(task, hosts, workers):
+    start = time.perf_counter()
+    results = fleet.run_fleet(task, hosts, workers=workers)
+    wall = time.perf_counter() - start
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError("{} of {} failed, first: {!r}".format(len(failed), len(results), failed[0].error))
+    return wall, [result.elapsed for result in results]
+
+
+def bench(devices, connection_class, args):
+    devnet.inventory = fake_inventory(devices)
+    hosts = list(devnet.inventory)
+    workers = min(devices, args.workers)
+    sessions = {host: devnet.connect(host, connection_class) for host in hosts}
+    rows = []
+    try:
+        for name, task in workflows(connection_class, sessions):
+            wall, latencies = run(task, hosts, workers)
+            peak = None
+            if args.memory:
+                tracemalloc.start()
+                run(task, hosts, workers)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            rows.append({
+                "devices": devices,
+                "workflow": name,
+                "throughput": devices / wall,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "peak_mib": None if peak is None else peak / 2 ** 20,
+            })
+    finally:
+        for session in sessions.values():
+            session.disconnect()
+    return rows
+
+
+def compare(rows, baseline, tolerance):
+    # - returns list of regressions, workflows missing in baseline are skipped
+    saved = {(row["devices"], row["workflow"]): row for row in baseline}
+    regressions = []
+    for row in rows:
+        old = saved.get((row["devices"], row["workflow"]))
+        if old is None:
+            continue
+        if row["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append("{} @ {}: throughput {:.0f}/s, was {:.0f}/s".format(
+                row["workflow"], row["devices"], row["throughput"], old["throughput"]))
+        if row["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append("{} @ {}: p99 {:.1f} ms, was {:.1f} ms".format(
+                row["workflow"], row["devices"], row["p99_ms"], old["p99_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--backend", choices=["mock", "fake"], default="mock")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    farm = None
+    if args.backend == "mock":
+        farm = MockFarm(latency=args.latency, jitter=args.jitter).start()
+        connection_class = farm.connection_class()
+    else:
+        connection_class = partial(FakeDevice, latency=args.latency, jitter=args.jitter)
+
+    rows = []
+    print("{:>8} {:<16} {:>12} {:>10} {:>10} {:>10}".format(
+        "devices", "workflow", "devices/s", "p50 ms", "p99 ms", "peak MiB"))
+    try:
+        for devices in args.devices:
+            for row in bench(devices, connection_class, args):
+                rows.append(row)
+                peak = "-" if row["peak_mib"] is None else "{:.1f}".format(row["peak_mib"])
+                print("{:>8} {:<16} {:>12.0f} {:>10.1f} {:>10.1f} {:>10}".format(
+                    row["devices"], row["workflow"], row["throughput"], row["p50_ms"], row["p99_ms"], peak))
+    finally:
+        if farm is not None:
+            farm.close()
+
+    if args.save:
+        with open(args.save, "w") as result_file:
+            json.dump(rows, result_file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(rows, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench_fleet.py
+# - compares sequential configure_bgp loop with fleet.configure_bgp on simulated routers
+# - sequential run is measured on small sample and extrapolated, because full run takes too long
+# student@student-vm:~$ python benchmarks/bench_fleet.py --hosts 1000 --latency 0.005 --workers 200
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+import devnet
+from devnet import fleet
+from devnet.fakedevice import FakeDevice, fake_inventory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=50)
+    args = parser.parse_args()
+
+    devnet.inventory = fake_inventory(args.hosts)
+    device = partial(FakeDevice, latency=args.latency, jitter=args.jitter)
+    hosts = list(devnet.inventory)
+
+    start = time.perf_counter()
+    for router in hosts[:args.sample]:
+        devnet.configure_bgp_device(router, connection_class=device)
+    sequential = (time.perf_counter() - start) * len(hosts) / args.sample
+
+    start = time.perf_counter()
+    results = fleet.configure_bgp(connection_class=device, workers=args.workers, timeout=30)
+    parallel = time.perf_counter() - start
+
+    failed = sum(1 for result in results if not result.ok)
+    print("hosts: {}  workers: {}  failed: {}".format(len(hosts), args.workers, failed))
+    print("sequential (extrapolated): {:8.2f} s".format(sequential))
+    print("fleet:                     {:8.2f} s".format(parallel))
+    print("speedup:                   {:8.1f}x".format(sequential / parallel))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_importtime.py
+# - startup cost per public entry point, measured with python -X importtime in fresh process
+# - "import time" is sum of self times reported by -X importtime, "process" is wall time of whole run
+# student@student-vm:~$ python benchmarks/bench_importtime.py --runs 5
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+MODULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules")
+
+ENTRY_POINTS = [
+    ("bare interpreter", "pass"),
+    ("inventory", "from devnet import inventory"),
+    ("issue_command", "from devnet import issue_command"),
+    ("configure_bgp", "from devnet import configure_bgp"),
+    ("fleet.configure_bgp", "from devnet.fleet import configure_bgp"),
+    ("aio.issue_commands", "from devnet.aio import issue_commands"),
+]
+
+
+def measure(code):
+    env = dict(os.environ, PYTHONPATH=MODULES + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    wall = time.perf_counter() - start
+    imported = 0
+    modules = 0
+    for line in process.stderr.splitlines():
+        # - import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        imported += int(line.split(":", 1)[1].split("|")[0])
+        modules += 1
+    return imported, modules, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    print("{:<22} {:>8} {:>16} {:>12}".format("entry point", "modules", "import time ms", "process ms"))
+    for name, code in ENTRY_POINTS:
+        runs = [measure(code) for _ in range(args.runs)]
+        imported = min(run[0] for run in runs) / 1000.0
+        wall = min(run[2] for run in runs) * 1000
+        print("{:<22} {:>8} {:>16.1f} {:>12.1f}".format(name, runs[0][1], imported, wall))
+
+
+if __name__ == "__main__":
+    main()
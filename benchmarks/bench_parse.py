@@ -0,0 +1,79 @@
+# bench_parse.py
+# - parses about 100k lines of "show interfaces": line by line split() parser versus parsers.py
+#   regex state machine, plus repeated parse of unchanged output through ParseCache
+# student@student-vm:~$ python benchmarks/bench_parse.py --interfaces 5000
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet import parsers
+from devnet.fakedevice import show_interfaces
+
+
+def split_parser(output):
+    interfaces = []
+    current = None
+    for line in output.splitlines():
+        words = line.split()
+        if not words:
+            continue
+        if not line.startswith(" ") and " line protocol is " in line:
+            current = {"name": words[0], "status": line.split(" is ")[1].split(",")[0],
+                       "protocol": words[-1]}
+            interfaces.append(current)
+        elif current is None:
+            continue
+        elif line.startswith("  Description:"):
+            current["description"] = line.split(":", 1)[1].strip()
+        elif line.startswith("  Internet address is"):
+            current["address"] = words[-1]
+        elif line.startswith("  MTU"):
+            current["mtu"] = int(words[1])
+            current["bandwidth"] = int(words[4])
+        elif "packets input" in line:
+            current["input_packets"] = int(words[0])
+            current["input_bytes"] = int(words[3])
+        elif "input errors" in line:
+            current["input_errors"] = int(words[0])
+            current["crc"] = int(words[3])
+        elif "packets output" in line:
+            current["output_packets"] = int(words[0])
+            current["output_bytes"] = int(words[3])
+        elif "output errors" in line:
+            current["output_errors"] = int(words[0])
+    return interfaces
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interfaces", type=int, default=5000)
+    args = parser.parse_args()
+    output = show_interfaces(args.interfaces)
+    lines = output.count("\n")
+
+    split_time, expected = timed(split_parser, output)
+    regex_time, records = timed(parsers.parse_show_interfaces, output)
+    assert len(expected) == len(records)
+
+    cache = parsers.ParseCache()
+    cache.parse("csr1kv1", "show interfaces", output)
+    cached_time, _ = timed(cache.parse, "csr1kv1", "show interfaces", output)
+
+    print("lines: {}  interfaces: {}".format(lines, len(records)))
+    print("split() per line:        {:8.1f} ms".format(split_time * 1000))
+    print("parsers.py regex:        {:8.1f} ms".format(regex_time * 1000))
+    print("ParseCache (unchanged):  {:8.1f} ms".format(cached_time * 1000))
+
+
+if __name__ == "__main__":
+    main()
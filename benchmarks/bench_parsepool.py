@@ -0,0 +1,65 @@
+# bench_parsepool.py
+# - fills facts from "show version" + "show interfaces" of simulated routers:
+#   parsing inline in fleet threads (GIL shared with I/O) against parsepool.ingest() with parser processes
+# - speedup depends on number of cores, with one core both take about same time
+# student@student-vm:~$ python benchmarks/bench_parsepool.py --hosts 500 --interfaces 2000 --processes 4
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+import devnet
+from devnet import batch, fleet, parsepool, parsers
+from devnet.fakedevice import FakeDevice, fake_inventory
+
+
+def ingest_inline(hosts, facts, connection_class, workers):
+
+    def collect(host):
+        device = devnet.connect(host, connection_class)
+        try:
+            outputs = batch.send_command_batch(device, parsepool.FACT_COMMANDS)
+        finally:
+            device.disconnect()
+        return [(command, parsers.parse(command, output)) for command, output in outputs.items()]
+
+    results = fleet.run_fleet(collect, hosts, workers=workers)
+    for result in results:
+        for command, parsed in result.value:
+            parsepool.apply_facts(facts, result.host, command, parsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--interfaces", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    devnet.inventory = fake_inventory(args.hosts)
+    connection_class = partial(FakeDevice, latency=args.latency, interfaces=args.interfaces)
+    print("cores: {}  hosts: {}  interfaces per host: {}".format(os.cpu_count(), args.hosts, args.interfaces))
+
+    facts = {}
+    start = time.perf_counter()
+    ingest_inline(devnet.inventory, facts, connection_class, args.workers)
+    print("inline parsing in threads:  {:8.2f} s".format(time.perf_counter() - start))
+
+    pool_facts = {}
+    with parsepool.ParsePool(args.processes) as pool:
+        start = time.perf_counter()
+        parsepool.ingest(devnet.inventory, pool_facts, workers=args.workers, connection_class=connection_class,
+                         pool=pool)
+        print("ParsePool ({} processes):   {:8.2f} s".format(args.processes, time.perf_counter() - start))
+    assert pool_facts == facts
+
+
+if __name__ == "__main__":
+    main()
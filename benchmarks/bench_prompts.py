@@ -0,0 +1,64 @@
+# bench_prompts.py
+# - one command at a time against mock server (--latency per answer): sleep-and-read loop with fixed delay
+#   (read_channel(), nothing there, sleep, read again) against prompts.send_command(), which waits on socket
+# - per-command time above server latency is idle time of loop
+# student@student-vm:~$ python benchmarks/bench_prompts.py --commands 200 --latency 0.002 --delays 0.01,0.05,0.2
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet import prompts
+from devnet.mockserver import MockFarm
+
+
+def polling_command(device, command, pattern, delay):
+    device.write_channel(command + "\n")
+    matcher = prompts.PromptMatcher(pattern)
+    while True:
+        data = device.read_channel()
+        if not data:
+            time.sleep(delay)
+            continue
+        if matcher.feed(data):
+            return matcher.output()
+
+
+def measure(device, command, count, send):
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        send(device, command)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return sum(times) / count, times[int(count * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--delays", default="0.01,0.05,0.2", help="read delays of sleep-and-read loop")
+    parser.add_argument("--command", default="show ip interface brief")
+    args = parser.parse_args()
+
+    with MockFarm(latency=args.latency) as farm:
+        device = farm.connection_class()(host="csr1kv1")
+        pattern = prompts.prompt_pattern("cisco_ios", "csr1kv1")
+        scenarios = [("sleep-and-read {} s".format(delay), lambda dev, cmd, delay=float(delay):
+                      polling_command(dev, cmd, pattern, delay)) for delay in args.delays.split(",")]
+        scenarios.append(("event-driven", lambda dev, cmd: prompts.send_command(dev, cmd, pattern)))
+        print("{} commands, server latency {} s".format(args.commands, args.latency))
+        print("{:<24} {:>12} {:>12} {:>16}".format("loop", "mean ms", "p99 ms", "idle ms/command"))
+        for name, send in scenarios:
+            mean, p99 = measure(device, args.command, args.commands, send)
+            print("{:<24} {:>12.2f} {:>12.2f} {:>16.2f}".format(
+                name, mean * 1000, p99 * 1000, max(0.0, mean - args.latency) * 1000))
+        device.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_ranges.py
+# - data centre push: thousands of VLANs and access ports, one line per item (loops from notes)
+#   against range syntax from devnet.ranges
+# - apply time is measured on simulated router where every config line costs one round trip (--latency)
+# student@student-vm:~$ python benchmarks/bench_ranges.py --vlans 4000 --switches 8 --latency 0.001
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet import ranges
+from devnet.fakedevice import FakeDevice
+
+
+def per_item(vlans, ports):
+    commands = ["vlan {}".format(vlan) for vlan in vlans]
+    for name, lines in ports.items():
+        commands.append("interface {}".format(name))
+        commands.extend(" " + line for line in lines)
+    return commands
+
+
+def compressed(vlans, ports):
+    return ranges.vlan_commands(vlans) + ranges.interface_commands(ports, style="nxos")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vlans", type=int, default=4000)
+    parser.add_argument("--switches", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.001)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    # - VLANs 2..N with every 50th missing, ports split into few access VLAN profiles plus uplinks
+    vlans = [vlan for vlan in range(2, args.vlans + 2) if vlan % 50]
+    ports = {}
+    for module in range(1, args.switches + 1):
+        for port in range(1, 49):
+            if port > 44:
+                lines = ["switchport mode trunk", "switchport trunk allowed vlan all"]
+            else:
+                lines = ["switchport mode access", "switchport access vlan {}".format(100 + port // 12)]
+            ports["Ethernet{}/{}".format(module, port)] = lines
+
+    print("{:<12} {:>10} {:>10} {:>10}".format("generator", "lines", "bytes", "apply s"))
+    for name, generate in [("per item", per_item), ("ranges", compressed)]:
+        commands = generate(vlans, ports)
+        device = FakeDevice("nx1", latency=args.latency)
+        start = time.perf_counter()
+        ranges.push(device, commands, args.batch)
+        elapsed = time.perf_counter() - start
+        size = sum(len(command) + 1 for command in commands)
+        print("{:<12} {:>10} {:>10} {:>10.2f}".format(name, len(commands), size, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_render.py
+# - renders per second: compiled cached template versus reading template and str.format() per device
+# student@student-vm:~$ python benchmarks/bench_render.py --devices 50000
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet import render
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "templates", "csr_challenge.cfg")
+
+
+def make_inventory(count):
+    return {
+        "csr1kv{}".format(index): {
+            "username": "cisco",
+            "password": "cisco",
+            "device_type": "cisco_ios",
+            "loopback_ip": "10.{}.{}.{}".format(index >> 16 & 255, index >> 8 & 255, index & 255),
+        }
+        for index in range(1, count + 1)
+    }
+
+
+def naive(inventory, out_dir):
+    for hostname, data in inventory.items():
+        with open(TEMPLATE) as template_file:
+            config = template_file.read().format(hostname=hostname, domain="lab.local", **data)
+        with open(os.path.join(out_dir, "{}.cfg".format(hostname)), "w") as config_file:
+            config_file.write(config)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=50000)
+    args = parser.parse_args()
+    inventory = make_inventory(args.devices)
+    defaults = {"domain": "lab.local"}
+    out_dir = tempfile.mkdtemp()
+    try:
+        with open(TEMPLATE) as template_file:
+            text = template_file.read()
+        start = time.perf_counter()
+        for hostname, data in inventory.items():
+            text.format(hostname=hostname, domain="lab.local", **data)
+        format_only = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in render.render(TEMPLATE, inventory, defaults):
+            pass
+        compiled_only = time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive(inventory, out_dir)
+        naive_files = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in render.render_to_files(TEMPLATE, inventory, out_dir, defaults):
+            pass
+        compiled_files = time.perf_counter() - start
+    finally:
+        shutil.rmtree(out_dir)
+
+    print("devices: {}".format(args.devices))
+    print("{:<36} {:>12}".format("", "renders/s"))
+    print("{:<36} {:>12.0f}".format("str.format (template in memory)", args.devices / format_only))
+    print("{:<36} {:>12.0f}".format("compiled template", args.devices / compiled_only))
+    print("{:<36} {:>12.0f}".format("str.format + read template + write", args.devices / naive_files))
+    print("{:<36} {:>12.0f}".format("render_to_files", args.devices / compiled_files))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench_snapshots.py
+# - nightly running-config backup of whole site: one file per device per night (plain and gzip) against
+#   devnet.snapshots.SnapshotStore (shared chunks, per-device deltas, unchanged nights skipped)
+# - configs are generated: same template on every device, per-device addresses and descriptions,
+#   every night --changes percent of devices get one line changed
+# student@student-vm:~$ python benchmarks/bench_snapshots.py --devices 200 --nights 30 --changes 5
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.snapshots import SnapshotStore
+
+
+def running_config(device, interfaces, extra, night):
+    lines = ["Building configuration...", "", "Current configuration : 0 bytes",
+             "! Last configuration change at 02:{:02d}:00 UTC night {}".format(device % 60, night), "!",
+             "version 16.9", "service timestamps debug datetime msec", "service timestamps log datetime msec",
+             "platform qfp utilization monitor load 80", "no platform punt-keepalive disable-kernel-core", "!",
+             "hostname leaf{}".format(device), "!", "boot-start-marker", "boot-end-marker", "!",
+             "no aaa new-model", "!", "ip domain name abc.com", "!", "login on-success log", "!"]
+    for vlan in range(100, 140):
+        lines.extend(["vlan {}".format(vlan), " name SERVERS_{}".format(vlan), "!"])
+    for port in range(1, interfaces + 1):
+        lines.extend(["interface GigabitEthernet1/0/{}".format(port),
+                      " description server{}-{} eth0".format(device, port),
+                      " switchport access vlan {}".format(100 + port % 40), " switchport mode access",
+                      " spanning-tree portfast", "!"])
+    lines.extend(["interface Loopback0", " ip address 10.255.{}.{} 255.255.255.255".format(device >> 8, device & 255),
+                  "!", "router bgp 65000", " bgp log-neighbor-changes",
+                  " neighbor 10.0.0.1 remote-as 65000", " neighbor 10.0.0.2 remote-as 65000", "!"])
+    lines.extend(extra)
+    for acl in range(60):
+        lines.append("access-list 10 permit 192.168.{}.0 0.0.0.255".format(acl))
+    lines.extend(["!", "line con 0", " stopbits 1", "line vty 0 4", " login local", " transport input ssh", "!", "end"])
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--nights", type=int, default=30)
+    parser.add_argument("--changes", type=float, default=5.0, help="percent of devices changed per night")
+    parser.add_argument("--interfaces", type=int, default=48)
+    args = parser.parse_args()
+
+    random.seed(1)
+    extra = {device: [] for device in range(args.devices)}
+    raw = compressed = 0
+    directory = tempfile.mkdtemp()
+    store = SnapshotStore(os.path.join(directory, "configs.sqlite"))
+    put_time = 0.0
+    for night in range(args.nights):
+        for device in random.sample(range(args.devices), int(args.devices * args.changes / 100)):
+            extra[device].append("ip route 172.16.{}.0 255.255.255.0 10.0.0.{}".format(night, device & 255))
+        for device in range(args.devices):
+            config = running_config(device, args.interfaces, extra[device], night)
+            data = config.encode("utf-8")
+            raw += len(data)
+            compressed += len(gzip.compress(data))
+            start = time.perf_counter()
+            store.put("leaf{}".format(device), config, ts=night * 86400.0)
+            put_time += time.perf_counter() - start
+
+    hosts = ["leaf{}".format(device) for device in range(args.devices)]
+    start = time.perf_counter()
+    gets = 0
+    for host in hosts[:100]:
+        for night in range(0, args.nights, 3):
+            store.get(host, at=night * 86400.0 + 1)
+            gets += 1
+    get_time = (time.perf_counter() - start) / gets
+
+    files = args.devices * args.nights
+    print("{} devices x {} nights, {} % devices changed per night".format(args.devices, args.nights, args.changes))
+    print("{:<28} {:>12}".format("storage", "MiB"))
+    print("{:<28} {:>12.2f}".format("file per night", raw / 2 ** 20))
+    print("{:<28} {:>12.2f}".format("gzip file per night", compressed / 2 ** 20))
+    print("{:<28} {:>12.2f}".format("SnapshotStore", store.size() / 2 ** 20))
+    print("snapshots stored: {} of {}, chunks written: {}, reused: {}".format(
+        store.stats["stored"], files, store.stats["chunks_written"], store.stats["chunks_reused"]))
+    print("put: {:.2f} ms per config   get: {:.2f} ms per config".format(put_time / files * 1000, get_time * 1000))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_stream.py
+# - peak memory and time of reading big "show ip route" (full internet table) with send_command()
+#   and with stream.iter_output(), per session and for many sessions at once
+# - memory is peak of Python allocations (tracemalloc), simulated routers generate output as it is read
+# student@student-vm:~$ python benchmarks/bench_stream.py --routes 900000 --sessions 1 4
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from devnet.fakedevice import FakeDevice
+from devnet.stream import iter_lines, iter_output
+
+
+def count_bgp_send_command(device):
+    return sum(1 for line in device.send_command("show ip route").splitlines() if line.startswith("B "))
+
+
+def count_bgp_stream(device):
+    return sum(1 for line in iter_lines(iter_output(device, "show ip route")) if line.startswith("B "))
+
+
+def measure(function, devices):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(devices)) as pool:
+        counts = list(pool.map(function, devices))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return counts, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--routes", type=int, default=900000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+    print("{:>9} {:<14} {:>10} {:>10} {:>10}".format("sessions", "reader", "routes", "seconds", "peak MiB"))
+    for sessions in args.sessions:
+        devices = [FakeDevice("csr1kv{}".format(index), routes=args.routes) for index in range(1, sessions + 1)]
+        for name, function in [("send_command", count_bgp_send_command), ("iter_output", count_bgp_stream)]:
+            counts, elapsed, peak = measure(function, devices)
+            print("{:>9} {:<14} {:>10} {:>10.2f} {:>10.1f}".format(
+                sessions, name, counts[0], elapsed, peak / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# devnet package (modules/devnet/__init__.py)
+# - started as devnet.py custom module for this class in /home/student/modules folder,
+#   now it is installable package: pip install /home/student (no sys.path.insert or PYTHONPATH edits)
+# - inventory dictionary holds everything needed to open session with each router
+# - importing devnet loads only this file: netmiko is imported when connection is actually opened,
+#   and submodules (devnet.fleet, devnet.aio, ...) are imported on first attribute access
+# - helpers below time their phases with devnet.trace spans (nothing is recorded until trace.enable())
+
+import sys
+
+inventory = {
+    "csr1kv1": {
+        "username": "cisco",
+        "password": "cisco",
+        "device_type": "cisco_ios",
+    },
+    "csr1kv2": {
+        "username": "cisco",
+        "password": "cisco",
+        "device_type": "cisco_ios",
+    },
+}
+
+BGP_ASN = 65000
+
+# - inventory keys that describe device for our scripts and are not ConnectHandler arguments
+INVENTORY_ONLY_KEYS = ("group", "loopback_ip", "role", "depends_on")
+
+
+class _NoSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, host=None):
+    # - devnet.trace (and threading, collections it needs) is imported only by code that enables tracing,
+    #   until then span is shared do-nothing object
+    trace = sys.modules.get("devnet.trace")
+    if trace is None:
+        return _NO_SPAN
+    return trace.span(name, host)
+
+
+def print_routers():
+    for router in inventory:
+        print(router)
+
+
+def connect(router, connection_class=None, **kwargs):
+    # - builds ConnectHandler(host=..., username=..., password=..., device_type=...) from inventory entry
+    # - connection_class can be replaced (for example with fakedevice.FakeDevice) to run without real routers
+    if connection_class is None:
+        from netmiko import ConnectHandler as connection_class
+    params = dict(inventory[router])
+    for key in INVENTORY_ONLY_KEYS:
+        params.pop(key, None)
+    params.update(kwargs)
+    with span("connect", router):
+        return connection_class(host=router, **params)
+
+
+def bgp_config(router):
+    return ["router bgp {}".format(BGP_ASN), "bgp log-neighbor-changes"]
+
+
+def configure_bgp_device(router, connection_class=None, **kwargs):
+    # - per-device task: connect, push BGP configuration, disconnect
+    # - extra keyword arguments (session_timeout=...) go to ConnectHandler
+    with span("configure_bgp", router):
+        device = connect(router, connection_class, **kwargs)
+        try:
+            with span("config"):
+                return device.send_config_set(bgp_config(router))
+        finally:
+            with span("disconnect"):
+                device.disconnect()
+
+
+def verify_bgp_device(router, connection_class=None, **kwargs):
+    # - per-device task: True when "show ip bgp summary" reports BGP running
+    with span("verify_bgp", router):
+        device = connect(router, connection_class, **kwargs)
+        try:
+            with span("command"):
+                output = device.send_command("show ip bgp summary")
+        finally:
+            with span("disconnect"):
+                device.disconnect()
+    return "BGP router identifier" in output
+
+
+def issue_command(hostname, command, connection_class=None, **kwargs):
+    # - blocking version: connect, send one command, disconnect and return output
+    with span("issue_command", hostname):
+        device = connect(hostname, connection_class, **kwargs)
+        try:
+            with span("command"):
+                return device.send_command(command)
+        finally:
+            with span("disconnect"):
+                device.disconnect()
+
+
+def verify_bgp():
+    print("BGP session is active")
+
+
+def configure_bgp():
+    for router in inventory:
+        print("Configuring BGP for {} ".format(router))
+
+
+_SUBMODULES = (
+    "aio", "batch", "compliance", "confdiff", "device_data", "distributed", "factstore", "fakedevice", "fleet",
+    "inventory_index", "inventory_store", "mockserver", "parsepool", "parsers", "pool", "prompts", "ranges",
+    "render", "rollout", "scheduler", "sessionlog", "showcache", "snapshots", "stream", "trace", "verify",
+)
+
+
+def __getattr__(name):
+    # - devnet.fleet, devnet.aio, ... are imported on first use, not when devnet itself is imported
+    if name in _SUBMODULES:
+        import importlib
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def main(argv=None):
+    # - "devnet" command installed with package:
+    # student@student-vm:~$ devnet routers
+    # student@student-vm:~$ devnet issue-command csr1kv1 "show version"
+    # student@student-vm:~$ devnet --trace trace.jsonl configure-bgp --workers 200
+    # student@student-vm:~$ devnet trace-summary trace.jsonl --top 10
+    # student@student-vm:~$ devnet worker /home/student/queue.sqlite node1 &
+    # student@student-vm:~$ devnet distribute /home/student/queue.sqlite "show version" --nodes node1 node2
+    import argparse
+    parser = argparse.ArgumentParser(prog="devnet")
+    parser.add_argument("--trace", metavar="FILE", help="append timing spans to JSON lines file")
+    commands = parser.add_subparsers(dest="action", required=True)
+    commands.add_parser("routers")
+    issue = commands.add_parser("issue-command")
+    issue.add_argument("hostname")
+    issue.add_argument("command")
+    bgp = commands.add_parser("configure-bgp")
+    bgp.add_argument("--workers", type=int, default=1)
+    worker = commands.add_parser("worker")
+    worker.add_argument("queue")
+    worker.add_argument("node")
+    worker.add_argument("--workers", type=int, default=64)
+    distribute = commands.add_parser("distribute")
+    distribute.add_argument("queue")
+    distribute.add_argument("--nodes", nargs="+", required=True)
+    distribute.add_argument("command")
+    summary = commands.add_parser("trace-summary")
+    summary.add_argument("file")
+    summary.add_argument("--top", type=int, default=10)
+    summary.add_argument("--folded", action="store_true", help="print folded stacks for flamegraph.pl")
+    args = parser.parse_args(argv)
+
+    if args.action == "trace-summary":
+        from devnet import trace
+        spans = trace.load_spans(args.file)
+        print("\n".join(trace.folded(spans)) if args.folded else trace.summarize(spans, args.top))
+        return
+    if args.trace:
+        from devnet import trace
+        trace.enable(trace.JsonLinesExporter(args.trace))
+    try:
+        run_action(args)
+    finally:
+        if args.trace:
+            trace.disable()
+
+
+def run_action(args):
+    if args.action == "routers":
+        print_routers()
+    elif args.action == "issue-command":
+        print(issue_command(args.hostname, args.command))
+    elif args.action == "worker":
+        from devnet import distributed
+        distributed.Worker(distributed.SQLiteQueue(args.queue), args.node, workers=args.workers).serve()
+    elif args.action == "distribute":
+        from devnet import distributed
+        coordinator = distributed.Coordinator(distributed.SQLiteQueue(args.queue), args.nodes)
+        run = coordinator.submit(inventory, "issue_command", command=args.command)
+        for result in coordinator.results(run):
+            print("{} {}".format(result.host, "ok" if result.ok else result.error))
+    elif args.workers == 1:
+        for router in inventory:
+            configure_bgp_device(router)
+            print("Configuring BGP for {} ".format(router))
+    else:
+        from devnet import fleet
+        for result in fleet.configure_bgp(workers=args.workers):
+            print("{} {}".format(result.host, "ok" if result.ok else result.error))
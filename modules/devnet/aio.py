@@ -0,0 +1,150 @@
+# aio.py
+# - asyncio counterpart of issue_command(hostname, command) from notes
+# - instead of printing, every command returns CommandResult(host, command, ok, output, error, elapsed)
+# - all routers are handled from one event loop: idle session costs only socket and small object,
+#   so thousands of sessions can be in flight where thread per device stops at few hundred
+# - concurrency = how many routers are worked on at once (semaphore)
+# - per_host_rate = max commands per second sent to same router
+# - open_session decides how to reach router:
+#   open_ssh_session (default) needs asyncssh package, open_stream_session talks to mockserver.py
+# Example:
+# results = aio.run(["show version", "show ip bgp summary"], concurrency=2000)
+
+import asyncio
+import time
+from collections import namedtuple
+from functools import partial
+
+from devnet import device_data
+
+CommandResult = namedtuple("CommandResult", ["host", "command", "ok", "output", "error", "elapsed"])
+
+
+class SSHSession(object):
+
+    def __init__(self, hostname, connection):
+        self.hostname = hostname
+        self.connection = connection
+
+    async def send_command(self, command):
+        result = await self.connection.run(command)
+        return result.stdout
+
+    async def close(self):
+        self.connection.close()
+        await self.connection.wait_closed()
+
+
+async def open_ssh_session(hostname, username=None, password=None):
+    import asyncssh
+    connection = await asyncssh.connect(
+        hostname,
+        username=username or device_data.USERNAME,
+        password=password or device_data.PASSWORD,
+        known_hosts=None,
+    )
+    return SSHSession(hostname, connection)
+
+
+class StreamSession(object):
+    # - line based CLI over plain TCP: send command, read until "<hostname>#" prompt comes back
+
+    def __init__(self, hostname, reader, writer):
+        self.hostname = hostname
+        self.prompt = "{}#".format(hostname).encode()
+        self.reader = reader
+        self.writer = writer
+
+    async def send_command(self, command):
+        self.writer.write((command + "\n").encode())
+        data = await self.reader.readuntil(self.prompt)
+        # - first line is echo of command itself
+        return data[:-len(self.prompt)].decode().partition("\n")[2]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def open_stream_session(hostname, address=("127.0.0.1", 23)):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write((hostname + "\n").encode())
+    session = StreamSession(hostname, reader, writer)
+    await reader.readuntil(session.prompt)
+    return session
+
+
+class HostRateLimiter(object):
+    # - hands out send slots per host, spaced 1 / rate seconds apart
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = {}
+
+    async def wait(self, host):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def issue_command(hostname, command, open_session=open_ssh_session):
+    results = await _run_host(hostname, [command], open_session, None)
+    return results[0]
+
+
+async def _run_host(hostname, commands, open_session, limiter):
+    start = time.monotonic()
+    try:
+        session = await open_session(hostname)
+    except Exception as exc:
+        elapsed = time.monotonic() - start
+        return [CommandResult(hostname, command, False, None, exc, elapsed) for command in commands]
+
+    results = []
+    try:
+        for command in commands:
+            if limiter is not None:
+                await limiter.wait(hostname)
+            start = time.monotonic()
+            try:
+                output = await session.send_command(command)
+            except Exception as exc:
+                results.append(CommandResult(hostname, command, False, None, exc, time.monotonic() - start))
+            else:
+                results.append(CommandResult(hostname, command, True, output, None, time.monotonic() - start))
+    finally:
+        try:
+            await session.close()
+        except Exception:
+            pass
+    return results
+
+
+async def issue_commands(commands, hosts=None, concurrency=1000, per_host_rate=None,
+                         open_session=open_ssh_session):
+    # - commands can be single command string or list of commands sent in order to every host
+    # - results are ordered by host (inventory order) and then by command
+    if isinstance(commands, str):
+        commands = [commands]
+    hosts = device_data.INVENTORY if hosts is None else hosts
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(per_host_rate) if per_host_rate else None
+
+    async def bounded(hostname):
+        async with semaphore:
+            return await _run_host(hostname, commands, open_session, limiter)
+
+    per_host = await asyncio.gather(*(bounded(hostname) for hostname in hosts))
+    return [result for results in per_host for result in results]
+
+
+def run(commands, hosts=None, **options):
+    # - blocking entry point for scripts that are not async themselves
+    return asyncio.run(issue_commands(commands, hosts, **options))
+
+
+def stream_sessions(address):
+    # - open_session for routers behind mockserver (or any line based CLI) on address
+    return partial(open_stream_session, address=address)
@@ -0,0 +1,75 @@
+# batch.py
+# - send_command() waits for prompt after every command, so 20 show commands cost 20 round trips
+# - send_command_batch() writes all commands to channel at once (pipelining) and waits only until
+#   prompt was seen once per command; on high latency links that is about one round trip in total
+# - output is split back per command on prompt lines, so result looks like 20 send_command() calls
+# - between reads it waits on channel (prompts.ChannelWaiter), so last prompt is read as soon as it arrives
+# - used same way as send_command() and send_config_set():
+# outputs = send_command_batch(device, ["show version", "show ip interface brief"])
+# outputs["show version"]
+# - terminal length must be 0 (netmiko sets it when session is opened), otherwise --More-- stops output
+
+import re
+import time
+from collections import OrderedDict
+
+from devnet import span
+from devnet.prompts import ChannelWaiter
+
+
+def _prompt_pattern(prompt):
+    return re.compile(r"(?:^|\n)" + re.escape(prompt))
+
+
+def split_by_prompt(output, prompt, commands):
+    # - output looks like: "show version\n<output>csr1kv1#show clock\n<output>csr1kv1#"
+    # - every chunk starts with echo of its command, which is dropped
+    pattern = _prompt_pattern(prompt)
+    chunks = pattern.split(output)
+    outputs = []
+    for command, chunk in zip(commands, chunks):
+        echo, _, text = chunk.partition("\n")
+        if echo.strip() != command.strip():
+            text = chunk
+        outputs.append(text)
+    return outputs
+
+
+def send_command_batch(device, commands, read_timeout=60, delay=0.01):
+    # - returns OrderedDict command -> output, same order as commands
+    # - when same command is in list twice, use send_command_batch_list() to keep both outputs
+    return OrderedDict(zip(commands, send_command_batch_list(device, commands, read_timeout, delay)))
+
+
+def send_command_batch_list(device, commands, read_timeout=60, delay=0.01):
+    commands = [command.strip() for command in commands]
+    if not commands:
+        return []
+    with span("find_prompt"):
+        prompt = device.find_prompt()
+    pattern = _prompt_pattern(prompt)
+
+    with span("command"), ChannelWaiter(device, delay) as waiter:
+        device.write_channel("\n".join(commands) + "\n")
+        output = ""
+        # - prompts are counted only in new data (plus tail that can hold start of prompt),
+        #   rescanning whole output after every read is quadratic on big outputs
+        found = 0
+        position = 0
+        deadline = time.monotonic() + read_timeout
+        while found < len(commands):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("{}: prompt {!r} not seen after {} of {} commands".format(
+                    getattr(device, "host", "device"), prompt, found, len(commands)))
+            data = device.read_channel()
+            if not data:
+                # - wakes up when channel has data (delay is only used for devices without channel)
+                waiter.wait(remaining)
+                continue
+            output += data.replace("\r\n", "\n")
+            for match in pattern.finditer(output, position):
+                found += 1
+                position = match.end()
+            position = max(position, len(output) - len(prompt) - 1)
+    return split_by_prompt(output, prompt, commands)
@@ -0,0 +1,289 @@
+# compliance.py
+# - notes check one device with nested ifs (if hostname == "csr1kv-1": if os_version == "16.09.03": ...);
+#   thousands of such rules run as Python against every device in facts is rules x devices checks
+# - rule is declarative: Rule(name, require, when) where require and when are lists of conditions
+#   (fact, operator, value); rule applies to device when all "when" conditions hold and is violated when
+#   any "require" condition does not
+# - facts of device are flattened: "hostname" is device name, "os" / "version" / other scalar keys stay,
+#   "if_state" list becomes "if_state.<interface>" -> state, list of strings ("features") becomes set
+# - ComplianceEngine compiles rules once:
+#   - same condition used by many rules is one predicate, evaluated once per device
+#   - "==" / "in" / "!=" / "not in" predicates of one fact are indexed by value, all of them are answered
+#     by one dictionary lookup; others ("prefix", "<", ">=", ... on versions, "contains") are tested once each
+#   - rule is looked at only when its first indexed "when" condition holds (version baseline for "csr1kv-1"
+#     is not touched for other devices), result of predicates is bit mask, rule check is two integer ANDs
+# - evaluate() checks whole fleet in one pass; update() takes new facts of one device and re-checks only
+#   rules that use facts which changed, returning violations that appeared and disappeared
+# Example:
+# engine = ComplianceEngine([
+#     Rule("baseline", [("version", "==", "16.09.03")], when=[("hostname", "==", "csr1kv-1")]),
+#     Rule("gi1 up", [("if_state.GigabitEthernet1", "==", "no shutdown")], when=[("os", "==", "ios-xe")]),
+# ])
+# engine.evaluate(facts)
+# [Violation(device='csr1kv-1', rule='baseline', message="version == '16.09.03' (is '16.12.04')")]
+# engine.update("csr1kv-1", {"os": "ios-xe", "version": "16.09.03"})
+# Change(added=[], resolved=[Violation(device='csr1kv-1', rule='baseline', ...)])
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from devnet.factstore import FactsStore
+
+Rule = namedtuple("Rule", ["name", "require", "when", "message"], defaults=((), None))
+
+Violation = namedtuple("Violation", ["device", "rule", "message"])
+
+Change = namedtuple("Change", ["added", "resolved"])
+
+
+@lru_cache(maxsize=4096)
+def _version(value):
+    # - "16.09.03" -> (16, 9, 3), so "16.9.3" == "16.09.03" and "16.12" > "16.9"
+    return tuple(int(number) for number in re.findall(r"\d+", str(value)))
+
+
+def _ordered(compare):
+    return lambda value, operand: value is not None and compare(_version(value), operand)
+
+
+_TESTS = {
+    "prefix": lambda value, operand: isinstance(value, str) and value.startswith(operand),
+    "<": _ordered(lambda value, operand: value < operand),
+    "<=": _ordered(lambda value, operand: value <= operand),
+    ">": _ordered(lambda value, operand: value > operand),
+    ">=": _ordered(lambda value, operand: value >= operand),
+    "present": lambda value, operand: value is not None,
+    "absent": lambda value, operand: value is None,
+    "contains": lambda value, operand: isinstance(value, frozenset) and operand in value,
+    "missing": lambda value, operand: not (isinstance(value, frozenset) and operand in value),
+}
+
+
+def flatten(device, details):
+    # - one device of nested facts -> {fact name: value}
+    flat = {"hostname": device}
+    for key, value in details.items():
+        if key == "if_state":
+            for interface in value:
+                flat["if_state." + interface["name"]] = interface["state"]
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            flat[key] = frozenset(value)
+        else:
+            flat[key] = value
+    return flat
+
+
+def _condition(condition):
+    # - (fact, op, value), or (fact, "present") / (fact, "absent") without value
+    fact, op = condition[0], condition[1]
+    value = condition[2] if len(condition) > 2 else None
+    if op in ("in", "not in"):
+        value = frozenset(value)
+    elif op not in ("==", "!=") and op not in _TESTS:
+        raise ValueError("unknown operator {!r} in condition {!r}".format(op, condition))
+    return fact, op, value
+
+
+def _describe(predicate, actual):
+    fact, op, value = predicate
+    if op in ("present", "absent"):
+        return "{} {}".format(fact, op)
+    if isinstance(value, frozenset):
+        value = sorted(value)
+    if isinstance(actual, frozenset):
+        actual = sorted(actual)
+    return "{} {} {!r} (is {!r})".format(fact, op, value, actual)
+
+
+class _FactIndex(object):
+    # - all predicates on one fact
+
+    def __init__(self):
+        self.equal = {}
+        self.not_equal = {}
+        self.not_equal_all = 0
+        self.tests = []
+        self.mask = 0
+        # - value -> rules whose trigger ("==" / "in" condition in "when") holds for that value
+        self.triggered = {}
+
+    def add(self, bit, op, value):
+        self.mask |= bit
+        if op in ("==", "in"):
+            for item in ([value] if op == "==" else value):
+                self.equal[item] = self.equal.get(item, 0) | bit
+        elif op in ("!=", "not in"):
+            self.not_equal_all |= bit
+            for item in ([value] if op == "!=" else value):
+                self.not_equal[item] = self.not_equal.get(item, 0) | bit
+        else:
+            operand = _version(value) if op in ("<", "<=", ">", ">=") else value
+            self.tests.append((bit, _TESTS[op], operand))
+
+    def evaluate(self, value):
+        # - bit mask of predicates that hold for value
+        try:
+            bits = self.equal.get(value, 0) | (self.not_equal_all & ~self.not_equal.get(value, 0))
+        except TypeError:
+            # - unhashable value (dictionary) is equal to nothing
+            bits = self.not_equal_all
+        for bit, test, operand in self.tests:
+            if test(value, operand):
+                bits |= bit
+        return bits
+
+
+class _Device(object):
+    __slots__ = ("flat", "bits", "violations")
+
+    def __init__(self, flat, bits, violations):
+        self.flat = flat
+        self.bits = bits
+        self.violations = violations
+
+
+class ComplianceEngine(object):
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.predicates = []
+        self._facts = {}
+        self._when = []
+        self._require = []
+        # - rules without "==" / "in" condition in "when" are checked on every device
+        self._always = []
+        self._devices = {}
+        self._bits = bits = {}
+        for index, rule in enumerate(self.rules):
+            masks = []
+            for conditions in (rule.when, rule.require):
+                mask = 0
+                for condition in conditions:
+                    predicate = _condition(condition)
+                    bit = bits.get(predicate)
+                    if bit is None:
+                        bit = bits[predicate] = 1 << len(self.predicates)
+                        self.predicates.append(predicate)
+                        self._facts.setdefault(predicate[0], _FactIndex()).add(bit, predicate[1], predicate[2])
+                    mask |= bit
+                masks.append(mask)
+            self._when.append(masks[0])
+            self._require.append(masks[1])
+            trigger = next((_condition(condition) for condition in rule.when if condition[1] in ("==", "in")), None)
+            if trigger is None:
+                self._always.append(index)
+                continue
+            fact, op, value = trigger
+            for item in ([value] if op == "==" else value):
+                self._facts[fact].triggered.setdefault(item, []).append(index)
+
+    def _violation(self, device, index, bits, flat):
+        rule = self.rules[index]
+        if rule.message is not None:
+            return Violation(device, rule.name, rule.message)
+        for condition in rule.require:
+            predicate = _condition(condition)
+            if not bits & self._bits[predicate]:
+                return Violation(device, rule.name, _describe(predicate, flat.get(predicate[0])))
+        return Violation(device, rule.name, "")
+
+    def _check(self, device, indexes, bits, flat, violations):
+        when = self._when
+        require = self._require
+        for index in indexes:
+            if bits & when[index] == when[index] and bits & require[index] != require[index]:
+                if index not in violations:
+                    violations[index] = self._violation(device, index, bits, flat)
+            else:
+                violations.pop(index, None)
+
+    def _candidates(self, flat):
+        # - rules that can apply to device: trigger condition holds, or rule has no trigger
+        candidates = list(self._always)
+        for fact, index in self._facts.items():
+            if index.triggered:
+                try:
+                    candidates.extend(index.triggered.get(flat.get(fact), ()))
+                except TypeError:
+                    pass
+        return candidates
+
+    def _evaluate_device(self, device, details):
+        flat = flatten(device, details)
+        bits = 0
+        for fact, index in self._facts.items():
+            bits |= index.evaluate(flat.get(fact))
+        candidates = self._candidates(flat)
+        violations = {}
+        self._check(device, candidates, bits, flat, violations)
+        self._devices[device] = _Device(flat, bits, violations)
+        return violations
+
+    def evaluate(self, facts):
+        # - whole fleet: nested facts dictionary from notes or FactsStore; returns all violations, device order
+        if isinstance(facts, FactsStore):
+            facts = facts.to_nested()
+        self._devices = {}
+        result = []
+        for device, details in facts.items():
+            if device == "if_state":
+                # - top-level if_state in notes belongs to no device
+                continue
+            violations = self._evaluate_device(device, details)
+            result.extend(violations[index] for index in sorted(violations))
+        return result
+
+    def update(self, device, details):
+        # - new facts of one device (for example after parsepool.apply_facts), returns Change with violations
+        #   that appeared and those that went away
+        # - only predicates on facts that changed are evaluated again, only rules that can apply to device
+        #   (and rules it violated so far) are checked again
+        state = self._devices.get(device)
+        if state is None:
+            violations = self._evaluate_device(device, details)
+            return Change([violations[index] for index in sorted(violations)], [])
+        flat = flatten(device, details)
+        changed = [fact for fact in self._facts if flat.get(fact) != state.flat.get(fact)]
+        state.flat = flat
+        if not changed:
+            return Change([], [])
+        bits = state.bits
+        for fact in changed:
+            index = self._facts[fact]
+            bits = (bits & ~index.mask) | index.evaluate(flat.get(fact))
+        indexes = set(self._candidates(flat))
+        indexes.update(state.violations)
+        before = dict(state.violations)
+        # - message of violation that stays is rebuilt, it can name value that changed
+        for index in indexes:
+            state.violations.pop(index, None)
+        self._check(device, indexes, bits, flat, state.violations)
+        state.bits = bits
+        added = [state.violations[index] for index in sorted(state.violations) if index not in before]
+        resolved = [before[index] for index in sorted(before) if index not in state.violations]
+        return Change(added, resolved)
+
+    def remove(self, device):
+        # - device left inventory, its violations are resolved
+        state = self._devices.pop(device, None)
+        if state is None:
+            return Change([], [])
+        return Change([], [state.violations[index] for index in sorted(state.violations)])
+
+    @property
+    def violations(self):
+        return [state.violations[index] for state in self._devices.values() for index in sorted(state.violations)]
+
+
+def load_rules(data):
+    # - rules from JSON / YAML shaped data: [{"name": ..., "require": [[fact, op, value], ...], "when": [...]}]
+    return [Rule(item["name"], [tuple(condition) for condition in item["require"]],
+                 [tuple(condition) for condition in item.get("when", ())], item.get("message")) for item in data]
+
+
+def format_violations(violations):
+    lines = ["{} violations on {} devices".format(len(violations), len(set(item.device for item in violations)))]
+    for item in violations:
+        lines.append("{}: {}: {}".format(item.device, item.rule, item.message))
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+# confdiff.py
+# - send_config_set() and send_config_from_file() push every line, even lines already in running config
+# - confdiff parses running config into tree (indentation = hierarchy, like "show running-config" prints it)
+#   and computes only commands that are missing, so large ACLs and prefix-lists are not pushed again
+# - desired configuration must be indented same way (config files and templates usually are):
+# interface GigabitEthernet1
+#  description HR
+# - negate=True also removes ("no ...") lines inside sections that desired config does not have,
+#   section listed without lines under it is emptied
+# - "no X" also removes running lines with arguments after X ("no ip address" removes "ip address 10.0.0.1 ...")
+# - negations of section come before its new lines, and command that holds one value (description, ip address,
+#   ...) is replaced by new line, not negated; "no description x" would remove description just set:
+# interface GigabitEthernet1            (running: description x, desired: description y, negate=True)
+#  description y                        (no "no description x")
+# - ConfigPusher caches tree per device, so repeat run with no changes does not even ask device for running config
+# Example:
+# pusher = ConfigPusher()
+# pusher.push(device, "csr1kv1", open("/home/student/config_files/csr1kv1.cfg").read())
+# ['interface GigabitEthernet1', ' description HR']
+
+_SKIP_PREFIXES = ("Building configuration", "Current configuration", "!")
+# - lines that only leave sub-mode, they carry no configuration
+_EXIT_LINES = ("exit", "exit-address-family")
+# - commands that hold one value, new line replaces old one on device
+SINGLE_VALUE_COMMANDS = (
+    "description", "hostname", "ip address", "ip mtu", "mtu", "bandwidth", "delay", "speed", "duplex",
+    "encapsulation", "load-interval", "vrf forwarding", "ip vrf forwarding", "ip ospf cost", "switchport mode",
+    "switchport access vlan", "bgp router-id", "router-id", "ip domain name", "ip domain-name",
+    "snmp-server location", "snmp-server contact", "logging source-interface", "ntp source",
+)
+
+
+def parse_config(text):
+    # - returns nested dictionaries: {"interface GigabitEthernet1": {"description HR": {}}}
+    # - text is whole config or iterable of lines (stream.iter_lines()), so output can be parsed as it arrives
+    lines = text.splitlines() if isinstance(text, str) else text
+    root = {}
+    stack = [(-1, root)]
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith(_SKIP_PREFIXES) or line in _EXIT_LINES:
+            continue
+        indent = len(raw) - len(raw.lstrip())
+        if indent == 0 and line == "end":
+            continue
+        while stack[-1][0] >= indent:
+            stack.pop()
+        node = stack[-1][1].setdefault(line, {})
+        stack.append((indent, node))
+    return root
+
+
+def _flatten(tree, depth):
+    commands = []
+    for line, children in tree.items():
+        commands.append(" " * depth + line)
+        commands.extend(_flatten(children, depth + 1))
+    return commands
+
+
+def _negates(negation, line):
+    # - "no ip address" negates "ip address 10.0.0.1 255.255.255.0", not "ip address-pool"
+    target = negation[3:]
+    return line == target or line.startswith(target + " ")
+
+
+def _keyword_table(commands):
+    # - first word -> commands starting with it, longest first, so longer command wins over command it starts with
+    table = {}
+    for command in sorted(commands, key=len, reverse=True):
+        table.setdefault(command.split()[0], []).append(command)
+    return table
+
+
+_KEYWORDS = _keyword_table(SINGLE_VALUE_COMMANDS)
+
+
+def _keyword(line):
+    # - single value command line starts with ("ip address 10.0.0.1 255.255.255.0" -> "ip address"), or None
+    for keyword in _KEYWORDS.get(line.partition(" ")[0], ()):
+        if line == keyword or line.startswith(keyword + " "):
+            return keyword
+    return None
+
+
+def _present(line, running):
+    # - running config does not print "no shutdown", so "no X" is already applied when no "X ..." line is there
+    if line.startswith("no ") and line not in running:
+        return not any(_negates(line, key) for key in running)
+    return line in running
+
+
+def _diff(desired, running, depth, negate):
+    commands = []
+    indent = " " * depth
+    if negate and depth > 0:
+        # - negations go first, "no" sent after new line could remove it again
+        negations = [line for line in desired if line.startswith("no ")]
+        replaced = set(_keyword(line) for line in desired)
+        replaced.discard(None)
+        for line in running:
+            if line not in desired and not line.startswith("no ") and _keyword(line) not in replaced and not any(
+                    _negates(negation, line) for negation in negations):
+                commands.append(indent + "no " + line)
+    for line, children in desired.items():
+        if _present(line, running):
+            below = _diff(children, running.get(line, {}), depth + 1, negate)
+            if below:
+                commands.append(indent + line)
+                commands.extend(below)
+        else:
+            commands.append(indent + line)
+            commands.extend(_flatten(children, depth + 1))
+    return commands
+
+
+def diff_config(desired, running, negate=False):
+    # - desired and running are trees from parse_config(), result is list for send_config_set()
+    return _diff(desired, running, 0, negate)
+
+
+def merge_config(desired, running, negate=False):
+    # - updates running tree in place as if diff_config(desired, running, negate) was pushed
+    for line, children in desired.items():
+        if line.startswith("no ") and line not in running:
+            for key in [key for key in running if _negates(line, key)]:
+                del running[key]
+            continue
+        if line not in running:
+            keyword = _keyword(line)
+            if keyword is not None:
+                for key in [key for key in running if _keyword(key) == keyword]:
+                    del running[key]
+        node = running.setdefault(line, {})
+        merge_config(children, node, negate)
+        if negate:
+            # - same lines that _diff() negates, also when desired section has no lines under it
+            for stale in [key for key in node if key not in children and not key.startswith("no ")]:
+                del node[stale]
+
+
+class ConfigPusher(object):
+
+    def __init__(self):
+        self._trees = {}
+        self.stats = {"pushed": 0, "skipped": 0, "fetched": 0}
+
+    def running_tree(self, device, host):
+        tree = self._trees.get(host)
+        if tree is None:
+            tree = parse_config(device.send_command("show running-config"))
+            self._trees[host] = tree
+            self.stats["fetched"] += 1
+        return tree
+
+    def invalidate(self, host=None):
+        # - call when device may have been changed outside this pusher
+        if host is None:
+            self._trees.clear()
+        else:
+            self._trees.pop(host, None)
+
+    def diff(self, device, host, desired_text, negate=False):
+        return diff_config(parse_config(desired_text), self.running_tree(device, host), negate)
+
+    def push(self, device, host, desired_text, negate=False):
+        # - pushes only missing commands and returns them (empty list = nothing to do)
+        desired = parse_config(desired_text)
+        running = self.running_tree(device, host)
+        commands = diff_config(desired, running, negate)
+        if not commands:
+            self.stats["skipped"] += 1
+            return commands
+        try:
+            device.send_config_set(commands)
+        except Exception:
+            # - push may have been partly applied, next run must read running config again
+            self.invalidate(host)
+            raise
+        merge_config(desired, running, negate)
+        self.stats["pushed"] += 1
+        return commands
+
+    def push_file(self, device, host, config_file, negate=False):
+        with open(config_file) as cfg:
+            return self.push(device, host, cfg.read(), negate)
@@ -0,0 +1,6 @@
+# device_data.py
+# - module with variables only, other scripts import them
+USERNAME = "cisco"
+PASSWORD = "cisco"
+DEVICE_TYPE = "cisco_xe"
+INVENTORY = ["csr1kv1", "csr1kv2", "csr1kv3"]
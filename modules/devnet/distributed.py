@@ -0,0 +1,375 @@
+# distributed.py
+# - one collector host runs out of CPU and file descriptors long before inventory runs out, however many
+#   issue_command() workers fleet.run_fleet starts there
+# - Coordinator splits inventory between collector nodes with consistent hashing (HashRing): every host always
+#   goes to same node, and when node is removed only hosts of that node move, to the remaining nodes
+# - jobs and results go through queue; SQLiteQueue is file on local disk for nodes that are processes on one host
+#   (SQLite WAL does not work over NFS / SMB, so file on shared disk is not way to span machines); queue for
+#   several machines (Redis, message broker, ...) only needs same methods: submit, claim, steal, complete,
+#   heartbeat, seen, reassign, results, remaining
+# - Worker (one per node, own process) claims jobs of its shard with lease; when its shard is empty
+#   it steals pending jobs from node with most work left, so slow node does not hold up end of run
+# - node that stops sending heartbeats for node_timeout seconds is removed from ring by Coordinator: pending jobs
+#   of its shard and jobs it was running move to other nodes, nothing else moves
+# - results of all nodes come back as one stream (Coordinator.results), in order they finished; job can run twice
+#   when its node is declared dead while still working, only first result is kept
+# Example:
+# queue = SQLiteQueue("/home/student/devnet-queue.sqlite")
+# student@student-vm:~$ devnet worker /home/student/devnet-queue.sqlite node1 &
+# student@student-vm:~$ devnet worker /home/student/devnet-queue.sqlite node2 &
+# coordinator = Coordinator(queue, ["node1", "node2"])
+# run = coordinator.submit(devnet.inventory, "issue_command", command="show version")
+# for result in coordinator.results(run):
+#     print(result.host, result.ok)
+
+import bisect
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+import devnet
+from devnet import fleet
+
+# - action name in job -> per-device task, called as task(host, **args)
+ACTIONS = {
+    "issue_command": devnet.issue_command,
+    "configure_bgp": devnet.configure_bgp_device,
+    "verify_bgp": devnet.verify_bgp_device,
+}
+
+# - args is JSON text, so Job can be dictionary key
+Job = namedtuple("Job", ["id", "run", "host", "action", "args"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    host TEXT NOT NULL,
+    action TEXT NOT NULL,
+    args TEXT NOT NULL,
+    node TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_node_state ON jobs (node, state);
+CREATE INDEX IF NOT EXISTS jobs_run_state ON jobs (run, state);
+CREATE TABLE IF NOT EXISTS results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run TEXT NOT NULL,
+    job INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    node TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    value TEXT,
+    error TEXT,
+    elapsed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run_seq ON results (run, seq);
+CREATE TABLE IF NOT EXISTS nodes (
+    name TEXT PRIMARY KEY,
+    seen REAL NOT NULL
+);
+"""
+
+
+def _point(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing(object):
+    # - every node has replicas points on ring, host belongs to first node point after hash of host name
+
+    def __init__(self, nodes=(), replicas=128):
+        self.replicas = replicas
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = _point("{}#{}".format(node, replica))
+            position = bisect.bisect(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove(self, node):
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    @property
+    def nodes(self):
+        return sorted(set(self._owners))
+
+    def node_for(self, host):
+        if not self._points:
+            raise ValueError("hash ring has no nodes")
+        position = bisect.bisect(self._points, _point(host)) % len(self._points)
+        return self._owners[position]
+
+    def shards(self, hosts):
+        shards = {}
+        for host in hosts:
+            shards.setdefault(self.node_for(host), []).append(host)
+        return shards
+
+
+class SQLiteQueue(object):
+
+    def __init__(self, path, clock=time.time):
+        # - clock is wall time, leases and heartbeats are compared between processes
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+
+    def _connection(self):
+        # - sqlite3 connection can be used only by thread that opened it
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=60)
+            # - WAL with synchronous=NORMAL syncs at checkpoint, not on every commit of every worker thread
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def submit(self, run, jobs):
+        # - jobs are (host, action, args dictionary, node) tuples
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO jobs (run, host, action, args, node, state) VALUES (?, ?, ?, ?, ?, 'pending')",
+                [(run, host, action, json.dumps(args, sort_keys=True), node) for host, action, args, node in jobs])
+
+    def _take(self, connection, ids, node, lease):
+        connection.executemany("UPDATE jobs SET state = 'running', owner = ?, lease = ? WHERE id = ?",
+                               [(node, self.clock() + lease, job_id) for job_id in ids])
+        rows = []
+        for first in range(0, len(ids), 500):
+            part = ids[first:first + 500]
+            rows.extend(connection.execute(
+                "SELECT id, run, host, action, args FROM jobs WHERE id IN ({}) ORDER BY id".format(
+                    ",".join("?" * len(part))), part))
+        return [Job(*row) for row in rows]
+
+    def claim(self, node, limit, lease):
+        # - pending jobs of node's shard, and jobs of its shard whose lease ran out (worker died while running them)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            ids = [row[0] for row in connection.execute(
+                "SELECT id FROM jobs WHERE node = ? AND (state = 'pending' OR (state = 'running' AND lease < ?)) "
+                "ORDER BY id LIMIT ?", (node, self.clock(), limit))]
+            return self._take(connection, ids, node, lease)
+
+    def steal(self, node, limit, lease):
+        # - takes up to half of pending jobs of node with most of them, from end of its list (owner works from start)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT node, COUNT(*) FROM jobs WHERE state = 'pending' AND node != ? "
+                "GROUP BY node ORDER BY COUNT(*) DESC LIMIT 1", (node,)).fetchone()
+            if row is None:
+                return []
+            victim, pending = row
+            ids = [row[0] for row in connection.execute(
+                "SELECT id FROM jobs WHERE node = ? AND state = 'pending' ORDER BY id DESC LIMIT ?",
+                (victim, min(limit, max(1, pending // 2))))]
+            return self._take(connection, ids, node, lease)
+
+    def complete(self, node, finished):
+        # - finished is list of (Job, fleet.Result), stored in one transaction
+        # - returns number of results kept; job finished by other node in the meantime keeps first result
+        kept = 0
+        with self._connection() as connection:
+            for job, result in finished:
+                changed = connection.execute(
+                    "UPDATE jobs SET state = 'done', owner = ? WHERE id = ? AND state != 'done'",
+                    (node, job.id)).rowcount
+                if not changed:
+                    continue
+                value = None if result.value is None else json.dumps(result.value, default=str)
+                error = None if result.error is None else "{}: {}".format(type(result.error).__name__, result.error)
+                connection.execute(
+                    "INSERT INTO results (run, job, host, node, ok, value, error, elapsed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.run, job.id, job.host, node, int(result.ok), value, error, result.elapsed))
+                kept += 1
+        return kept
+
+    def heartbeat(self, node):
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO nodes (name, seen) VALUES (?, ?)", (node, self.clock()))
+
+    def seen(self):
+        # - node -> time of its last heartbeat
+        return dict(self._connection().execute("SELECT name, seen FROM nodes"))
+
+    def reassign(self, node, ring):
+        # - jobs node was running go back to their shards, pending jobs of node's shard move to ring.node_for(host)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "UPDATE jobs SET state = 'pending', owner = NULL, lease = NULL WHERE owner = ? AND state = 'running'",
+                (node,))
+            rows = connection.execute(
+                "SELECT id, host FROM jobs WHERE node = ? AND state = 'pending'", (node,)).fetchall()
+            connection.executemany("UPDATE jobs SET node = ? WHERE id = ?",
+                                   [(ring.node_for(host), job_id) for job_id, host in rows])
+            connection.execute("DELETE FROM nodes WHERE name = ?", (node,))
+        return len(rows)
+
+    def results(self, run, after=0):
+        # - (seq, fleet.Result) finished after seq, error is kept as text
+        rows = self._connection().execute(
+            "SELECT seq, host, ok, value, error, elapsed FROM results WHERE run = ? AND seq > ? ORDER BY seq",
+            (run, after)).fetchall()
+        return [(seq, fleet.Result(host, bool(ok), None if value is None else json.loads(value), error, elapsed))
+                for seq, host, ok, value, error, elapsed in rows]
+
+    def remaining(self, run=None):
+        if run is None:
+            return self._connection().execute("SELECT COUNT(*) FROM jobs WHERE state != 'done'").fetchone()[0]
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE run = ? AND state != 'done'", (run,)).fetchone()[0]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local = threading.local()
+
+
+class Coordinator(object):
+
+    def __init__(self, queue, nodes, replicas=128, node_timeout=30.0, clock=time.time):
+        self.queue = queue
+        self.ring = HashRing(nodes, replicas)
+        self.node_timeout = node_timeout
+        self.clock = clock
+        self.dead = []
+        self._started = clock()
+
+    def submit(self, hosts, action="issue_command", **args):
+        # - returns run id; args go to every task call (command="show version", ...)
+        run = uuid.uuid4().hex
+        self.queue.submit(run, [(host, action, args, self.ring.node_for(host)) for host in hosts])
+        return run
+
+    def check_nodes(self):
+        # - nodes without heartbeat for node_timeout (or never seen node_timeout after start) lose their shard
+        now = self.clock()
+        seen = self.queue.seen()
+        for node in self.ring.nodes:
+            if now - seen.get(node, self._started) > self.node_timeout and len(self.ring.nodes) > 1:
+                self.ring.remove(node)
+                self.queue.reassign(node, self.ring)
+                self.dead.append(node)
+        return self.dead
+
+    def results(self, run, poll=0.5, timeout=None):
+        # - yields fleet.Result of every job as soon as any node finishes it, ends when run is done
+        deadline = None if timeout is None else time.monotonic() + timeout
+        after = 0
+        while True:
+            rows = self.queue.results(run, after)
+            for after, result in rows:
+                yield result
+            if not rows:
+                if not self.queue.remaining(run):
+                    return
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("run {} not finished within {} seconds".format(run, timeout))
+                self.check_nodes()
+                time.sleep(poll)
+
+    def run(self, hosts, action="issue_command", poll=0.5, timeout=None, **args):
+        # - blocking form: one Result per host, in order of hosts
+        hosts = list(hosts)
+        run = self.submit(hosts, action, **args)
+        by_host = {result.host: result for result in self.results(run, poll, timeout)}
+        return [by_host[host] for host in hosts]
+
+
+class Worker(object):
+
+    def __init__(self, queue, node, workers=64, chunk=4, lease=300.0, steal=True, heartbeat=5.0,
+                 actions=ACTIONS, connection_class=None):
+        # - workers threads per node, each claims chunk jobs at once (fewer queue transactions than one by one)
+        self.queue = queue
+        self.node = node
+        self.workers = workers
+        self.chunk = chunk
+        self.lease = lease
+        self.steal = steal
+        self.heartbeat = heartbeat
+        self.actions = actions
+        self.connection_class = connection_class
+        self.stats = {"done": 0, "stolen": 0, "duplicates": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def execute(self, job):
+        args = json.loads(job.args)
+        if self.connection_class is not None:
+            args["connection_class"] = self.connection_class
+        start = time.monotonic()
+        try:
+            value = self.actions[job.action](job.host, **args)
+            return fleet.Result(job.host, True, value, None, time.monotonic() - start)
+        except Exception as exc:
+            return fleet.Result(job.host, False, None, exc, time.monotonic() - start)
+
+    def _next(self):
+        jobs = self.queue.claim(self.node, self.chunk, self.lease)
+        if not jobs and self.steal:
+            jobs = self.queue.steal(self.node, self.chunk, self.lease)
+            self._count("stolen", len(jobs))
+        return jobs
+
+    def _loop(self, stop, until_idle, poll):
+        while not stop.is_set():
+            jobs = self._next()
+            if not jobs:
+                if until_idle and not self.queue.remaining():
+                    return
+                stop.wait(poll)
+                continue
+            kept = self.queue.complete(self.node, [(job, self.execute(job)) for job in jobs])
+            self._count("done", kept)
+            self._count("duplicates", len(jobs) - kept)
+
+    def serve(self, stop=None, until_idle=False, poll=0.5):
+        # - runs until stop (threading.Event) is set, or with until_idle=True until queue has no unfinished job
+        stop = stop or threading.Event()
+        finished = threading.Event()
+
+        def beat():
+            while not finished.wait(self.heartbeat):
+                self.queue.heartbeat(self.node)
+
+        self.queue.heartbeat(self.node)
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        threads = [threading.Thread(target=self._loop, args=(stop, until_idle, poll), daemon=True)
+                   for _ in range(self.workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            finished.set()
+            beater.join()
+        return self.stats
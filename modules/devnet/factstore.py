@@ -0,0 +1,241 @@
+# factstore.py
+# - compact replacement for nested facts dictionary:
+# facts = {"csr1kv1": {"os": "ios-xe", "version": "16.09.03"}, "if_state": [{"name": "Gi0/1", "state": "shutdown"}]}
+# - every string is stored once in StringTable and columns hold only small integer ids in array.array,
+#   instead of million small dictionaries; largest part left is (device, interface) -> row lookup dictionary
+# - secondary indexes (os, version, interface state) map value id to rows, so filtered query looks only
+#   at matching rows instead of scanning every device
+# - update of value is O(1): row is added under new value and its old entry is left behind, queries skip entries
+#   whose column holds other value by now and index is rebuilt once stale entries outnumber rows
+# Example:
+# store = FactsStore.from_nested(facts)
+# store.query_interfaces(os="ios-xe", version_prefix="16.09", state="shutdown", name_prefix="Gi")
+# [('csr1kv1', 'Gi0/1')]
+
+from array import array
+
+
+class _ValueIndex(object):
+    # - value id -> array of rows (4 bytes per row, not set of Python ints) over one column;
+    #   array.remove() of old entry would be O(rows with that value) on every update
+
+    def __init__(self, column):
+        self.column = column
+        self.rows = {}
+        self.stale = 0
+
+    def add(self, value, row):
+        self.rows.setdefault(value, array("I")).append(row)
+
+    def move(self, old, new, row):
+        # - column must already hold new value
+        if old == new:
+            return
+        self.add(new, row)
+        self.stale += 1
+        if self.stale > len(self.column):
+            self.compact()
+
+    def compact(self):
+        rows = {}
+        for row, value in enumerate(self.column):
+            rows.setdefault(value, array("I")).append(row)
+        self.rows = rows
+        self.stale = 0
+
+    def get(self, value):
+        # - rows that hold value now; with stale entries around, filtered set (row can be listed twice)
+        rows = self.rows.get(value)
+        if rows is None:
+            return ()
+        if not self.stale:
+            return rows
+        column = self.column
+        return {row for row in rows if column[row] == value}
+
+    def values(self):
+        return list(self.rows)
+
+
+class StringTable(object):
+    # - id 0 is reserved for None
+
+    def __init__(self):
+        self._ids = {None: 0}
+        self._strings = [None]
+
+    def intern(self, value):
+        try:
+            return self._ids[value]
+        except KeyError:
+            string_id = len(self._strings)
+            self._ids[value] = string_id
+            self._strings.append(value)
+            return string_id
+
+    def lookup(self, value):
+        # - id of existing string, or None when string was never stored (so nothing can match it)
+        return self._ids.get(value)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class FactsStore(object):
+
+    def __init__(self):
+        self.strings = StringTable()
+        # - device columns, row number is device id
+        self._device_rows = {}
+        self._device_name = array("I")
+        self._device_os = array("I")
+        self._device_version = array("I")
+        # - interface columns, row number is interface id
+        # - (device row << 32 | name id) -> interface row, so update of known interface is one lookup
+        self._interface_rows = {}
+        self._if_device = array("I")
+        self._if_name = array("I")
+        self._if_state = array("I")
+        self._by_os = _ValueIndex(self._device_os)
+        self._by_version = _ValueIndex(self._device_version)
+        self._by_state = _ValueIndex(self._if_state)
+
+    def _device_row(self, device):
+        name_id = self.strings.intern(device)
+        row = self._device_rows.get(name_id)
+        if row is None:
+            row = len(self._device_name)
+            self._device_rows[name_id] = row
+            self._device_name.append(name_id)
+            self._device_os.append(0)
+            self._device_version.append(0)
+            self._by_os.add(0, row)
+            self._by_version.add(0, row)
+        return row
+
+    def set_device(self, device, os=None, version=None):
+        row = self._device_row(device)
+        if os is not None:
+            os_id = self.strings.intern(os)
+            old = self._device_os[row]
+            self._device_os[row] = os_id
+            self._by_os.move(old, os_id, row)
+        if version is not None:
+            version_id = self.strings.intern(version)
+            old = self._device_version[row]
+            self._device_version[row] = version_id
+            self._by_version.move(old, version_id, row)
+
+    def set_interface(self, device, name, state):
+        device_row = self._device_row(device)
+        name_id = self.strings.intern(name)
+        state_id = self.strings.intern(state)
+        key = device_row << 32 | name_id
+        row = self._interface_rows.get(key)
+        if row is None:
+            row = self._interface_rows[key] = len(self._if_device)
+            self._if_device.append(device_row)
+            self._if_name.append(name_id)
+            self._if_state.append(state_id)
+            self._by_state.add(state_id, row)
+        else:
+            old = self._if_state[row]
+            self._if_state[row] = state_id
+            self._by_state.move(old, state_id, row)
+
+    def device(self, device):
+        row = self._device_rows[self.strings.lookup(device)]
+        return {"os": self.strings[self._device_os[row]], "version": self.strings[self._device_version[row]]}
+
+    def __len__(self):
+        return len(self._device_name)
+
+    def __contains__(self, device):
+        return self.strings.lookup(device) in self._device_rows
+
+    def _device_candidates(self, os, version, version_prefix):
+        # - returns set of device rows, or None when no device filter was given
+        candidates = None
+        filters = []
+        if os is not None:
+            filters.append(self._by_os.get(self.strings.lookup(os)))
+        if version is not None:
+            filters.append(self._by_version.get(self.strings.lookup(version)))
+        if version_prefix is not None:
+            rows = set()
+            for version_id in self._by_version.values():
+                value = self.strings[version_id]
+                if value is not None and value.startswith(version_prefix):
+                    rows.update(self._by_version.get(version_id))
+            filters.append(rows)
+        for rows in sorted(filters, key=len):
+            candidates = set(rows) if candidates is None else candidates.intersection(rows)
+        return candidates
+
+    def query_devices(self, os=None, version=None, version_prefix=None):
+        candidates = self._device_candidates(os, version, version_prefix)
+        rows = range(len(self._device_name)) if candidates is None else sorted(candidates)
+        names = [self.strings[self._device_name[row]] for row in rows]
+        return [name for name in names if name is not None]
+
+    def query_interfaces(self, os=None, version=None, version_prefix=None, state=None, name_prefix=None):
+        # - returns list of (device, interface name) tuples
+        devices = self._device_candidates(os, version, version_prefix)
+        if state is not None:
+            rows = self._by_state.get(self.strings.lookup(state))
+        else:
+            rows = range(len(self._if_device))
+        if_device = self._if_device
+        if devices is not None:
+            selected = bytearray(len(self._device_name))
+            for device_row in devices:
+                selected[device_row] = 1
+            rows = [row for row in rows if selected[if_device[row]]]
+        if name_prefix is not None:
+            # - prefix test is done once per distinct interface name, not once per row
+            names = self._if_name
+            matching = {name_id for name_id in set(names[row] for row in rows)
+                        if (self.strings[name_id] or "").startswith(name_prefix)}
+            rows = [row for row in rows if names[row] in matching]
+        strings = self.strings
+        device_name = self._device_name
+        return [(strings[device_name[if_device[row]]], strings[self._if_name[row]]) for row in sorted(rows)]
+
+    @classmethod
+    def from_nested(cls, facts):
+        # - accepts notes shape: device keys with {"os", "version"} and optional per-device "if_state" list,
+        #   plus top-level "if_state" list whose entries may name their "device"
+        store = cls()
+        for key, value in facts.items():
+            if key == "if_state":
+                continue
+            store.set_device(key, value.get("os"), value.get("version"))
+            for interface in value.get("if_state", ()):
+                store.set_interface(key, interface["name"], interface["state"])
+        for interface in facts.get("if_state", ()):
+            store.set_interface(interface.get("device"), interface["name"], interface["state"])
+        return store
+
+    def to_nested(self):
+        # - interfaces without device (top-level if_state in notes) go back to top-level "if_state"
+        facts = {}
+        strings = self.strings
+        for row, name_id in enumerate(self._device_name):
+            name = strings[name_id]
+            if name is None:
+                continue
+            facts[name] = {"os": strings[self._device_os[row]], "version": strings[self._device_version[row]]}
+        top_level = []
+        for row in range(len(self._if_device)):
+            device = strings[self._device_name[self._if_device[row]]]
+            entry = {"name": strings[self._if_name[row]], "state": strings[self._if_state[row]]}
+            if device is None:
+                top_level.append(entry)
+            else:
+                facts[device].setdefault("if_state", []).append(entry)
+        if top_level:
+            facts["if_state"] = top_level
+        return facts
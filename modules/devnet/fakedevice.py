@@ -0,0 +1,286 @@
+# fakedevice.py
+# - stand-in for netmiko ConnectHandler that emulates csr1kv router without SSH
+# - same methods as in notes: is_alive(), establish_connection(), disconnect(), send_command(),
+#   send_config_set(), send_config_from_file(), open_session_log() and session_timeout
+# - write_channel()/read_channel() emulate raw channel, used by batch.py
+# - latency (seconds) is applied once per round trip, jitter adds random extra delay on top
+# - useful to benchmark fleet code locally with thousands of simulated hosts
+# - "show interfaces" prints interfaces GigabitEthernet interfaces, "show ip route" prints routes BGP routes
+#   (full internet table is about 900000)
+# - read_channel() hands out at most read_size characters per call and generates big output only as it is read
+
+import random
+import time
+from collections import deque
+
+from devnet import span
+
+SHOW_VERSION = (
+    "Cisco IOS XE Software, Version 16.09.03\n"
+    "Cisco IOS Software [Fuji], Virtual XE Software (X86_64_LINUX_IOSD-UNIVERSALK9-M), "
+    "Version 16.9.3, RELEASE SOFTWARE (fc2)\n"
+    "Technical Support: http://www.cisco.com/techsupport\n"
+    "Copyright (c) 1986-2019 by Cisco Systems, Inc.\n"
+    "Compiled Wed 20-Mar-19 07:56 by mcpre\n"
+    "\n"
+    "{hostname} uptime is 1 hour, 5 minutes\n"
+    "cisco CSR1000V (VXE) processor (revision VXE) with 2392579K/3075K bytes of memory.\n"
+    "Configuration register is 0x2102\n"
+)
+
+SHOW_BGP_SUMMARY = (
+    "BGP router identifier 10.0.0.1, local AS number 65000\n"
+    "BGP table version is 1, main routing table version 1\n"
+    "\n"
+    "Neighbor        V           AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd\n"
+    "10.0.0.2        4        65001      25      27        1    0    0 00:20:11        5\n"
+)
+
+SHOW_IP_INTERFACE_BRIEF = (
+    "Interface              IP-Address      OK? Method Status                Protocol\n"
+    "GigabitEthernet1       10.254.0.1      YES manual up                    up\n"
+    "GigabitEthernet2       unassigned      YES unset  administratively down down\n"
+)
+
+SHOW_INTERFACE = (
+    "GigabitEthernet{index} is {status}, line protocol is {protocol}\n"
+    "  Hardware is CSR vNIC, address is 0050.56bf.{index:04x} (bia 0050.56bf.{index:04x})\n"
+    "  Description: {description}\n"
+    "  Internet address is 10.{high}.{low}.1/24\n"
+    "  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,\n"
+    "     reliability 255/255, txload 1/255, rxload 1/255\n"
+    "  Encapsulation ARPA, loopback not set\n"
+    "  Keepalive set (10 sec)\n"
+    "  Full Duplex, 1000Mbps, link type is auto, media type is Virtual\n"
+    "  Last input 00:00:01, output 00:00:01, output hang never\n"
+    "  Input queue: 0/375/0/0 (size/max/drops/flushes); Total output drops: 0\n"
+    "  5 minute input rate 1000 bits/sec, 1 packets/sec\n"
+    "  5 minute output rate 2000 bits/sec, 2 packets/sec\n"
+    "     {packets} packets input, {octets} bytes, 0 no buffer\n"
+    "     0 input errors, {crc} CRC, 0 frame, 0 overrun, 0 ignored\n"
+    "     {packets} packets output, {octets} bytes, 0 underruns\n"
+    "     0 output errors, 0 collisions, 0 interface resets\n"
+    "     0 unknown protocol drops\n"
+    "     0 babbles, 0 late collision, 0 deferred\n"
+    "     0 lost carrier, 0 no carrier\n"
+)
+
+
+def show_interfaces(count):
+    # - "show interfaces" output with count GigabitEthernet interfaces, every third one shut down
+    return "".join(
+        SHOW_INTERFACE.format(
+            index=index,
+            status="administratively down" if index % 3 == 0 else "up",
+            protocol="down" if index % 3 == 0 else "up",
+            description="uplink {}".format(index),
+            high=index >> 8 & 255,
+            low=index & 255,
+            packets=index * 1000,
+            octets=index * 64000,
+            crc=index % 5,
+        )
+        for index in range(1, count + 1)
+    )
+
+
+def _loopback_rows(running_config):
+    # - loopbacks configured through send_config_set() show up in "show ip interface brief"
+    rows = []
+    loopback = None
+    for line in running_config:
+        if line.startswith("interface Loopback"):
+            loopback = line.split()[1]
+        elif loopback and line.strip().startswith("ip address "):
+            rows.append("{:<23}{:<16}YES manual up                    up\n".format(loopback, line.split()[2]))
+            loopback = None
+        elif not line.startswith(" "):
+            loopback = None
+    return "".join(rows)
+
+
+SHOW_IP_ROUTE_HEADER = (
+    "Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP\n"
+    "       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area\n"
+    "\n"
+    "Gateway of last resort is 10.0.0.2 to network 0.0.0.0\n"
+    "\n"
+)
+
+DEFAULT_ROUTES = 1000
+
+
+def iter_show_ip_route(count, lines_per_chunk=1000):
+    # - "show ip route" output in chunks, routes are never all in memory at once
+    yield SHOW_IP_ROUTE_HEADER
+    for first in range(0, count, lines_per_chunk):
+        yield "".join(
+            "B        {}.{}.{}.0/24 [20/0] via 10.0.0.2, 1w2d\n".format(
+                1 + index // 65536, index // 256 % 256, index % 256)
+            for index in range(first, min(count, first + lines_per_chunk))
+        )
+
+
+def cli_output(host, command, running_config=None):
+    # - canned csr1kv output for show commands, shared by FakeDevice and mockserver
+    if command == "show version":
+        return SHOW_VERSION.format(hostname=host)
+    if command == "show ip bgp summary":
+        return SHOW_BGP_SUMMARY
+    if command == "show interfaces":
+        return show_interfaces(4)
+    if command == "show ip interface brief":
+        return SHOW_IP_INTERFACE_BRIEF + _loopback_rows(running_config or [])
+    if command == "show running-config":
+        return "\n".join(running_config or ["hostname {}".format(host)]) + "\n"
+    if command == "show ip route":
+        return "".join(iter_show_ip_route(DEFAULT_ROUTES))
+    return "% Invalid input detected at '^' marker.\n"
+
+
+class FakeDevice(object):
+
+    def __init__(self, host, username="cisco", password="cisco", device_type="cisco_ios",
+                 session_timeout=60, latency=0.0, jitter=0.0, routes=DEFAULT_ROUTES, interfaces=4, read_size=65536,
+                 **kwargs):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_type = device_type
+        self.session_timeout = session_timeout
+        self.latency = latency
+        self.jitter = jitter
+        self.routes = routes
+        self.interfaces = interfaces
+        self.read_size = read_size
+        self.prompt = "{}#".format(host)
+        self.running_config = ["hostname {}".format(host)]
+        self.session_log = None
+        self._channel_input = ""
+        # - iterators of output pieces not read yet, and piece that did not fit into last read
+        self._channel_output = deque()
+        self._partial = ""
+        self._offset = 0
+        self.logins = 0
+        self.commands_sent = 0
+        self._alive = False
+        self.establish_connection()
+
+    def _round_trip(self):
+        delay = self.latency
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def _log(self, text):
+        if self.session_log is not None:
+            self.session_log.write(text)
+
+    def is_alive(self):
+        return self._alive
+
+    def establish_connection(self):
+        # - handshake and login cost two round trips on real device
+        with span("tcp_connect", self.host):
+            self._round_trip()
+        with span("auth", self.host):
+            self._round_trip()
+        self.logins += 1
+        self._alive = True
+
+    def disconnect(self):
+        self._alive = False
+        if self.session_log is not None:
+            self.session_log.close()
+            self.session_log = None
+
+    def open_session_log(self, filename, mode="write"):
+        self.session_log = open(filename, "a" if mode == "append" else "w")
+
+    def find_prompt(self):
+        return self.prompt
+
+    def send_command(self, command):
+        if not self._alive:
+            raise OSError("Socket is closed")
+        self._round_trip()
+        self.commands_sent += 1
+        output = "".join(self._output(command))
+        self._log("{}{}\n{}".format(self.prompt, command, output))
+        return output
+
+    def write_channel(self, out_data):
+        self._channel_input += out_data
+
+    def _output(self, command):
+        if command == "show ip route":
+            return iter_show_ip_route(self.routes)
+        if command == "show interfaces":
+            return [show_interfaces(self.interfaces)]
+        return [cli_output(self.host, command, self.running_config)]
+
+    def read_channel(self):
+        # - whatever was typed ahead is answered after single round trip, like real pipelined channel
+        if "\n" in self._channel_input:
+            typed, _, self._channel_input = self._channel_input.rpartition("\n")
+            self._round_trip()
+            for command in typed.split("\n"):
+                command = command.strip()
+                if command:
+                    self.commands_sent += 1
+                    self._channel_output.append(iter([command + "\n"]))
+                    self._channel_output.append(iter(self._output(command)))
+                self._channel_output.append(iter([self.prompt]))
+        # - big piece is handed out by offset, slicing off its rest on every read would copy it again and again
+        pieces = []
+        size = 0
+        while size < self.read_size:
+            if self._offset < len(self._partial):
+                piece = self._partial[self._offset:self._offset + self.read_size - size]
+                self._offset += len(piece)
+                pieces.append(piece)
+                size += len(piece)
+                continue
+            if not self._channel_output:
+                break
+            piece = next(self._channel_output[0], None)
+            if piece is None:
+                self._channel_output.popleft()
+                continue
+            self._partial = piece
+            self._offset = 0
+        text = "".join(pieces)
+        self._log(text)
+        return text
+
+    def send_config_set(self, config_commands):
+        if not self._alive:
+            raise OSError("Socket is closed")
+        lines = ["config term", "Enter configuration commands, one per line.  End with CNTL/Z."]
+        for command in config_commands:
+            self._round_trip()
+            self.commands_sent += 1
+            self.running_config.append(command)
+            lines.append("{}(config)#{}".format(self.host, command))
+        lines.append("{}(config)#end".format(self.host))
+        lines.append(self.prompt)
+        output = "\n".join(lines)
+        self._log(output)
+        return output
+
+    def send_config_from_file(self, config_file):
+        with open(config_file) as cfg:
+            return self.send_config_set([line.rstrip("\n") for line in cfg if line.strip()])
+
+
+def fake_inventory(count, prefix="csr1kv"):
+    # - builds inventory dictionary shaped like devnet.inventory with count simulated routers
+    return {
+        "{}{}".format(prefix, index): {
+            "username": "cisco",
+            "password": "cisco",
+            "device_type": "cisco_ios",
+        }
+        for index in range(1, count + 1)
+    }
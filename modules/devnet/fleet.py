@@ -0,0 +1,72 @@
+# fleet.py
+# - runs per-device tasks (configure_bgp_device, verify_bgp_device, ...) over inventory on bounded worker pool
+# - devnet.configure_bgp() walks inventory one router at a time, so run time is sum of all SSH round trips
+# - with worker pool run time is roughly (number of routers / workers) x slowest router
+# - per_device_limit caps how many tasks can talk to same router at once
+# - timeout is counted per task, from moment task actually starts (not from submission)
+# - results come back in same order as hosts were given, one Result per host
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import devnet
+
+Result = namedtuple("Result", ["host", "ok", "value", "error", "elapsed"])
+
+
+def run_fleet(task, hosts, workers=32, per_device_limit=1, timeout=None):
+    hosts = list(hosts)
+    limits = {host: threading.BoundedSemaphore(per_device_limit) for host in hosts}
+    started = {}
+    results = [None] * len(hosts)
+
+    def run(index, host):
+        with limits[host]:
+            start = time.monotonic()
+            started[index] = start
+            try:
+                return Result(host, True, task(host), None, time.monotonic() - start)
+            except Exception as exc:
+                return Result(host, False, None, exc, time.monotonic() - start)
+
+    # - without timeout there is nothing to police, so block until next task finishes
+    poll = None if timeout is None else min(timeout, 1.0) / 4
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(run, index, host): index for index, host in enumerate(hosts)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                if results[index] is None:
+                    results[index] = future.result()
+            if timeout is None:
+                continue
+            # - hung task keeps its worker thread, but its result is recorded as timed out right away
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                start = started.get(index)
+                if start is not None and now - start > timeout:
+                    error = TimeoutError("{} did not finish within {} seconds".format(hosts[index], timeout))
+                    results[index] = Result(hosts[index], False, None, error, now - start)
+                    pending.discard(future)
+    finally:
+        pool.shutdown(wait=False)
+    return results
+
+
+def configure_bgp(hosts=None, connection_class=None, **options):
+    # - parallel counterpart of devnet.configure_bgp()
+    task = partial(devnet.configure_bgp_device, connection_class=connection_class)
+    return run_fleet(task, devnet.inventory if hosts is None else hosts, **options)
+
+
+def verify_bgp(hosts=None, connection_class=None, **options):
+    # - parallel counterpart of devnet.verify_bgp(), Result.value is True when BGP is running
+    task = partial(devnet.verify_bgp_device, connection_class=connection_class)
+    return run_fleet(task, devnet.inventory if hosts is None else hosts, **options)
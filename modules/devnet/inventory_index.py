@@ -0,0 +1,213 @@
+# inventory_index.py
+# - set(devices) in notes keeps both 'ASA' and 'asa', and inventories merged from several sources
+#   (device_data.INVENTORY, devnet.inventory, CSV exports, ...) list same router as "csr1kv1", "CSR1KV1.abc.com"
+#   or by its IP address; fleet run would then connect to that router twice
+# - InventoryIndex normalizes every name (lowercase, no trailing dot or domain suffix), IP address
+#   (ipaddress module, so "10.0.0.01" style typos are rejected and IPv6 is written one way) and device_type
+#   ("IOS-XE" -> "cisco_xe"), and maps every normalized key to one device in single dictionary lookup
+# - entries that share hostname, IP address or alias are same device; groups are joined with union-find,
+#   so merge of million entries is one pass over them (O(n)), not comparison of every pair
+# - first hostname seen becomes canonical name, details of duplicates fill keys that are still missing
+# - devnet.connect() passes inventory name as host, so address ("host" or "ip" in source) is kept under "ip";
+#   device listed only by FQDN or IP address keeps that there, canonical name without domain may not resolve
+# Example:
+# index = InventoryIndex(domains=["abc.com"])
+# index.merge(device_data.INVENTORY, devnet.inventory, {"CSR1KV1.abc.com": {"ip": "10.254.0.1"}})
+# index.resolve("10.254.0.1")
+# 'csr1kv1'
+# fleet.configure_bgp(hosts=index.unique(["csr1kv1", "CSR1KV1", "10.254.0.1", "csr1kv2"]))   (2 routers)
+
+import ipaddress
+from collections.abc import Mapping
+
+DEVICE_TYPE_ALIASES = {
+    "ios": "cisco_ios",
+    "cisco ios": "cisco_ios",
+    "ios-xe": "cisco_xe",
+    "iosxe": "cisco_xe",
+    "ios xe": "cisco_xe",
+    "nxos": "cisco_nxos",
+    "nx-os": "cisco_nxos",
+    "nexus": "cisco_nxos",
+    "asa": "cisco_asa",
+    "ios-xr": "cisco_xr",
+    "iosxr": "cisco_xr",
+}
+
+# - detail keys that hold address of device (netmiko takes "ip" or "host", inventories use both),
+#   first one found is kept under "ip"
+ADDRESS_KEYS = ("ip", "host")
+
+
+def normalize_address(value):
+    # - canonical text of IP address, None when value is not IP address
+    # - ipaddress parsing is slow part of merge: hostnames are rejected by first character / missing ":",
+    #   and IPv4 address already written canonically (no leading zeros) is returned as it is
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value or not (value[0].isdigit() or ":" in value):
+        return None
+    octets = value.split(".")
+    if len(octets) == 4 and value.isascii() and all(
+            octet.isdigit() and len(octet) <= 3 and (octet == "0" or octet[0] != "0") and int(octet) < 256
+            for octet in octets):
+        return value
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+def normalize_hostname(name, domains=()):
+    name = name.strip().lower().rstrip(".")
+    for domain in domains:
+        if name.endswith("." + domain):
+            return name[:-len(domain) - 1]
+    return name
+
+
+def normalize_device_type(value):
+    if value is None:
+        return None
+    value = value.strip().lower()
+    return DEVICE_TYPE_ALIASES.get(value, value.replace(" ", "_").replace("-", "_"))
+
+
+class InventoryIndex(object):
+
+    def __init__(self, domains=()):
+        self.domains = [domain.lower().strip(".") for domain in domains]
+        self._keys = {}
+        self._parent = []
+        self._names = []
+        self._details = []
+        self.entries = 0
+
+    def _key(self, value):
+        address = normalize_address(value)
+        if address is not None:
+            return address
+        return normalize_hostname(value, self.domains)
+
+    def _find(self, device):
+        parent = self._parent
+        root = device
+        while parent[root] != root:
+            root = parent[root]
+        while parent[device] != root:
+            parent[device], device = root, parent[device]
+        return root
+
+    def _union(self, first, second):
+        first = self._find(first)
+        second = self._find(second)
+        if first == second:
+            return first
+        # - older group survives, it keeps its canonical name unless only other group has real hostname
+        if second < first:
+            first, second = second, first
+        if normalize_address(self._names[first]) is not None and normalize_address(self._names[second]) is None:
+            self._names[first] = self._names[second]
+        for key, value in self._details[second].items():
+            self._details[first].setdefault(key, value)
+        self._parent[second] = first
+        self._details[second] = None
+        return first
+
+    def add(self, name, details=None, aliases=()):
+        # - returns canonical name of device entry belongs to
+        self.entries += 1
+        details = dict(details or {})
+        if "device_type" in details:
+            details["device_type"] = normalize_device_type(details["device_type"])
+        name_address = normalize_address(name)
+        keys = [name_address or normalize_hostname(name, self.domains)]
+        address = None
+        for key in ADDRESS_KEYS:
+            value = details.pop(key, None)
+            if value is not None:
+                normalized = normalize_address(value)
+                keys.append(normalized or normalize_hostname(str(value), self.domains))
+                if address is None:
+                    address = normalized or value
+        if address is not None:
+            details["ip"] = address
+        elif name_address is not None:
+            # - canonical name can later become hostname of other entry of same device
+            details["ip"] = name_address
+        elif "." in name and keys[0] != normalize_hostname(name):
+            # - name lost its domain, device is reached by FQDN it was given as
+            details["ip"] = name.strip().rstrip(".")
+        keys.extend(self._key(alias) for alias in aliases)
+
+        device = None
+        for key in keys:
+            existing = self._keys.get(key)
+            if existing is not None:
+                device = existing if device is None else self._union(device, existing)
+        if device is None:
+            device = len(self._parent)
+            self._parent.append(device)
+            self._names.append(keys[0])
+            self._details.append(details)
+        else:
+            device = self._find(device)
+            if normalize_address(self._names[device]) is not None and normalize_address(keys[0]) is None:
+                self._names[device] = keys[0]
+            for key, value in details.items():
+                self._details[device].setdefault(key, value)
+        for key in keys:
+            self._keys.setdefault(key, device)
+        return self._names[device]
+
+    def merge(self, *sources):
+        # - source is mapping name -> details (devnet.inventory) or iterable of names (device_data.INVENTORY)
+        for source in sources:
+            if isinstance(source, Mapping):
+                for name, details in source.items():
+                    self.add(name, details)
+            else:
+                for name in source:
+                    self.add(name)
+        return self
+
+    def resolve(self, name):
+        device = self._keys.get(self._key(name))
+        if device is None:
+            raise KeyError(name)
+        return self._names[self._find(device)]
+
+    def __contains__(self, name):
+        return self._key(name) in self._keys
+
+    def unique(self, hosts):
+        # - canonical names of hosts, each device once, in order of first mention; unknown names are kept as they are
+        seen = set()
+        result = []
+        for host in hosts:
+            try:
+                name = self.resolve(host)
+            except KeyError:
+                name = self._key(host)
+            if name not in seen:
+                seen.add(name)
+                result.append(name)
+        return result
+
+    def __len__(self):
+        return sum(1 for device, parent in enumerate(self._parent) if device == parent)
+
+    def __iter__(self):
+        for device, parent in enumerate(self._parent):
+            if device == parent:
+                yield self._names[device]
+
+    def inventory(self):
+        # - dictionary shaped like devnet.inventory, one entry per device
+        return {self._names[device]: dict(self._details[device])
+                for device, parent in enumerate(self._parent) if device == parent}
+
+    @property
+    def duplicates(self):
+        return self.entries - len(self)
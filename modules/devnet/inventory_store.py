@@ -0,0 +1,149 @@
+# inventory_store.py
+# - devnet.inventory and device_data.INVENTORY are Python literals, whole inventory is loaded at import
+# - with 100k devices that takes seconds and memory, even when job touches ten hosts
+# - SQLiteInventory keeps inventory on disk in sharded SQLite files (hostname decides shard),
+#   nothing is read until it is asked for, and lookups by hostname, device_type and group use indexes
+# - it behaves like devnet.inventory dictionary: inventory["csr1kv1"], "csr1kv1" in inventory,
+#   for router in inventory, len(inventory), so print_routers() and devnet.connect() work unchanged
+# - number of shards is written to inventory.json next to shards; hostname decides shard only for that number,
+#   so build_inventory() into existing directory with other shards= is refused
+# Example:
+# build_inventory("/home/student/inventory", devnet.inventory, shards=16)
+# devnet.inventory = SQLiteInventory("/home/student/inventory")
+# devnet.inventory["csr1kv1"]
+# {'username': 'cisco', 'password': 'cisco', 'device_type': 'cisco_ios'}
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections.abc import Mapping
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    hostname TEXT PRIMARY KEY,
+    device_type TEXT,
+    grp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS devices_device_type ON devices (device_type);
+CREATE INDEX IF NOT EXISTS devices_grp ON devices (grp);
+"""
+
+
+_METADATA = "inventory.json"
+
+
+def _shard_paths(path, shards):
+    return [os.path.join(path, "inventory-{:03d}.sqlite".format(index)) for index in range(shards)]
+
+
+def _stored_shards(path):
+    # - shard count of existing inventory, None when there is none; directory built before inventory.json
+    #   existed counts its shard files
+    try:
+        with open(os.path.join(path, _METADATA)) as metadata:
+            return json.load(metadata)["shards"]
+    except FileNotFoundError:
+        return len(glob.glob(os.path.join(path, "inventory-*.sqlite"))) or None
+
+
+def shard_of(hostname, shards):
+    # - crc32 is stable between runs and machines (hash() of str is not)
+    return zlib.crc32(hostname.encode()) % shards
+
+
+def build_inventory(path, inventory, shards=8, batch=10000):
+    # - inventory is mapping hostname -> details or iterable of (hostname, details) pairs
+    # - existing entries with same hostname are replaced
+    os.makedirs(path, exist_ok=True)
+    stored = _stored_shards(path)
+    if stored is not None and stored != shards:
+        raise ValueError("{} holds inventory with {} shards, cannot add with shards={}".format(path, stored, shards))
+    with open(os.path.join(path, _METADATA), "w") as metadata:
+        json.dump({"shards": shards}, metadata)
+    connections = [sqlite3.connect(shard) for shard in _shard_paths(path, shards)]
+    for connection in connections:
+        connection.executescript(_SCHEMA)
+    items = inventory.items() if isinstance(inventory, Mapping) else inventory
+    pending = [[] for _ in connections]
+    count = 0
+
+    def flush():
+        for connection, rows in zip(connections, pending):
+            if rows:
+                connection.executemany("INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?)", rows)
+                connection.commit()
+                del rows[:]
+
+    for hostname, details in items:
+        rows = pending[shard_of(hostname, shards)]
+        rows.append((hostname, details.get("device_type"), details.get("group"), json.dumps(details)))
+        count += 1
+        if count % batch == 0:
+            flush()
+    flush()
+    for connection in connections:
+        connection.close()
+    return count
+
+
+class SQLiteInventory(Mapping):
+
+    def __init__(self, path):
+        self.path = path
+        shards = _stored_shards(path)
+        if shards is None:
+            raise FileNotFoundError("no inventory shards in {}".format(path))
+        self._shards = _shard_paths(path, shards)
+        # - sqlite3 connection can be used only by thread that opened it, fleet workers get their own
+        self._local = threading.local()
+
+    def _connection(self, index):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        connection = connections.get(index)
+        if connection is None:
+            uri = "file:{}?mode=ro".format(self._shards[index])
+            connection = connections[index] = sqlite3.connect(uri, uri=True)
+        return connection
+
+    def _query_all(self, sql, parameters=()):
+        for index in range(len(self._shards)):
+            for row in self._connection(index).execute(sql, parameters):
+                yield row
+
+    def __getitem__(self, hostname):
+        connection = self._connection(shard_of(hostname, len(self._shards)))
+        row = connection.execute("SELECT data FROM devices WHERE hostname = ?", (hostname,)).fetchone()
+        if row is None:
+            raise KeyError(hostname)
+        return json.loads(row[0])
+
+    def __contains__(self, hostname):
+        connection = self._connection(shard_of(hostname, len(self._shards)))
+        return connection.execute("SELECT 1 FROM devices WHERE hostname = ?", (hostname,)).fetchone() is not None
+
+    def __iter__(self):
+        # - hostnames are streamed shard by shard, inventory is never held in memory
+        for row in self._query_all("SELECT hostname FROM devices"):
+            yield row[0]
+
+    def __len__(self):
+        return sum(row[0] for row in self._query_all("SELECT COUNT(*) FROM devices"))
+
+    def by_device_type(self, device_type):
+        for row in self._query_all("SELECT hostname FROM devices WHERE device_type = ?", (device_type,)):
+            yield row[0]
+
+    def by_group(self, group):
+        for row in self._query_all("SELECT hostname FROM devices WHERE grp = ?", (group,)):
+            yield row[0]
+
+    def close(self):
+        for connection in getattr(self._local, "connections", {}).values():
+            connection.close()
+        self._local = threading.local()
@@ -0,0 +1,254 @@
+# mockserver.py
+# - local TCP server that answers like csr1kv CLI, used for benchmarks without real routers
+# - it is plain text over TCP (no SSH encryption), one server can pretend to be any number of routers:
+#   client sends hostname as first line, server answers with "<hostname>#" prompt
+# - every command is answered with canned output from fakedevice.cli_output() and prompt again
+# - "configure terminal" enters config mode: prompt changes to (config)#, (config-if)#, (config-router)#, ...,
+#   lines are added to running config of that session and "end" returns to "<hostname>#"
+# - latency (seconds) is waited before each answer, jitter adds random extra delay
+# - MockConnection is blocking client shaped like netmiko connection, so devnet.connect(),
+#   fleet and pool run against mock server unchanged; MockFarm runs server on background thread for them
+# Example:
+# server = await start_mock_server(latency=0.05)
+# port = server.sockets[0].getsockname()[1]
+# Example (blocking code):
+# with MockFarm(latency=0.005, jitter=0.002) as farm:
+#     devnet.configure_bgp_device("csr1kv1", connection_class=farm.connection_class())
+
+import asyncio
+import codecs
+import random
+import re
+import socket
+import threading
+from functools import partial
+
+from devnet import span
+from devnet.fakedevice import cli_output
+from devnet.prompts import PromptMatcher
+
+CONFIG_BANNER = "Enter configuration commands, one per line.  End with CNTL/Z.\n"
+
+# - first word of top level config command -> sub-mode shown in prompt
+_SUB_MODES = {"interface": "config-if", "router": "config-router", "line": "config-line"}
+
+
+def _config_mode(command, mode):
+    if command.startswith(" "):
+        return mode
+    return _SUB_MODES.get(command.split(None, 1)[0], "config")
+
+
+async def start_mock_server(host="127.0.0.1", port=0, latency=0.0, jitter=0.0):
+
+    async def pause():
+        delay = latency + (random.uniform(0, jitter) if jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def handle(reader, writer):
+        try:
+            hostname = (await reader.readline()).decode().strip()
+            prompt = "{}#".format(hostname)
+            running_config = ["hostname {}".format(hostname)]
+            mode = None
+            await pause()
+            writer.write(prompt.encode())
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().rstrip("\r\n")
+                stripped = command.strip()
+                if stripped in ("exit", "quit") and mode is None:
+                    break
+                await pause()
+                if mode is None and stripped in ("configure terminal", "conf t"):
+                    mode = "config"
+                    output = CONFIG_BANNER
+                elif mode is None:
+                    output = cli_output(hostname, stripped, running_config)
+                elif stripped == "end":
+                    mode = None
+                    output = ""
+                else:
+                    running_config.append(command)
+                    mode = _config_mode(command, mode)
+                    output = ""
+                current = prompt if mode is None else "{}({})#".format(hostname, mode)
+                writer.write("{}\n{}{}".format(stripped, output, current).encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # - MockFarm.close() cancels sessions that are still open
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port, backlog=4096)
+
+
+class MockConnection(object):
+    # - blocking socket client, same methods as netmiko connection that devnet modules use
+
+    def __init__(self, host, username="cisco", password="cisco", device_type="cisco_ios",
+                 session_timeout=60, address=("127.0.0.1", 23), read_size=65536, **kwargs):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_type = device_type
+        self.session_timeout = session_timeout
+        self.address = address
+        self.prompt = "{}#".format(host)
+        self.base_prompt = host
+        self.session_log = None
+        self._exec_prompt = re.compile(re.escape(self.prompt))
+        self._config_prompt = re.compile(re.escape(host) + r"\(config[^)]*\)#")
+        self._socket = None
+        self._read_buffer = bytearray(read_size)
+        self._read_view = memoryview(self._read_buffer)
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.establish_connection()
+
+    def establish_connection(self):
+        with span("tcp_connect", self.host):
+            self._socket = socket.create_connection(self.address, timeout=self.session_timeout)
+        # - hostname line stands in for SSH login, prompt comes back when it is accepted
+        with span("auth", self.host):
+            self._socket.sendall((self.host + "\n").encode())
+            self._read_until(self._exec_prompt)
+
+    @property
+    def remote_conn(self):
+        # - same attribute name as netmiko, prompts.ChannelWaiter waits on it
+        return self._socket
+
+    def is_alive(self):
+        return self._socket is not None
+
+    def disconnect(self):
+        if self._socket is None:
+            return
+        try:
+            self._socket.sendall(b"exit\n")
+        except OSError:
+            pass
+        self._socket.close()
+        self._socket = None
+        if self.session_log is not None:
+            self.session_log.close()
+            self.session_log = None
+
+    def _read_until(self, pattern):
+        # - returns text before prompt; blocking recv wakes up when data arrives, and only last line
+        #   of received text is matched against prompt (prompts.PromptMatcher), never whole output again
+        matcher = PromptMatcher(pattern)
+        while True:
+            size = self._socket.recv_into(self._read_buffer)
+            if not size:
+                raise OSError("Socket is closed")
+            if matcher.feed(self._decoder.decode(self._read_view[:size])):
+                text = matcher.output()
+                if self.session_log is not None:
+                    self.session_log.write(text + matcher.prompt)
+                return text
+
+    def find_prompt(self):
+        return self.prompt
+
+    def send_command(self, command):
+        if self._socket is None:
+            raise OSError("Socket is closed")
+        self._socket.sendall((command + "\n").encode())
+        # - first line is echo of command itself
+        return self._read_until(self._exec_prompt).partition("\n")[2]
+
+    def send_config_set(self, config_commands):
+        if self._socket is None:
+            raise OSError("Socket is closed")
+        lines = ["config term"]
+        self._socket.sendall(b"configure terminal\n")
+        lines.append(self._read_until(self._config_prompt).partition("\n")[2].rstrip("\n"))
+        for command in config_commands:
+            self._socket.sendall((command + "\n").encode())
+            self._read_until(self._config_prompt)
+            lines.append("{}(config)#{}".format(self.host, command))
+        self._socket.sendall(b"end\n")
+        self._read_until(self._exec_prompt)
+        lines.append("{}(config)#end".format(self.host))
+        lines.append(self.prompt)
+        return "\n".join(lines)
+
+    def send_config_from_file(self, config_file):
+        with open(config_file) as cfg:
+            return self.send_config_set([line.rstrip("\n") for line in cfg if line.strip()])
+
+    def write_channel(self, out_data):
+        self._socket.sendall(out_data.encode())
+
+    def read_channel(self):
+        # - returns what already arrived, at most read_size bytes, "" when nothing is waiting (like netmiko)
+        # - bytes are received into one reusable buffer, long output is never collected here
+        # - non-blocking recv instead of select(): select() fails for descriptors above 1024
+        self._socket.setblocking(False)
+        try:
+            size = self._socket.recv_into(self._read_buffer)
+        except BlockingIOError:
+            size = 0
+        finally:
+            self._socket.settimeout(self.session_timeout)
+        # - incremental decoder keeps UTF-8 character split between two reads
+        text = self._decoder.decode(self._read_view[:size])
+        if text and self.session_log is not None:
+            self.session_log.write(text)
+        return text
+
+
+class MockFarm(object):
+    # - mock server on event loop in background thread, for blocking code and benchmarks
+
+    def __init__(self, latency=0.0, jitter=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.port = port
+        self.address = None
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="mock-farm", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def _run(self, started):
+        self._loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(start_mock_server(self.host, self.port, self.latency, self.jitter))
+        self.address = server.sockets[0].getsockname()[:2]
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    def connection_class(self, **options):
+        # - use as connection_class of devnet.connect(), fleet.configure_bgp(), SessionPool, ...
+        return partial(MockConnection, address=self.address, **options)
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
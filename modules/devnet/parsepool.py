@@ -0,0 +1,150 @@
+# parsepool.py
+# - parsing output is CPU work; done right after send_command() in fleet worker thread it holds GIL,
+#   so hundred I/O threads end up waiting for one core
+# - ParsePool parses in separate processes (one per core by default): output is written once into
+#   shared memory block and parser process reads it from there, raw text never goes through pickle / pipe
+#   (outputs smaller than min_size are sent directly, shared memory setup costs more than copying them)
+# - parser processes are started by forkserver (spawn where there is none), not forked from threaded process;
+#   script that uses ParsePool must start its work under if __name__ == "__main__":
+# - ingest() is whole pipeline: fleet threads only connect and collect output (batch.send_command_batch),
+#   every output goes to ParsePool as soon as it arrives, so parsing runs while other devices are still read;
+#   results are put into facts by calling thread, facts are never touched from two threads at once
+# - facts is nested dictionary from notes ({"csr1kv1": {"os": ..., "version": ..., "if_state": [...]}})
+#   or factstore.FactsStore
+# Example:
+# facts = {}
+# results = ingest(devnet.inventory, facts, workers=200)
+# facts["csr1kv1"]["if_state"]
+# [{'name': 'GigabitEthernet1', 'state': 'no shutdown'}, ...]
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+
+import devnet
+from devnet import batch, fleet, parsers
+from devnet.factstore import FactsStore
+
+FACT_COMMANDS = ("show version", "show interfaces")
+
+
+def _parse_shared(name, size, command):
+    # - runs in parser process; segment is only read here, process that created it also removes it
+    segment = shared_memory.SharedMemory(name=name)
+    view = segment.buf[:size]
+    try:
+        output = str(view, "utf-8")
+    finally:
+        view.release()
+        segment.close()
+    return parsers.parse(command, output)
+
+
+def _release(segment, future):
+    segment.close()
+    segment.unlink()
+
+
+class ParsePool(object):
+
+    def __init__(self, processes=None, min_size=16384):
+        self.min_size = min_size
+        # - parser processes must share resource tracker of this process; process started before tracker
+        #   runs its own, and that one removes segments it saw when parser process exits
+        resource_tracker.ensure_running()
+        # - first submit() comes from fleet threads; fork of busy threaded process can copy lock held by other
+        #   thread into child, forkserver starts parser processes from clean single-threaded server instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context(method))
+
+    def submit(self, command, output):
+        # - returns Future with parsed records, same result as parsers.parse(command, output)
+        data = output.encode("utf-8")
+        if len(data) < self.min_size:
+            return self._executor.submit(parsers.parse, command, output)
+        segment = shared_memory.SharedMemory(create=True, size=len(data))
+        segment.buf[:len(data)] = data
+        try:
+            future = self._executor.submit(_parse_shared, segment.name, len(data), command)
+        except Exception:
+            _release(segment, None)
+            raise
+        future.add_done_callback(partial(_release, segment))
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def apply_facts(facts, host, command, parsed):
+    # - puts parsed output where notes keep it: "os" / "version" from show version, "if_state" from show interfaces
+    command = parsers.normalize_command(command)
+    if isinstance(facts, FactsStore):
+        if command == "show version":
+            facts.set_device(host, parsed.os, parsed.version)
+        elif command == "show interfaces":
+            for interface in parsed:
+                facts.set_interface(host, interface.name, interface.state)
+        return
+    device = facts.setdefault(host, {})
+    if command == "show version":
+        device["os"] = parsed.os
+        device["version"] = parsed.version
+    elif command == "show interfaces":
+        device["if_state"] = parsers.interfaces_to_if_state(parsed)
+    else:
+        device[command] = parsed
+
+
+def ingest(hosts, facts, commands=FACT_COMMANDS, workers=64, processes=None, connection_class=None,
+           timeout=None, pool=None):
+    # - returns fleet.Result per host (value is number of outputs parsed), facts are updated in place
+    # - device whose output could not be parsed gets failed Result with parser exception
+    hosts = list(hosts)
+    own_pool = pool is None
+    pool = ParsePool(processes) if own_pool else pool
+    submitted = []
+    lock = threading.Lock()
+    # - thread of host that timed out can still finish after run_fleet returned, its outputs are dropped
+    #   instead of being submitted to pool that is closed by then
+    closed = threading.Event()
+
+    def collect(host):
+        device = devnet.connect(host, connection_class)
+        try:
+            outputs = batch.send_command_batch(device, commands)
+        finally:
+            device.disconnect()
+        with lock:
+            if not closed.is_set():
+                for command, output in outputs.items():
+                    submitted.append((host, command, pool.submit(command, output)))
+        return len(outputs)
+
+    def stop():
+        with lock:
+            closed.set()
+            return list(submitted)
+
+    try:
+        results = fleet.run_fleet(collect, hosts, workers=workers, timeout=timeout)
+        index = {host: position for position, host in enumerate(hosts)}
+        for host, command, future in stop():
+            try:
+                apply_facts(facts, host, command, future.result())
+            except Exception as exc:
+                result = results[index[host]]
+                results[index[host]] = fleet.Result(host, False, None, exc, result.elapsed)
+    finally:
+        stop()
+        if own_pool:
+            pool.close()
+    return results
@@ -0,0 +1,194 @@
+# parsers.py
+# - turns raw send_command() output into typed records instead of digging through one big string
+# - every parser is precompiled regular expression that matches whole record at once;
+#   re.findall() walks output in C and returns one tuple per record, so there is no per-line split()/strip() in Python
+# - iter_show_interfaces() accepts whole output or chunks as they arrive and yields Interface records
+# - ParseCache memoizes results by (device, command, hash of output): unchanged output is never parsed twice
+# Example:
+# cache = ParseCache()
+# version = cache.parse("csr1kv1", "show version", device.send_command("show version"))
+# version.os, version.version
+# ('ios-xe', '16.09.03')
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+from devnet import span
+
+Version = namedtuple("Version", ["os", "version", "hostname", "uptime", "model", "config_register"])
+
+INTERFACE_FIELDS = [
+    "name", "status", "protocol", "description", "address", "mtu", "bandwidth",
+    "input_packets", "input_bytes", "input_errors", "crc", "output_packets", "output_bytes", "output_errors",
+]
+
+
+class Interface(namedtuple("Interface", INTERFACE_FIELDS)):
+    __slots__ = ()
+
+    @property
+    def state(self):
+        # - same wording as if_state in notes: {"name": "Gi0/1", "state": "shutdown"}
+        return "shutdown" if self.status == "administratively down" else "no shutdown"
+
+
+BriefInterface = namedtuple("BriefInterface", ["name", "address", "status", "protocol"])
+
+# - state is "Established" when State/PfxRcd column holds prefix count, otherwise state text (Idle, Active, ...)
+BgpNeighbor = namedtuple("BgpNeighbor", ["neighbor", "version", "remote_as", "up_down", "state", "prefixes"])
+
+_VERSION_PATTERNS = [
+    ("ios-xe", re.compile(r"Cisco IOS XE Software, Version (\S+)")),
+    ("nx-os", re.compile(r"NXOS: version (\S+)")),
+    ("ios", re.compile(r"Cisco IOS Software, .*?Version ([^\s,]+)")),
+]
+_UPTIME = re.compile(r"^(\S+) uptime is (.+)$", re.M)
+_MODEL = re.compile(r"^cisco (\S+) .*?processor", re.M)
+_CONFIG_REGISTER = re.compile(r"^Configuration register is (\S+)", re.M)
+
+
+# - one regex matches whole interface block: header line, then each field in order IOS prints it;
+#   (?: [^\n]*\n)*? lazily skips indented lines in between and never runs into next interface header
+# - every field is optional, missing field comes back as None
+_SKIP = r"(?: [^\n]*\n)*?"
+_INTERFACE = re.compile(
+    r"\n(\S+) is (administratively down|up|down|deleted), line protocol is (\w+)[^\n]*\n"
+    r"(?:" + _SKIP + r"  Description: ([^\n]*)\n)?"
+    r"(?:" + _SKIP + r"  Internet address is (\S+)\n)?"
+    r"(?:" + _SKIP + r"  MTU (\d+) bytes, BW (\d+) Kbit[^\n]*\n)?"
+    r"(?:" + _SKIP + r" +(\d+) packets input, (\d+) bytes[^\n]*\n)?"
+    r"(?:" + _SKIP + r" +(\d+) input errors, (\d+) CRC[^\n]*\n)?"
+    r"(?:" + _SKIP + r" +(\d+) packets output, (\d+) bytes[^\n]*\n)?"
+    r"(?:" + _SKIP + r" +(\d+) output errors)?"
+)
+_INTERFACE_HEADER = re.compile(r"\n\S")
+_TEXT_FIELDS = 5
+
+_BRIEF = re.compile(r"^(\S+)\s+(\S+)\s+\w+\s+\w+\s+(administratively down|up|down|deleted)\s+(\w+)\s*$", re.M)
+
+_BGP_NEIGHBOR = re.compile(
+    r"^([0-9a-fA-F.:]+)\s+(\d)\s+(\d+)\s+\d+\s+\d+\s+\d+\s+\d+\s+\d+\s+(\S+)\s+(\S+(?: \(\w+\))?)\s*$", re.M)
+
+
+def parse_show_version(output):
+    os_name = version = None
+    for name, pattern in _VERSION_PATTERNS:
+        match = pattern.search(output)
+        if match:
+            os_name, version = name, match.group(1)
+            break
+    uptime = _UPTIME.search(output)
+    model = _MODEL.search(output)
+    register = _CONFIG_REGISTER.search(output)
+    return Version(
+        os_name,
+        version,
+        uptime.group(1) if uptime else None,
+        uptime.group(2) if uptime else None,
+        model.group(1) if model else None,
+        register.group(1) if register else None,
+    )
+
+
+def _interfaces(text):
+    # - text must start at beginning of line and end at end of interface block
+    for groups in _INTERFACE.findall("\n" + text):
+        values = [value or None for value in groups[:_TEXT_FIELDS]]
+        values.extend(int(value) if value else None for value in groups[_TEXT_FIELDS:])
+        yield Interface._make(values)
+
+
+def iter_show_interfaces(output):
+    # - output is whole string or iterable of chunks (for example from streaming reader)
+    # - chunks are buffered until next interface header arrives, then finished blocks are parsed
+    chunks = [output] if isinstance(output, str) else output
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        last_header = None
+        for last_header in _INTERFACE_HEADER.finditer(pending):
+            pass
+        if last_header is None or last_header.start() == 0:
+            continue
+        cut = last_header.start() + 1
+        for record in _interfaces(pending[:cut]):
+            yield record
+        pending = pending[cut:]
+    for record in _interfaces(pending + "\n"):
+        yield record
+
+
+def parse_show_interfaces(output):
+    return list(iter_show_interfaces(output))
+
+
+def parse_ip_interface_brief(output):
+    return [BriefInterface(*match.groups()) for match in _BRIEF.finditer(output)]
+
+
+def parse_bgp_summary(output):
+    neighbors = []
+    for neighbor, version, remote_as, up_down, state in _BGP_NEIGHBOR.findall(output):
+        if state.isdigit():
+            neighbors.append(BgpNeighbor(neighbor, int(version), int(remote_as), up_down, "Established", int(state)))
+        else:
+            neighbors.append(BgpNeighbor(neighbor, int(version), int(remote_as), up_down, state, None))
+    return neighbors
+
+
+PARSERS = {
+    "show version": parse_show_version,
+    "show interfaces": parse_show_interfaces,
+    "show ip interface brief": parse_ip_interface_brief,
+    "show ip bgp summary": parse_bgp_summary,
+}
+
+
+def normalize_command(command):
+    return " ".join(command.split())
+
+
+def parse(command, output):
+    try:
+        parser = PARSERS[normalize_command(command)]
+    except KeyError:
+        raise ValueError("no parser for command {!r}".format(command))
+    with span("parse"):
+        return parser(output)
+
+
+class ParseCache(object):
+    # - LRU cache of parse results, key is (device, command, blake2b digest of output)
+    # - returned records are shared between callers, treat them as read-only
+    # - safe to share between fleet worker threads, parsing itself runs outside lock
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, device, command, output):
+        command = normalize_command(command)
+        key = (device, command, hashlib.blake2b(output.encode(), digest_size=16).digest())
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return result
+            self.misses += 1
+        result = parse(command, output)
+        with self._lock:
+            self._entries[key] = result
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+
+def interfaces_to_if_state(interfaces):
+    # - builds if_state list shaped like in notes: [{"name": "Gi0/1", "state": "shutdown"}]
+    return [{"name": interface.name, "state": interface.state} for interface in interfaces]
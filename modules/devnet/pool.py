@@ -0,0 +1,139 @@
+# pool.py
+# - keeps warm ConnectHandler sessions per inventory host, so repeated commands do not log in again
+# - every checkout health-checks session with is_alive(), and idle session older than its session_timeout
+#   is treated as stale; stale or dead sessions are revived with establish_connection()
+# - max_sessions caps number of open sessions for whole pool, least recently used idle session is
+#   disconnected to make room; when every session is busy, caller waits for one to be returned
+# - one session is used by one thread at a time (SSH channel is not thread-safe)
+# Example:
+# pool = SessionPool(max_sessions=500)
+# for router in devnet.inventory:
+#     print(pool.send_command(router, "show version"))
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import devnet
+from devnet import batch
+
+
+class SessionPool(object):
+
+    def __init__(self, max_sessions=100, connect=None, connection_class=None):
+        self.max_sessions = max_sessions
+        self._connect = connect or devnet.connect
+        self._connection_class = connection_class
+        self._idle = OrderedDict()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._host_locks = {}
+        self.stats = {"reused": 0, "logins": 0, "reconnects": 0, "evictions": 0}
+
+    def _host_lock(self, host):
+        with self._cond:
+            return self._host_locks.setdefault(host, threading.Lock())
+
+    def _count(self, key):
+        with self._cond:
+            self.stats[key] += 1
+
+    def _checkout(self, host):
+        evicted = []
+        with self._cond:
+            entry = self._idle.pop(host, None)
+            if entry is None:
+                while self._open >= self.max_sessions:
+                    if self._idle:
+                        evicted.append(self._idle.popitem(last=False)[1][0])
+                        self._open -= 1
+                        self.stats["evictions"] += 1
+                    else:
+                        self._cond.wait()
+                self._open += 1
+        for device in evicted:
+            device.disconnect()
+
+        if entry is None:
+            try:
+                if self._connection_class is None:
+                    device = self._connect(host)
+                else:
+                    device = self._connect(host, connection_class=self._connection_class)
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            self._count("logins")
+            return device
+
+        device, last_used = entry
+        stale = time.monotonic() - last_used > device.session_timeout
+        if stale or not device.is_alive():
+            try:
+                if device.is_alive():
+                    device.disconnect()
+                device.establish_connection()
+            except Exception:
+                # - slot of session that could not be revived goes back to pool, waiting callers go on
+                self._discard(device)
+                raise
+            self._count("reconnects")
+        else:
+            self._count("reused")
+        return device
+
+    def _checkin(self, host, device):
+        with self._cond:
+            self._idle[host] = (device, time.monotonic())
+            self._cond.notify()
+
+    def _discard(self, device):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+        try:
+            device.disconnect()
+        except Exception:
+            pass
+
+    @contextmanager
+    def session(self, host):
+        with self._host_lock(host):
+            device = self._checkout(host)
+            try:
+                yield device
+            except Exception:
+                # - session may be left in unknown state (half-read output), so do not give it to next caller
+                self._discard(device)
+                raise
+            self._checkin(host, device)
+
+    def send_command(self, host, command):
+        with self.session(host) as device:
+            return device.send_command(command)
+
+    def send_command_batch(self, host, commands):
+        with self.session(host) as device:
+            return batch.send_command_batch(device, commands)
+
+    def send_config_set(self, host, config_commands):
+        with self.session(host) as device:
+            return device.send_config_set(config_commands)
+
+    def close(self):
+        with self._cond:
+            idle = [entry[0] for entry in self._idle.values()]
+            self._open -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for device in idle:
+            device.disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
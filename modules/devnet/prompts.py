@@ -0,0 +1,154 @@
+# prompts.py
+# - loops that wait for prompt ("csr1kv1#", "csr1kv1(config-if)#") read channel, find nothing and sleep fixed delay
+#   before reading again; prompt that arrives just after read waits out rest of that delay, on every command
+# - ChannelWaiter waits on channel itself (selectors: epoll / kqueue, no 1024 descriptor limit of select()),
+#   so loop wakes up when data arrives; netmiko session (paramiko channel in remote_conn) and
+#   mockserver.MockConnection have channel that can be waited on, FakeDevice falls back to sleeping delay
+# - prompt patterns are compiled once per platform and hostname (prompt_pattern) and PromptMatcher checks only
+#   last line of output after every read, cost per read does not grow with output already received
+# - read_until_prompt() returns as soon as data received so far ends with prompt,
+#   batch.py and stream.py wait for channel same way
+# Example:
+# device.write_channel("show version\n")
+# output, prompt = read_until_prompt(device, prompt_pattern("cisco_ios", "csr1kv1"))
+# prompt
+# 'csr1kv1#'
+# send_command(device, "show ip interface brief")
+
+import re
+import selectors
+import time
+from functools import lru_cache
+
+# - {host} is replaced by escaped hostname, or by any hostname when it is not known
+PROMPT_PATTERNS = {
+    "cisco_ios": r"{host}(?:\([\w.\-]+\))?[#>]",
+    "cisco_xe": r"{host}(?:\([\w.\-]+\))?[#>]",
+    "cisco_nxos": r"{host}(?:\([\w.\-]+\))?#",
+    "cisco_asa": r"{host}(?:/[\w\-]+)*(?:\([\w.\-]+\))?[#>]",
+    "cisco_xr": r"(?:RP/\d+/\w+/CPU\d+:)?{host}(?:\([\w.\-]+\))?#",
+}
+DEFAULT_PLATFORM = "cisco_ios"
+_ANY_HOST = r"[\w.\-]+"
+
+# - line longer than this is never prompt, matcher stops collecting it
+MAX_PROMPT = 256
+
+
+@lru_cache(maxsize=None)
+def prompt_pattern(device_type=DEFAULT_PLATFORM, hostname=None):
+    # - "cisco_ios_telnet" and "cisco_xe_ssh" use patterns of their platform
+    platform = re.sub(r"_(ssh|telnet|serial)$", "", device_type or DEFAULT_PLATFORM)
+    template = PROMPT_PATTERNS.get(platform, PROMPT_PATTERNS[DEFAULT_PLATFORM])
+    host = _ANY_HOST if hostname is None else re.escape(hostname)
+    return re.compile(r"\r*(" + template.format(host=host) + r")[ \t]*")
+
+
+class PromptMatcher(object):
+    # - collects output chunks and keeps only current last line aside; feed() is True when output ends with prompt
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.match = None
+        self._chunks = []
+        self._line = ""
+
+    def feed(self, data):
+        self._chunks.append(data)
+        newline = data.rfind("\n")
+        if newline >= 0:
+            self._line = data[newline + 1:]
+        elif len(self._line) <= MAX_PROMPT:
+            self._line += data
+        self.match = self.pattern.fullmatch(self._line) if len(self._line) <= MAX_PROMPT else None
+        return self.match is not None
+
+    @property
+    def prompt(self):
+        return None if self.match is None else self.match.group(1)
+
+    def output(self):
+        # - everything received before prompt line
+        text = "".join(self._chunks)
+        return text[:len(text) - len(self._line)] if self.match is not None else text
+
+
+def channel_of(device):
+    # - object selectors can wait on: paramiko / telnet channel of netmiko session, socket of MockConnection
+    channel = getattr(device, "remote_conn", None)
+    if channel is not None and hasattr(channel, "fileno"):
+        return channel
+    return None
+
+
+class ChannelWaiter(object):
+
+    def __init__(self, device, delay=0.01):
+        # - delay is used only for devices without channel to wait on (FakeDevice)
+        self.delay = delay
+        self._selector = None
+        channel = channel_of(device)
+        if channel is not None:
+            selector = selectors.DefaultSelector()
+            try:
+                selector.register(channel, selectors.EVENT_READ)
+            except (OSError, ValueError):
+                selector.close()
+            else:
+                self._selector = selector
+
+    @property
+    def event_driven(self):
+        return self._selector is not None
+
+    def wait(self, timeout):
+        # - returns when channel has data to read or timeout seconds passed
+        if self._selector is None:
+            time.sleep(max(0.0, min(self.delay, timeout)))
+        else:
+            self._selector.select(max(0.0, timeout))
+
+    def close(self):
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_until_prompt(device, pattern=None, read_timeout=60, delay=0.01):
+    # - returns (output before prompt, prompt); read_timeout is counted from last data received
+    if pattern is None:
+        # - netmiko keeps hostname part of prompt in base_prompt
+        pattern = prompt_pattern(getattr(device, "device_type", DEFAULT_PLATFORM),
+                                 getattr(device, "base_prompt", None))
+    matcher = PromptMatcher(pattern)
+    with ChannelWaiter(device, delay) as waiter:
+        deadline = time.monotonic() + read_timeout
+        # - "\r" at end of read is held back, "\r\n" split between two reads still becomes "\n"
+        carry = ""
+        while True:
+            data = device.read_channel()
+            if data:
+                deadline = time.monotonic() + read_timeout
+                data = (carry + data).replace("\r\n", "\n")
+                carry = "\r" if data.endswith("\r") else ""
+                if matcher.feed(data[:len(data) - len(carry)]):
+                    return matcher.output(), matcher.prompt
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("{}: no prompt within {} seconds of last output".format(
+                    getattr(device, "host", "device"), read_timeout))
+            waiter.wait(remaining)
+
+
+def send_command(device, command, pattern=None, read_timeout=60, delay=0.01):
+    # - send_command() that returns as soon as prompt arrives; first line of output is echo of command
+    device.write_channel(command.strip() + "\n")
+    output, _ = read_until_prompt(device, pattern, read_timeout, delay)
+    return output.partition("\n")[2]
@@ -0,0 +1,126 @@
+# ranges.py
+# - loops in notes ("for vlan in vlans", "while interface_id <= 4") print one line per VLAN or interface,
+#   with thousands of VLANs and ports that is thousands of send_config_set() lines, each one waits for router
+# - compress_ids() turns IDs into contiguous runs: [100, 101, ..., 199, 300] -> [(100, 199), (300, 300)]
+# - vlan_commands() writes runs in range syntax: "vlan 100-199,300", one line up to max_line characters
+# - interface_commands() groups interfaces with same configuration and writes one range per group:
+#   "interface range Ethernet1/1 - 48" (IOS, at most 5 ranges per line) or "interface Ethernet1/1-48" (NX-OS)
+# - push() sends commands in batches of send_config_set() calls, never splitting interface section
+# Example:
+# vlan_commands(range(100, 200))
+# ['vlan 100-199']
+# interface_commands({"Ethernet1/{}".format(port): ["switchport access vlan 100"] for port in range(1, 49)})
+# ['interface range Ethernet1/1 - 48', ' switchport access vlan 100']
+
+import re
+from collections import OrderedDict
+
+_INTERFACE_NUMBER = re.compile(r"^(.*?)(\d+)$")
+
+
+def compress_ids(ids):
+    # - sorted runs of consecutive integers, duplicates are ignored
+    runs = []
+    for value in sorted(set(ids)):
+        if runs and value == runs[-1][1] + 1:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    return [tuple(run) for run in runs]
+
+
+def format_run(run, separator="-"):
+    start, end = run
+    return str(start) if start == end else "{}{}{}".format(start, separator, end)
+
+
+def expand_ranges(text):
+    # - "100-199,300" -> [100, ..., 199, 300], inverse of what vlan_commands() writes
+    ids = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def _join_limited(prefix, items, max_line):
+    # - packs items into "prefix item,item,..." lines no longer than max_line
+    lines = []
+    current = []
+    length = len(prefix)
+    for item in items:
+        extra = len(item) + (1 if current else 0)
+        if current and length + extra > max_line:
+            lines.append(prefix + ",".join(current))
+            current = []
+            length = len(prefix)
+            extra = len(item)
+        current.append(item)
+        length += extra
+    if current:
+        lines.append(prefix + ",".join(current))
+    return lines
+
+
+def vlan_commands(vlans, names=None, max_line=240):
+    # - names maps VLAN id -> name; named VLANs need own "vlan X" section, the rest is written as ranges
+    names = names or {}
+    plain = [vlan for vlan in vlans if vlan not in names]
+    commands = _join_limited("vlan ", [format_run(run) for run in compress_ids(plain)], max_line)
+    for vlan in sorted(names):
+        commands.extend(["vlan {}".format(vlan), " name {}".format(names[vlan])])
+    return commands
+
+
+def interface_ranges(interfaces, style="ios", max_ranges=5):
+    # - ["Ethernet1/1", ..., "Ethernet1/48", "Ethernet2/1"] -> ["interface range Ethernet1/1 - 48, Ethernet2/1"]
+    by_prefix = OrderedDict()
+    for name in interfaces:
+        match = _INTERFACE_NUMBER.match(name)
+        if match is None:
+            raise ValueError("interface name {!r} does not end with number".format(name))
+        by_prefix.setdefault(match.group(1), []).append(int(match.group(2)))
+    items = []
+    runs = []
+    for prefix, numbers in by_prefix.items():
+        for run in compress_ids(numbers):
+            runs.append(run)
+            items.append(prefix + format_run(run, " - " if style == "ios" else "-"))
+    if len(runs) == 1 and runs[0][0] == runs[0][1]:
+        return ["interface " + items[0]]
+    keyword = "interface range " if style == "ios" else "interface "
+    lines = []
+    for first in range(0, len(items), max_ranges):
+        lines.append(keyword + ", ".join(items[first:first + max_ranges]))
+    return lines
+
+
+def interface_commands(config, style="ios", max_ranges=5):
+    # - config maps interface name -> list of commands for that interface (without indentation)
+    # - interfaces with identical commands share one range section, sections keep order of first interface
+    groups = OrderedDict()
+    for name, commands in config.items():
+        groups.setdefault(tuple(commands), []).append(name)
+    lines = []
+    for commands, names in groups.items():
+        for header in interface_ranges(names, style, max_ranges):
+            lines.append(header)
+            lines.extend(" " + command for command in commands)
+    return lines
+
+
+def batches(commands, size=500):
+    # - splits before top level line only, so section header and its lines go in same batch
+    batch = []
+    for command in commands:
+        if len(batch) >= size and not command.startswith(" "):
+            yield batch
+            batch = []
+        batch.append(command)
+    if batch:
+        yield batch
+
+
+def push(device, commands, batch_size=500):
+    # - returns outputs of send_config_set() calls
+    return [device.send_config_set(batch) for batch in batches(commands, batch_size)]
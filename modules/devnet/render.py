@@ -0,0 +1,76 @@
+# render.py
+# - generates configuration files from templates and inventory dictionary (CSR challenge, step 1)
+# - template is plain text with str.format style fields: hostname {hostname}
+# - each template is compiled once into small Python function and cached, later renders only call it
+#   (no re-reading of file, no re-parsing of template text for every device)
+# - render_to_files() works through inventory one device at a time and writes <hostname>.cfg,
+#   so 50k devices never sit in memory at once; files are ready for send_config_from_file()
+# Example:
+# for hostname, path in render_to_files("templates/csr_challenge.cfg", inventory, "/home/student/config_files"):
+#     device.send_config_from_file(path)
+
+import os
+from string import Formatter
+
+_cache = {}
+
+
+def compile_template(text):
+    # - "hostname {hostname}\n" becomes: def render(data): return "".join(("hostname ", str(data["hostname"]), "\n"))
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(text):
+        if literal:
+            parts.append(repr(literal))
+        if field is None:
+            continue
+        if not field.isidentifier():
+            raise ValueError("unsupported template field {{{}}}, use plain names".format(field))
+        value = "data[{!r}]".format(field)
+        if conversion is not None:
+            value = "{}({})".format({"r": "repr", "s": "str", "a": "ascii"}[conversion], value)
+        if spec:
+            value = "format({}, {!r})".format(value, spec)
+        elif conversion is None:
+            value = "str({})".format(value)
+        parts.append(value)
+    source = "def render(data):\n    return ''.join(({},))\n".format(", ".join(parts) or "''")
+    namespace = {}
+    exec(compile(source, "<template>", "exec"), namespace)
+    return namespace["render"]
+
+
+def get_template(path):
+    # - compiled template is cached by path and recompiled only when file changes on disk
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as template_file:
+            cached = (mtime, compile_template(template_file.read()))
+        _cache[path] = cached
+    return cached[1]
+
+
+def iter_device_data(inventory, defaults=None):
+    # - inventory is devnet style dictionary hostname -> {...}, hostname is added to each device's data
+    for hostname, details in inventory.items():
+        data = dict(defaults or {})
+        data.update(details)
+        data.setdefault("hostname", hostname)
+        yield hostname, data
+
+
+def render(path, inventory, defaults=None):
+    # - yields (hostname, configuration text) one device at a time
+    template = get_template(path)
+    for hostname, data in iter_device_data(inventory, defaults):
+        yield hostname, template(data)
+
+
+def render_to_files(path, inventory, out_dir, defaults=None):
+    # - yields (hostname, path of written file) one device at a time
+    os.makedirs(out_dir, exist_ok=True)
+    for hostname, config in render(path, inventory, defaults):
+        config_path = os.path.join(out_dir, "{}.cfg".format(hostname))
+        with open(config_path, "w") as config_file:
+            config_file.write(config)
+        yield hostname, config_path
@@ -0,0 +1,201 @@
+# rollout.py
+# - notes tell spine_switch ("Nexus 9336PQ") from leaf_switch ("Nexus 9300"), but push over inventory is one
+#   flat loop: broken change lands on every spine at once, or whole fabric waits for spines one by one
+# - inventory entry can carry "role" ("spine", "leaf", ...) and "depends_on" (host names or role names that must
+#   be pushed and verified first, for example leaves depend on "spine")
+# - plan() builds DAG of waves: devices are ordered by their dependencies, devices of same role and same depth
+#   are cut into waves of at most ROLE_LIMITS[role] devices (blast radius), each wave waits for waves holding
+#   its dependencies and for previous wave of same role
+# - run_rollout() pushes each wave with fleet.run_fleet (whole wave in parallel), verifies it and starts every wave
+#   whose prerequisites passed right away; waves that do not depend on each other run at same time
+# - wave with failed push or verification stops everything that depends on it, other branches go on
+# Example:
+# inventory["spine1"] = {..., "role": "spine"}
+# inventory["leaf1"] = {..., "role": "leaf", "depends_on": ["spine"]}
+# waves = plan()
+# print(format_plan(waves))
+# wave 0   spine       1 devices  after -          spine1
+# wave 1   leaf        1 devices  after 0          leaf1
+# report = run_rollout(devnet.configure_bgp_device, waves, verify=devnet.verify_bgp_device)
+
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import devnet
+from devnet import fleet
+
+# - devices of one role changed at once; spines carry whole fabric, leaves only their own racks
+ROLE_LIMITS = {
+    "spine": 1,
+    "border": 1,
+    "leaf": 50,
+}
+DEFAULT_LIMIT = 10
+
+# - after holds indexes of waves that must pass before this one starts
+Wave = namedtuple("Wave", ["index", "role", "hosts", "after"])
+
+# - status is "passed", "failed" (push or verification failed) or "skipped" (prerequisite wave did not pass)
+WaveResult = namedtuple("WaveResult", ["wave", "status", "results", "elapsed"])
+
+RolloutReport = namedtuple("RolloutReport", ["waves", "elapsed"])
+
+
+def _dependencies(hosts, inventory):
+    # - host -> list of hosts it depends on; name of role stands for every host with that role
+    selected = set(hosts)
+    roles = OrderedDict()
+    for host in hosts:
+        roles.setdefault(inventory[host].get("role"), []).append(host)
+    # - roles of whole inventory, read only when some name is neither role in this rollout nor host
+    inventory_roles = None
+    dependencies = {}
+    for host in hosts:
+        names = inventory[host].get("depends_on") or []
+        if isinstance(names, str):
+            names = [names]
+        found = []
+        for name in names:
+            if name in roles:
+                found.extend(dependency for dependency in roles[name] if dependency != host)
+            elif name in inventory:
+                if name in selected:
+                    found.append(name)
+                # - dependency outside of this rollout is already in place
+            else:
+                if inventory_roles is None:
+                    inventory_roles = set(details.get("role") for details in inventory.values())
+                # - role without hosts in this rollout (leaves pushed after spines are done) is in place too
+                if name not in inventory_roles:
+                    raise ValueError("{}: depends_on {!r} is neither host nor role".format(host, name))
+        dependencies[host] = found
+    return dependencies
+
+
+def _depths(hosts, dependencies):
+    # - depth is length of longest dependency chain below host (Kahn's algorithm), cycle is error
+    waiting = {host: len(dependencies[host]) for host in hosts}
+    dependents = {host: [] for host in hosts}
+    for host in hosts:
+        for dependency in dependencies[host]:
+            dependents[dependency].append(host)
+    depths = {host: 0 for host in hosts}
+    ready = [host for host in hosts if not waiting[host]]
+    done = 0
+    while ready:
+        host = ready.pop()
+        done += 1
+        for dependent in dependents[host]:
+            depths[dependent] = max(depths[dependent], depths[host] + 1)
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                ready.append(dependent)
+    if done != len(hosts):
+        # - hosts left waiting are in cycle or depend on one
+        stuck = sorted(host for host in hosts if waiting[host])
+        raise ValueError("dependency cycle, {} hosts cannot be ordered: {}{}".format(
+            len(stuck), ", ".join(stuck[:10]), ", ..." if len(stuck) > 10 else ""))
+    return depths
+
+
+def plan(hosts=None, inventory=None, limits=ROLE_LIMITS, default_limit=DEFAULT_LIMIT):
+    # - returns list of Wave in order they can start; hosts default to whole inventory
+    inventory = devnet.inventory if inventory is None else inventory
+    hosts = list(inventory if hosts is None else hosts)
+    dependencies = _dependencies(hosts, inventory)
+    depths = _depths(hosts, dependencies)
+
+    groups = OrderedDict()
+    for host in sorted(hosts, key=depths.get):
+        groups.setdefault((depths[host], inventory[host].get("role")), []).append(host)
+
+    waves = []
+    wave_of = {}
+    last_of_role = {}
+    for (depth, role), members in groups.items():
+        limit = limits.get(role, default_limit)
+        for first in range(0, len(members), limit):
+            chunk = members[first:first + limit]
+            after = set(wave_of[dependency] for host in chunk for dependency in dependencies[host])
+            if role in last_of_role:
+                after.add(last_of_role[role])
+            wave = Wave(len(waves), role, chunk, tuple(sorted(after)))
+            waves.append(wave)
+            last_of_role[role] = wave.index
+            for host in chunk:
+                wave_of[host] = wave.index
+    return waves
+
+
+def format_plan(waves):
+    lines = []
+    for wave in waves:
+        lines.append("wave {:<3} {:<8} {:>4} devices  after {:<10} {}".format(
+            wave.index, wave.role or "-", len(wave.hosts), ",".join(map(str, wave.after)) or "-",
+            " ".join(wave.hosts)))
+    return "\n".join(lines)
+
+
+def _run_wave(task, wave, verify, workers, timeout):
+    start = time.monotonic()
+    size = min(workers, len(wave.hosts))
+    results = fleet.run_fleet(task, wave.hosts, workers=size, timeout=timeout)
+    ok = all(result.ok for result in results)
+    if ok and verify is not None:
+        checks = fleet.run_fleet(verify, wave.hosts, workers=size, timeout=timeout)
+        # - verification that raised or returned false value fails device, its Result replaces push result
+        for position, check in enumerate(checks):
+            if not check.ok or not check.value:
+                error = check.error or RuntimeError("verification failed")
+                results[position] = fleet.Result(check.host, False, check.value, error, check.elapsed)
+                ok = False
+    return WaveResult(wave, "passed" if ok else "failed", results, time.monotonic() - start)
+
+
+def run_rollout(task, waves, verify=None, workers=64, timeout=None):
+    # - task(host) pushes change to one device (devnet.configure_bgp_device, ...),
+    #   verify(host) returns true value when change works (devnet.verify_bgp_device)
+    # - workers caps parallel devices inside one wave, wave sizes themselves come from plan()
+    start = time.monotonic()
+    outcome = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, len(waves)))
+    running = {}
+
+    def start_ready():
+        for wave in waves:
+            if wave.index in outcome or wave.index in running.values():
+                continue
+            statuses = [outcome[index].status if index in outcome else None for index in wave.after]
+            if any(status in ("failed", "skipped") for status in statuses):
+                outcome[wave.index] = WaveResult(wave, "skipped", [], 0.0)
+            elif all(status == "passed" for status in statuses):
+                running[pool.submit(_run_wave, task, wave, verify, workers, timeout)] = wave.index
+
+    try:
+        # - waves are in dependency order, so one pass marks whole chain of skipped waves at once
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome[running.pop(future)] = future.result()
+            start_ready()
+    finally:
+        pool.shutdown(wait=False)
+    return RolloutReport([outcome[wave.index] for wave in waves], time.monotonic() - start)
+
+
+def format_report(report):
+    counts = OrderedDict((status, 0) for status in ("passed", "failed", "skipped"))
+    for result in report.waves:
+        counts[result.status] += 1
+    summary = ", ".join("{} {}".format(count, status) for status, count in counts.items())
+    lines = ["{} waves in {:.2f} s: {}".format(len(report.waves), report.elapsed, summary)]
+    for result in report.waves:
+        if result.status == "passed":
+            continue
+        failed = [item for item in result.results if not item.ok]
+        detail = "; ".join("{}: {}".format(item.host, item.error) for item in failed) or "prerequisite did not pass"
+        lines.append("{:<7} wave {} ({}): {}".format(result.status.upper(), result.wave.index,
+                                                     result.wave.role or "-", detail))
+    return "\n".join(lines)
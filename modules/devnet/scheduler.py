@@ -0,0 +1,166 @@
+# scheduler.py
+# - session_timeout is fixed number (60, 120, 180 in notes): slow routers time out, and hung fast
+#   router wastes whole window before anybody notices
+# - LatencyTracker keeps histogram of task latency per device and derives timeout from it:
+#   p99 x multiplier, clamped between floor and ceiling (default_timeout until device has min_samples)
+# - run_scheduled() starts slowest devices first (longest expected time first keeps total fleet time short:
+#   slow router started last would finish long after everybody else), passes each device its own
+#   session_timeout and retries failures with exponential backoff and full jitter
+# - tracker can be saved to JSON file, so next run starts with latency from previous runs
+# Example:
+# tracker = LatencyTracker.load("/home/student/latency.json")
+# results = run_scheduled(devnet.configure_bgp_device, devnet.inventory, tracker, workers=200)
+# tracker.save("/home/student/latency.json")
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from array import array
+
+from devnet import fleet
+
+# - buckets grow by 2 ** (1/4) (about 19 %) from 1 ms, 100 buckets reach past one hour
+_BUCKET_BASE = 0.001
+_BUCKET_GROWTH = 2 ** 0.25
+_BUCKETS = 100
+
+
+def _bucket(seconds):
+    if seconds <= _BUCKET_BASE:
+        return 0
+    return min(_BUCKETS - 1, int(math.log(seconds / _BUCKET_BASE, _BUCKET_GROWTH)) + 1)
+
+
+def _upper_edge(bucket):
+    return _BUCKET_BASE * _BUCKET_GROWTH ** bucket
+
+
+class LatencyTracker(object):
+
+    def __init__(self, multiplier=3.0, floor=5.0, ceiling=300.0, default_timeout=60.0, min_samples=5):
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.default_timeout = default_timeout
+        self.min_samples = min_samples
+        self._histograms = {}
+        self._counts = {}
+        self._fleet = array("I", bytes(4 * _BUCKETS))
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds):
+        bucket = _bucket(seconds)
+        with self._lock:
+            histogram = self._histograms.get(host)
+            if histogram is None:
+                histogram = self._histograms[host] = array("I", bytes(4 * _BUCKETS))
+            histogram[bucket] += 1
+            self._counts[host] = self._counts.get(host, 0) + 1
+            self._fleet[bucket] += 1
+
+    def samples(self, host):
+        return self._counts.get(host, 0)
+
+    @staticmethod
+    def _quantile(histogram, total, q):
+        wanted = q * total
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= wanted:
+                return _upper_edge(bucket)
+        return None
+
+    def quantile(self, host, q):
+        # - upper edge of bucket holding q-quantile (histogram answer is never below real value)
+        with self._lock:
+            histogram = self._histograms.get(host)
+            if histogram is None:
+                return None
+            return self._quantile(histogram, self._counts[host], q)
+
+    def timeout(self, host):
+        if self.samples(host) < self.min_samples:
+            return self.default_timeout
+        p99 = self.quantile(host, 0.99)
+        return max(self.floor, min(self.ceiling, p99 * self.multiplier))
+
+    def estimate(self, host):
+        # - expected task time: device median, fleet median for devices never seen, 0 on empty tracker
+        if self.samples(host):
+            return self.quantile(host, 0.5)
+        with self._lock:
+            total = sum(self._fleet)
+            if not total:
+                return 0.0
+            return self._quantile(self._fleet, total, 0.5)
+
+    def order(self, hosts):
+        # - slowest first; sort is stable, so devices with same estimate keep inventory order
+        return sorted(hosts, key=self.estimate, reverse=True)
+
+    def save(self, path):
+        with self._lock:
+            data = {host: {str(bucket): count for bucket, count in enumerate(histogram) if count}
+                    for host, histogram in self._histograms.items()}
+        temporary = path + ".tmp"
+        with open(temporary, "w") as state_file:
+            json.dump(data, state_file)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, **options):
+        tracker = cls(**options)
+        if not os.path.exists(path):
+            return tracker
+        with open(path) as state_file:
+            data = json.load(state_file)
+        for host, buckets in data.items():
+            histogram = tracker._histograms[host] = array("I", bytes(4 * _BUCKETS))
+            for bucket, count in buckets.items():
+                histogram[int(bucket)] = count
+                tracker._fleet[int(bucket)] += count
+            tracker._counts[host] = sum(histogram)
+        return tracker
+
+
+def backoff(attempt, base_delay=1.0, max_delay=30.0):
+    # - "full jitter": random wait between 0 and exponential cap, retries of many devices do not line up
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def run_scheduled(task, hosts, tracker, workers=32, retries=2, base_delay=1.0, max_delay=30.0,
+                  retry_on=(Exception,), sleep=time.sleep):
+    # - task is called as task(host, session_timeout=<seconds>), like devnet.configure_bgp_device
+    # - results are fleet.Result tuples in same order as hosts, even though work starts slowest first
+    hosts = list(hosts)
+
+    def attempt_all(host):
+        attempt = 0
+        while True:
+            timeout = tracker.timeout(host)
+            start = time.monotonic()
+            try:
+                value = task(host, session_timeout=timeout)
+            except retry_on:
+                elapsed = time.monotonic() - start
+                # - device that ran into its timeout is slow, remember it so next timeout is longer
+                if elapsed >= timeout:
+                    tracker.record(host, elapsed)
+                if attempt >= retries:
+                    raise
+                sleep(backoff(attempt, base_delay, max_delay))
+                attempt += 1
+            else:
+                tracker.record(host, time.monotonic() - start)
+                return value
+
+    order = sorted(range(len(hosts)), key=lambda index: tracker.estimate(hosts[index]), reverse=True)
+    results = fleet.run_fleet(attempt_all, [hosts[index] for index in order], workers=workers)
+    ordered = [None] * len(hosts)
+    for index, result in zip(order, results):
+        ordered[index] = result
+    return ordered
@@ -0,0 +1,206 @@
+# sessionlog.py
+# - device.open_session_log("/home/student/logs/CSR.log") opens file per session and writes on every read,
+#   with thousand sessions that is thousand file handles and blocking writes next to SSH I/O
+# - SessionLogger takes session output through queue (queue.SimpleQueue, written in C) to one background
+#   writer thread; writer groups entries into blocks, compresses each block (gzip, or zstd when zstandard
+#   package is installed) and appends it to current log file, which rotates when it reaches max_bytes
+# - every entry is indexed in SQLite by device label and timestamp, read() decompresses only blocks it needs
+# - each block is complete gzip member / zstd frame, so rotated files can still be read with zcat / zstdcat
+# Example (same call shape as open_session_log(), device comes first):
+# logger = SessionLogger("/home/student/logs")
+# logger.open_session_log(device, "/home/student/logs/CSR.log")
+# device.send_command("show version")
+# logger.read("/home/student/logs/CSR.log")
+# [(1700000000.0, 'csr1kv1#show version\nCisco IOS XE Software, ...')]
+
+import glob
+import gzip
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    device TEXT NOT NULL,
+    ts REAL NOT NULL,
+    file TEXT NOT NULL,
+    block_offset INTEGER NOT NULL,
+    block_size INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_device_ts ON entries (device, ts);
+"""
+
+
+def _decompressor(name):
+    # - files written with other compression setting stay readable, codec follows file suffix
+    if name.endswith(".zst"):
+        return _codec("zstd")[2]
+    if name.endswith(".gz"):
+        return _codec("gzip")[2]
+    return bytes
+
+
+def _codec(compression):
+    if compression == "zstd":
+        import zstandard
+
+        def decompress(data):
+            # - frames are written without content size check, decompressobj reads concatenated frames too
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+        return ".zst", zstandard.ZstdCompressor().compress, decompress
+    if compression == "gzip":
+        return ".gz", lambda data: gzip.compress(data, compresslevel=6), gzip.decompress
+    if compression is None:
+        return "", bytes, bytes
+    raise ValueError("unknown compression {!r}, use 'gzip', 'zstd' or None".format(compression))
+
+
+class DeviceLog(object):
+    # - file-like object handed to device, write() only puts entry on queue and returns
+
+    def __init__(self, logger, device):
+        self.logger = logger
+        self.name = device
+        self.closed = False
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+        if data:
+            self.logger._queue.put((self.name, time.time(), data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class SessionLogger(object):
+
+    def __init__(self, directory, max_bytes=64 * 2 ** 20, compression="gzip", block_bytes=256 * 1024,
+                 flush_interval=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.block_bytes = block_bytes
+        self.flush_interval = flush_interval
+        self.suffix, self._compress, _ = _codec(compression)
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.sqlite")
+        index = sqlite3.connect(self._index_path)
+        index.execute("PRAGMA journal_mode=WAL")
+        index.executescript(_SCHEMA)
+        index.close()
+        existing = glob.glob(os.path.join(directory, "session-*.log*"))
+        self._sequence = len(existing)
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="session-log-writer", daemon=True)
+        self._writer.start()
+
+    def open(self, device):
+        return DeviceLog(self, device)
+
+    def open_session_log(self, device, filename):
+        # - counterpart of device.open_session_log(filename): filename becomes device label in index
+        device.session_log = self.open(filename)
+        return device.session_log
+
+    def _new_file(self):
+        self._sequence += 1
+        name = "session-{:06d}.log{}".format(self._sequence, self.suffix)
+        return name, open(os.path.join(self.directory, name), "ab")
+
+    def _run(self):
+        index = sqlite3.connect(self._index_path)
+        name, log_file = self._new_file()
+        stopping = False
+        while not stopping:
+            # - block until first entry or flush_interval, then take whatever else is already queued
+            entries = []
+            size = 0
+            try:
+                entry = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                    break
+                entries.append(entry)
+                size += len(entry[2])
+                if size >= self.block_bytes:
+                    break
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not entries:
+                continue
+            if log_file.tell() >= self.max_bytes:
+                log_file.close()
+                name, log_file = self._new_file()
+            rows = []
+            chunks = []
+            start = 0
+            for device, ts, text in entries:
+                data = text.encode("utf-8")
+                chunks.append(data)
+                rows.append([device, ts, name, 0, 0, start, len(data)])
+                start += len(data)
+            block = self._compress(b"".join(chunks))
+            offset = log_file.tell()
+            log_file.write(block)
+            log_file.flush()
+            for row in rows:
+                row[3] = offset
+                row[4] = len(block)
+            index.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            index.commit()
+        log_file.close()
+        index.close()
+
+    def read(self, device, since=None, until=None):
+        # - returns [(timestamp, text)] for device label, oldest first
+        sql = "SELECT ts, file, block_offset, block_size, start, length FROM entries WHERE device = ?"
+        parameters = [device]
+        if since is not None:
+            sql += " AND ts >= ?"
+            parameters.append(since)
+        if until is not None:
+            sql += " AND ts <= ?"
+            parameters.append(until)
+        index = sqlite3.connect(self._index_path)
+        try:
+            rows = index.execute(sql + " ORDER BY ts", parameters).fetchall()
+        finally:
+            index.close()
+        blocks = {}
+        result = []
+        for ts, name, offset, size, start, length in rows:
+            block = blocks.get((name, offset))
+            if block is None:
+                with open(os.path.join(self.directory, name), "rb") as log_file:
+                    log_file.seek(offset)
+                    block = blocks[(name, offset)] = _decompressor(name)(log_file.read(size))
+            result.append((ts, block[start:start + length].decode("utf-8")))
+        return result
+
+    def close(self):
+        # - waits until everything queued so far is written and indexed
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,232 @@
+# showcache.py
+# - several scripts send "show version", "show ip interface brief", ... to same routers within few minutes,
+#   every call is new SSH round trip for output that did not change
+# - ShowCache keeps show output by (host, command) in memory (LRU, maxsize entries) and optionally in
+#   SQLite file shared by all scripts on machine; every command has own TTL (show version changes rarely,
+#   show interfaces counters often), commands that are not show commands are never cached
+# - send_config_set() / send_config_from_file() through CachedDevice drop all cached output of that host,
+#   on disk too, so other scripts using same file do not read output from before change
+# - hits / misses are counted in stats
+# Example:
+# cache = ShowCache("/home/student/showcache.sqlite")
+# device = cache.wrap(devnet.connect("csr1kv1"), "csr1kv1")
+# device.send_command("show version")         (asks router)
+# device.send_command("show version")         (from cache)
+# device.send_config_set(["interface Loopback0", " description test"])
+# device.send_command("show version")         (asks router again)
+# cache.stats
+# {'hits': 1, 'disk_hits': 0, 'misses': 2, 'invalidations': 1}
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from devnet.parsers import normalize_command
+
+# - seconds; other show commands use default_ttl
+DEFAULT_TTLS = {
+    "show version": 3600,
+    "show inventory": 3600,
+    "show running-config": 300,
+    "show ip interface brief": 60,
+    "show ip bgp summary": 30,
+    "show interfaces": 30,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    host TEXT NOT NULL,
+    command TEXT NOT NULL,
+    output TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (host, command)
+);
+CREATE TABLE IF NOT EXISTS generations (
+    host TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+
+class ShowCache(object):
+
+    def __init__(self, path=None, ttls=None, default_ttl=60.0, maxsize=10000, clock=time.time):
+        # - clock is wall time, expiry written to disk must mean same thing in every process
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+        # - generations of cache without file, same meaning as generations table
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+        if path is not None:
+            connection = self._connection()
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connection(self):
+        # - sqlite3 connection can be used only by thread that opened it
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return connection
+
+    def _generation(self, host):
+        # - every invalidation bumps host generation on disk, memory entry from older generation is stale
+        # - invalidate() of whole cache bumps row "*", which counts for every host, also hosts without own row
+        if self.path is None:
+            with self._lock:
+                return self._generations.get(host, 0) + self._generations.get("*", 0)
+        return self._connection().execute(
+            "SELECT COALESCE(SUM(generation), 0) FROM generations WHERE host IN (?, '*')", (host,)).fetchone()[0]
+
+    def ttl(self, command):
+        # - None means command is not cached
+        command = normalize_command(command)
+        if command in self.ttls:
+            return self.ttls[command]
+        if command.startswith("show "):
+            return self.default_ttl
+        return None
+
+    def get(self, host, command):
+        command = normalize_command(command)
+        key = (host, command)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            output, expires, generation = entry
+            if expires > now and generation == self._generation(host):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                return output
+            with self._lock:
+                self._entries.pop(key, None)
+        if self.path is not None:
+            # - generation is read first: row deleted by invalidate() after that leaves entry of older generation
+            generation = self._generation(host)
+            row = self._connection().execute(
+                "SELECT output, expires FROM results WHERE host = ? AND command = ? AND expires > ?",
+                (host, command, now)).fetchone()
+            if row is not None:
+                self._remember(key, row[0], row[1], generation)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return row[0]
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def _remember(self, key, output, expires, generation):
+        with self._lock:
+            self._entries[key] = (output, expires, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put(self, host, command, output, generation=None):
+        # - generation is host generation read before output was asked for (send_command()); when invalidate()
+        #   ran in between, output may be from before change and is not written to disk
+        command = normalize_command(command)
+        ttl = self.ttl(command)
+        if ttl is None:
+            return
+        if generation is None:
+            generation = self._generation(host)
+        expires = self.clock() + ttl
+        self._remember((host, command), output, expires, generation)
+        if self.path is not None:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results SELECT ?, ?, ?, ? "
+                    "WHERE (SELECT COALESCE(SUM(generation), 0) FROM generations WHERE host IN (?, '*')) = ?",
+                    (host, command, output, expires, host, generation))
+
+    def invalidate(self, host=None):
+        # - host=None drops everything
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == host]:
+                    del self._entries[key]
+            generation = "*" if host is None else host
+            self._generations[generation] = self._generations.get(generation, 0) + 1
+            self.stats["invalidations"] += 1
+        if self.path is None:
+            return
+        connection = self._connection()
+        with connection:
+            if host is None:
+                connection.execute("DELETE FROM results")
+            else:
+                connection.execute("DELETE FROM results WHERE host = ?", (host,))
+            connection.execute("INSERT INTO generations VALUES (?, 1) ON CONFLICT (host) "
+                               "DO UPDATE SET generation = generation + 1", (generation,))
+
+    def purge(self):
+        # - removes expired rows from disk, cache file does not grow with every command ever sent
+        if self.path is None:
+            return 0
+        connection = self._connection()
+        with connection:
+            return connection.execute("DELETE FROM results WHERE expires <= ?", (self.clock(),)).rowcount
+
+    def send_command(self, device, host, command, **kwargs):
+        # - extra arguments (use_textfsm=True, ...) change output, such calls always go to device
+        if kwargs or self.ttl(command) is None:
+            return device.send_command(command, **kwargs)
+        output = self.get(host, command)
+        if output is None:
+            generation = self._generation(host)
+            output = device.send_command(command)
+            self.put(host, command, output, generation)
+        return output
+
+    def wrap(self, device, host=None):
+        return CachedDevice(device, self, host)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local = threading.local()
+
+
+class CachedDevice(object):
+    # - stands in for netmiko connection: send_command() goes through cache,
+    #   config changes invalidate host, everything else is passed to device unchanged
+
+    def __init__(self, device, cache, host=None):
+        self.device = device
+        self.cache = cache
+        self.cache_host = host or device.host
+
+    def send_command(self, command, **kwargs):
+        return self.cache.send_command(self.device, self.cache_host, command, **kwargs)
+
+    def send_config_set(self, *args, **kwargs):
+        try:
+            return self.device.send_config_set(*args, **kwargs)
+        finally:
+            # - also when push failed halfway, part of it may be applied
+            self.cache.invalidate(self.cache_host)
+
+    def send_config_from_file(self, *args, **kwargs):
+        try:
+            return self.device.send_config_from_file(*args, **kwargs)
+        finally:
+            self.cache.invalidate(self.cache_host)
+
+    def __getattr__(self, name):
+        return getattr(self.device, name)
@@ -0,0 +1,235 @@
+# snapshots.py
+# - nightly backup is send_command("show running-config") written to new file per device per day; configs of
+#   one site differ in few lines, and config of one device differs from yesterday in few lines or not at all
+# - SnapshotStore keeps configs in one SQLite file:
+#   - config is cut into chunks at top-level lines (section stays in one chunk) chosen by content, so line added
+#     in one section changes only chunk around it, following chunks keep their boundaries and hashes
+#   - chunk is stored once by its hash (blake2b) and compressed with zlib, same "line vty 0 4" section of
+#     thousand routers over hundred days is one row
+#   - snapshot is list of chunk hashes, stored as delta against previous snapshot of same device (copy / insert
+#     operations, zlib); every keyframe_every-th snapshot is full list, so get() replays at most that many deltas
+# - put() compares hash of config with last snapshot of device first, unchanged config writes nothing;
+#   lines that change without configuration change ("! Last configuration change at ...",
+#   "Current configuration : ... bytes") are left out of that hash
+# - get(host, at=timestamp) returns config as it was at that time (last snapshot taken before it)
+# Example:
+# store = SnapshotStore("/home/student/backups/configs.sqlite")
+# store.backup(devnet.connect("csr1kv1"), "csr1kv1")
+# True                                           (False next night when nothing changed)
+# store.get("csr1kv1", at=time.time() - 7 * 86400)
+# 'Building configuration...\n\nCurrent configuration : 3977 bytes\n!\n...'
+
+import difflib
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    host TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    digest TEXT NOT NULL,
+    keyframe INTEGER NOT NULL,
+    chunks BLOB NOT NULL,
+    PRIMARY KEY (host, seq)
+);
+CREATE INDEX IF NOT EXISTS snapshots_host_ts ON snapshots (host, ts);
+"""
+
+_VOLATILE = re.compile(r"^(! Last configuration change at |! NVRAM config last updated at |"
+                       r"Current configuration : |ntp clock-period )")
+
+Snapshot = namedtuple("Snapshot", ["host", "ts", "digest"])
+
+
+def _hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def config_digest(config):
+    # - hash of config without lines that change on their own
+    lines = [line for line in config.splitlines() if not _VOLATILE.match(line)]
+    return _hash("\n".join(lines).encode("utf-8"))
+
+
+def chunk_config(config, min_size=1024, max_size=16384, spread=8):
+    # - chunk ends before top-level line once it has min_size characters and crc32 of that line is divisible
+    #   by spread (boundary depends on line itself, not on its position); sections over max_size are cut anywhere
+    chunks = []
+    current = []
+    size = 0
+    for line in config.splitlines(True):
+        if size >= min_size:
+            top_level = line[:1] not in (" ", "!", "\n", "\r", "")
+            if size >= max_size or (top_level and zlib.crc32(line.encode("utf-8")) % spread == 0):
+                chunks.append("".join(current))
+                current = []
+                size = 0
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def _delta(previous, hashes):
+    # - [start, end] copies previous[start:end], string is hash of new chunk
+    operations = []
+    matcher = difflib.SequenceMatcher(None, previous, hashes, autojunk=False)
+    for tag, first_start, first_end, second_start, second_end in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([first_start, first_end])
+        elif tag in ("replace", "insert"):
+            operations.extend(hashes[second_start:second_end])
+    return operations
+
+
+def _apply(previous, operations):
+    hashes = []
+    for operation in operations:
+        if isinstance(operation, list):
+            hashes.extend(previous[operation[0]:operation[1]])
+        else:
+            hashes.append(operation)
+    return hashes
+
+
+class SnapshotStore(object):
+
+    def __init__(self, path, keyframe_every=30, clock=time.time):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"stored": 0, "unchanged": 0, "chunks_written": 0, "chunks_reused": 0}
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+
+    def _connection(self):
+        # - sqlite3 connection can be used only by thread that opened it
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return connection
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def _last(self, connection, host):
+        return connection.execute(
+            "SELECT seq, digest FROM snapshots WHERE host = ? ORDER BY seq DESC LIMIT 1", (host,)).fetchone()
+
+    def _hashes(self, connection, host, seq):
+        # - chunk hashes of snapshot seq: last keyframe at or before it plus deltas after keyframe
+        rows = connection.execute(
+            "SELECT keyframe, chunks FROM snapshots WHERE host = ? AND seq <= ? AND seq >= "
+            "(SELECT MAX(seq) FROM snapshots WHERE host = ? AND seq <= ? AND keyframe = 1) ORDER BY seq",
+            (host, seq, host, seq)).fetchall()
+        hashes = []
+        for keyframe, data in rows:
+            operations = json.loads(zlib.decompress(data))
+            hashes = operations if keyframe else _apply(hashes, operations)
+        return hashes
+
+    def put(self, host, config, ts=None):
+        # - returns True when new snapshot was stored, False when config did not change since last one
+        digest = config_digest(config)
+        connection = self._connection()
+        last = self._last(connection, host)
+        if last is not None and last[1] == digest:
+            self._count("unchanged")
+            return False
+        ts = self.clock() if ts is None else ts
+        chunks = chunk_config(config)
+        hashes = [_hash(chunk.encode("utf-8")) for chunk in chunks]
+        with connection:
+            # - BEGIN IMMEDIATE: two processes backing up same device do not both take same seq
+            connection.execute("BEGIN IMMEDIATE")
+            last = self._last(connection, host)
+            if last is not None and last[1] == digest:
+                self._count("unchanged")
+                return False
+            seq = 0 if last is None else last[0] + 1
+            known = set()
+            for first in range(0, len(hashes), 500):
+                part = hashes[first:first + 500]
+                known.update(row[0] for row in connection.execute(
+                    "SELECT hash FROM chunks WHERE hash IN ({})".format(",".join("?" * len(part))), part))
+            new = [(chunk_hash, zlib.compress(chunk.encode("utf-8"), 9))
+                   for chunk_hash, chunk in dict(zip(hashes, chunks)).items() if chunk_hash not in known]
+            connection.executemany("INSERT INTO chunks (hash, data) VALUES (?, ?)", new)
+            keyframe = seq % self.keyframe_every == 0
+            operations = hashes if keyframe else _delta(self._hashes(connection, host, seq - 1), hashes)
+            connection.execute(
+                "INSERT INTO snapshots (host, seq, ts, digest, keyframe, chunks) VALUES (?, ?, ?, ?, ?, ?)",
+                (host, seq, ts, digest, int(keyframe), zlib.compress(json.dumps(operations).encode("utf-8"))))
+        self._count("stored")
+        self._count("chunks_written", len(new))
+        self._count("chunks_reused", len(hashes) - len(new))
+        return True
+
+    def get(self, host, at=None):
+        # - config of host at time at (default: latest), KeyError when there is no snapshot that old
+        connection = self._connection()
+        if at is None:
+            row = connection.execute(
+                "SELECT seq FROM snapshots WHERE host = ? ORDER BY seq DESC LIMIT 1", (host,)).fetchone()
+        else:
+            row = connection.execute(
+                "SELECT seq FROM snapshots WHERE host = ? AND ts <= ? ORDER BY ts DESC, seq DESC LIMIT 1",
+                (host, at)).fetchone()
+        if row is None:
+            raise KeyError(host)
+        hashes = self._hashes(connection, host, row[0])
+        data = {}
+        unique = list(set(hashes))
+        for first in range(0, len(unique), 500):
+            part = unique[first:first + 500]
+            data.update(connection.execute(
+                "SELECT hash, data FROM chunks WHERE hash IN ({})".format(",".join("?" * len(part))), part))
+        return "".join(zlib.decompress(data[chunk_hash]).decode("utf-8") for chunk_hash in hashes)
+
+    def history(self, host):
+        # - Snapshot per stored config of host, oldest first (nights without change have no entry)
+        rows = self._connection().execute(
+            "SELECT ts, digest FROM snapshots WHERE host = ? ORDER BY seq", (host,)).fetchall()
+        return [Snapshot(host, ts, digest) for ts, digest in rows]
+
+    def hosts(self):
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT host FROM snapshots ORDER BY host")]
+
+    def backup(self, device, host, command="show running-config"):
+        # - per-device step of nightly backup, for example fleet.run_fleet task
+        return self.put(host, device.send_command(command))
+
+    def size(self):
+        # - bytes held in chunks and snapshot lists
+        connection = self._connection()
+        chunks = connection.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()[0]
+        lists = connection.execute("SELECT COALESCE(SUM(LENGTH(chunks)), 0) FROM snapshots").fetchone()[0]
+        return chunks + lists
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,91 @@
+# stream.py
+# - send_command() collects whole output into one string before returning; "show running-config" on big
+#   router or "show ip route" with full internet table is tens of megabytes per call, times every session
+# - iter_output() writes command to channel and yields output chunks as they arrive from read_channel(),
+#   only last few characters are held back (prompt can be split between two reads), so memory per session
+#   stays around one read, whatever size of output is
+# - between reads it waits on channel (prompts.ChannelWaiter), not fixed sleep
+# - iter_lines() turns chunks into lines, keeping only unfinished line between chunks
+# - chunks go straight to parsers that read incrementally (parsers.iter_show_interfaces,
+#   confdiff.parse_config) or to file (save_output)
+# - terminal length must be 0 (netmiko sets it when session is opened), otherwise --More-- stops output
+# Example:
+# for line in iter_lines(iter_output(device, "show ip route")):
+#     if line.startswith("B "):
+#         bgp_routes += 1
+# save_output(device, "show running-config", "/home/student/backups/csr1kv1.cfg")
+
+import re
+import time
+
+from devnet import span
+from devnet.prompts import ChannelWaiter
+
+
+def iter_output(device, command, read_timeout=60, delay=0.01):
+    # - read_timeout is counted from last data received, long output that keeps coming never times out
+    prompt = device.find_prompt()
+    pattern = re.compile(r"\n" + re.escape(prompt))
+    keep = len(prompt) + 1
+    with span("command"), ChannelWaiter(device, delay) as waiter:
+        device.write_channel(command.strip() + "\n")
+        pending = ""
+        echo = True
+        # - True when pending starts at beginning of line (output can be empty, prompt comes right after echo)
+        line_start = True
+        deadline = time.monotonic() + read_timeout
+        while True:
+            data = device.read_channel()
+            if not data:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("{}: prompt {!r} not seen within {} seconds of last output".format(
+                        getattr(device, "host", "device"), prompt, read_timeout))
+                waiter.wait(remaining)
+                continue
+            deadline = time.monotonic() + read_timeout
+            # - "\r\n" can be split between reads too, it is replaced after joining with held back text
+            pending = (pending + data).replace("\r\n", "\n")
+            if echo:
+                # - first line is echo of command itself
+                if "\n" not in pending:
+                    continue
+                pending = pending.partition("\n")[2]
+                echo = False
+            if line_start and pending.startswith(prompt):
+                return
+            match = pattern.search(pending)
+            if match:
+                # - newline before prompt belongs to output
+                yield pending[:match.start() + 1]
+                return
+            if pending.endswith("\r"):
+                cut = len(pending) - keep - 1
+            else:
+                cut = len(pending) - keep
+            if cut > 0:
+                line_start = pending[cut - 1] == "\n"
+                yield pending[:cut]
+                pending = pending[cut:]
+
+
+def iter_lines(chunks):
+    # - lines without "\n"; output that does not end with newline still gives its last line
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def save_output(device, command, path, read_timeout=60):
+    # - writes output to file as it arrives, returns number of characters written
+    written = 0
+    with open(path, "w") as output_file:
+        for chunk in iter_output(device, command, read_timeout):
+            output_file.write(chunk)
+            written += len(chunk)
+    return written
@@ -0,0 +1,256 @@
+# trace.py
+# - when fleet run is slow, issue_command() / configure_bgp() do not say where time went:
+#   TCP connect, login, finding prompt, running command or parsing output
+# - span("phase", host) around each phase records how long it took; spans opened inside other span
+#   become its children ("configure_bgp;connect;auth") and take host from outer span
+# - tracing is off until enable() is called, then span() costs two clock reads and one append,
+#   so it can stay on in production; with tracing off span() returns shared do-nothing object
+# - finished spans go to exporters every flush_every spans and on flush() / disable():
+#   JsonLinesExporter writes one JSON object per span, PrometheusExporter writes histogram per phase
+#   to text file for node_exporter textfile collector (no host label, it would be one series per router)
+# - "devnet trace-summary trace.jsonl" prints time per phase as tree and slowest devices
+# Example:
+# tracer = enable(JsonLinesExporter("/home/student/trace.jsonl"),
+#                 PrometheusExporter("/var/lib/node_exporter/devnet.prom"))
+# fleet.configure_bgp(workers=200)
+# disable()
+# - devnet.span() (used by fakedevice, batch, parsers, ...) hands over to this module only once it is imported
+#   by enable() or --trace; json is imported only by exporters that need it
+
+import os
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+Span = namedtuple("Span", ["host", "path", "start", "duration", "error"])
+
+_tracer = None
+
+
+class _NoSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _ActiveSpan(object):
+    __slots__ = ("tracer", "name", "host", "start", "clock", "outer")
+
+    def __init__(self, tracer, name, host):
+        self.tracer = tracer
+        self.name = name
+        self.host = host
+
+    def __enter__(self):
+        local = self.tracer._local
+        outer = self.outer = getattr(local, "current", None)
+        if outer is None:
+            local.current = (self.name, self.host)
+        else:
+            if self.host is None:
+                self.host = outer[1]
+            local.current = (outer[0] + ";" + self.name, self.host)
+        self.start = time.time()
+        self.clock = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.clock
+        local = self.tracer._local
+        path = local.current[0]
+        local.current = self.outer
+        self.tracer._finish(Span(self.host, path, self.start, duration,
+                                 None if exc_type is None else exc_type.__name__))
+        return False
+
+
+class Tracer(object):
+
+    def __init__(self, exporters=(), flush_every=10000):
+        self.exporters = list(exporters)
+        self.flush_every = flush_every
+        self._spans = deque()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name, host=None):
+        return _ActiveSpan(self, name, host)
+
+    def _finish(self, record):
+        # - deque.append is atomic, lock is taken only when buffer is full
+        self._spans.append(record)
+        if len(self._spans) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans = []
+            try:
+                while True:
+                    spans.append(self._spans.popleft())
+            except IndexError:
+                pass
+            for exporter in self.exporters:
+                exporter.export(spans)
+        return spans
+
+    def close(self):
+        self.flush()
+        for exporter in self.exporters:
+            exporter.close()
+
+
+def enable(*exporters, **options):
+    # - replaces tracer that was enabled before, without flushing it
+    global _tracer
+    _tracer = Tracer(exporters, **options)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def span(name, host=None):
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _ActiveSpan(tracer, name, host)
+
+
+class JsonLinesExporter(object):
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+
+    def export(self, spans):
+        import json
+        self._file.writelines(json.dumps(record._asdict()) + "\n" for record in spans)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _phase_label(phase):
+    return 'phase="{}"'.format(phase.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+class PrometheusExporter(object):
+    # - counts are cumulative for life of exporter, file is rewritten whole on every export
+
+    BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+    def __init__(self, path, buckets=BUCKETS, metric="devnet_phase_seconds"):
+        self.path = path
+        self.buckets = tuple(buckets)
+        self.metric = metric
+        self._counts = defaultdict(lambda: [0] * len(self.buckets))
+        self._sums = defaultdict(float)
+        self._totals = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def export(self, spans):
+        for record in spans:
+            counts = self._counts[record.path]
+            for index, bound in enumerate(self.buckets):
+                if record.duration <= bound:
+                    counts[index] += 1
+            self._sums[record.path] += record.duration
+            self._totals[record.path] += 1
+            if record.error is not None:
+                self._errors[record.path] += 1
+        lines = ["# HELP {} Time spent in each phase of device work.".format(self.metric),
+                 "# TYPE {} histogram".format(self.metric)]
+        for phase in sorted(self._totals):
+            label = _phase_label(phase)
+            for bound, count in zip(self.buckets, self._counts[phase]):
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(self.metric, label, bound, count))
+            lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(self.metric, label, self._totals[phase]))
+            lines.append("{}_sum{{{}}} {}".format(self.metric, label, self._sums[phase]))
+            lines.append("{}_count{{{}}} {}".format(self.metric, label, self._totals[phase]))
+        lines.append("# HELP devnet_phase_errors_total Phases that ended with exception.")
+        lines.append("# TYPE devnet_phase_errors_total counter")
+        for phase in sorted(self._errors):
+            lines.append("devnet_phase_errors_total{{{}}} {}".format(_phase_label(phase), self._errors[phase]))
+        # - collector must never see half written file
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as metrics_file:
+            metrics_file.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.path)
+
+    def close(self):
+        pass
+
+
+def load_spans(path):
+    import json
+    with open(path) as trace_file:
+        return [Span(**json.loads(line)) for line in trace_file if line.strip()]
+
+
+def folded(spans):
+    # - "a;b;c microseconds" lines, input format of flamegraph.pl and speedscope
+    self_times = defaultdict(float)
+    for record in spans:
+        self_times[record.path] += record.duration
+        parent = record.path.rpartition(";")[0]
+        if parent:
+            self_times[parent] -= record.duration
+    return ["{} {}".format(path, int(max(0.0, seconds) * 1e6)) for path, seconds in sorted(self_times.items())]
+
+
+def summarize(spans, top=10, width=40):
+    totals = defaultdict(float)
+    calls = defaultdict(int)
+    for record in spans:
+        totals[record.path] += record.duration
+        calls[record.path] += 1
+    if not totals:
+        return "no spans"
+    roots = [totals[path] for path in totals if ";" not in path]
+    longest = max(roots) if roots else max(totals.values())
+
+    lines = ["{:<40} {:>10} {:>8}".format("phase", "total s", "calls")]
+
+    def walk(prefix, depth):
+        children = [path for path in totals if path.rpartition(";")[0] == prefix and path != prefix]
+        for path in sorted(children, key=totals.get, reverse=True):
+            name = "  " * depth + path.rpartition(";")[2]
+            bar = "#" * max(1, int(width * totals[path] / longest)) if longest else "#"
+            lines.append("{:<40} {:>10.3f} {:>8} {}".format(name, totals[path], calls[path], bar))
+            walk(path, depth + 1)
+
+    walk("", 0)
+
+    per_host = defaultdict(float)
+    phases = defaultdict(lambda: defaultdict(float))
+    for record in spans:
+        if record.host is None:
+            continue
+        # - device time is sum of its top level spans, breakdown is by their direct children
+        depth = record.path.count(";")
+        if depth == 0:
+            per_host[record.host] += record.duration
+        elif depth == 1:
+            phases[record.host][record.path.rpartition(";")[2]] += record.duration
+    if per_host:
+        lines.append("")
+        lines.append("slowest devices:")
+        for host in sorted(per_host, key=per_host.get, reverse=True)[:top]:
+            breakdown = sorted(phases[host].items(), key=lambda item: item[1], reverse=True)[:4]
+            lines.append("{:<20} {:>8.3f} s  {}".format(
+                host, per_host[host], "  ".join("{} {:.3f}".format(name, seconds) for name, seconds in breakdown)))
+    return "\n".join(lines)
@@ -0,0 +1,149 @@
+# verify.py
+# - last step of CSR challenge is "verify that configuration was successfully applied",
+#   devnet.verify_bgp() only prints "BGP session is active" without asking any router
+# - checks are declarative: Check(name, command, test), test gets parsed output of command and returns
+#   None when device passes or text saying what is wrong
+# - all show commands needed by checks are sent in one batch (batch.send_command_batch), output of each
+#   command is parsed only when first check asks for it (parsers.ParseCache, running config with confdiff.parse_config)
+# - checks of one device stop at first failure, devices are verified in parallel on fleet.run_fleet worker pool
+# - verify_fleet() returns FleetReport with passed / failed / unreachable devices
+# Example:
+# report = verify_fleet(workers=200)
+# print(format_report(report))
+# 2 devices in 0.41 s: 2 passed, 0 failed, 0 errors
+
+import time
+from collections import namedtuple
+from functools import partial
+
+import devnet
+from devnet import batch, confdiff, fleet, parsers, span
+
+Check = namedtuple("Check", ["name", "command", "test"])
+
+# - failure is None for device that passed all checks, otherwise (check name, message)
+DeviceReport = namedtuple("DeviceReport", ["host", "checks_run", "failure"])
+
+FleetReport = namedtuple("FleetReport", ["passed", "failed", "errors", "elapsed"])
+
+
+def _hostnames(tree):
+    return [line.split(None, 1)[1] for line in tree if line.startswith("hostname ")]
+
+
+def hostname_matches(tree, host, details):
+    names = _hostnames(tree)
+    if not names:
+        return "no hostname configured"
+    # - when hostname is configured twice, last one is in effect
+    if names[-1] != details.get("hostname", host):
+        return "hostname is {!r}".format(names[-1])
+    return None
+
+
+def vty_ssh_only(tree, host, details):
+    lines = [line for line in tree if line.startswith("line vty")]
+    if not lines:
+        return "no line vty configured"
+    for line in lines:
+        transports = [child for child in tree[line] if child.startswith("transport input")]
+        if transports != ["transport input ssh"]:
+            return "{}: {}".format(line, ", ".join(transports) or "no transport input")
+    return None
+
+
+def loopback_present(interfaces, host, details):
+    wanted = details.get("loopback_ip")
+    for interface in interfaces:
+        if interface.name == "Loopback0":
+            if wanted is not None and interface.address != wanted:
+                return "Loopback0 has {}, expected {}".format(interface.address, wanted)
+            if interface.status != "up":
+                return "Loopback0 is {}".format(interface.status)
+            return None
+    return "Loopback0 is missing"
+
+
+def bgp_established(neighbors, host, details):
+    if not neighbors:
+        return "no BGP neighbors"
+    down = ["{} ({})".format(neighbor.neighbor, neighbor.state) for neighbor in neighbors
+            if neighbor.state != "Established"]
+    if down:
+        return "not Established: " + ", ".join(down)
+    return None
+
+
+CSR_CHECKS = [
+    Check("hostname", "show running-config", hostname_matches),
+    Check("vty ssh only", "show running-config", vty_ssh_only),
+    Check("loopback", "show ip interface brief", loopback_present),
+    Check("bgp neighbors", "show ip bgp summary", bgp_established),
+]
+
+
+def _parse(cache, host, command, output):
+    if parsers.normalize_command(command) == "show running-config":
+        return confdiff.parse_config(output)
+    return cache.parse(host, command, output)
+
+
+def verify_device(device, host, details=None, checks=CSR_CHECKS, cache=None):
+    # - device is already connected session (netmiko or FakeDevice), details is inventory entry of host
+    details = details or {}
+    cache = cache or parsers.ParseCache()
+    commands = []
+    for check in checks:
+        if check.command not in commands:
+            commands.append(check.command)
+    outputs = batch.send_command_batch(device, commands)
+    parsed = {}
+    for count, check in enumerate(checks, 1):
+        if check.command not in parsed:
+            parsed[check.command] = _parse(cache, host, check.command, outputs[check.command])
+        with span("check"):
+            message = check.test(parsed[check.command], host, details)
+        if message is not None:
+            return DeviceReport(host, count, (check.name, message))
+    return DeviceReport(host, len(checks), None)
+
+
+def verify_host(host, checks=CSR_CHECKS, cache=None, connection_class=None, **kwargs):
+    # - per-device task for fleet.run_fleet(): connect, verify, disconnect
+    with span("verify", host):
+        device = devnet.connect(host, connection_class, **kwargs)
+        try:
+            return verify_device(device, host, devnet.inventory[host], checks, cache)
+        finally:
+            with span("disconnect"):
+                device.disconnect()
+
+
+def verify_fleet(hosts=None, checks=CSR_CHECKS, workers=64, connection_class=None, timeout=None):
+    # - one ParseCache for whole run, shared by all worker threads
+    hosts = devnet.inventory if hosts is None else hosts
+    task = partial(verify_host, checks=checks, cache=parsers.ParseCache(), connection_class=connection_class)
+    start = time.monotonic()
+    results = fleet.run_fleet(task, hosts, workers=workers, timeout=timeout)
+    passed = []
+    failed = []
+    errors = []
+    for result in results:
+        if not result.ok:
+            errors.append(result)
+        elif result.value.failure is None:
+            passed.append(result.value)
+        else:
+            failed.append(result.value)
+    return FleetReport(passed, failed, errors, time.monotonic() - start)
+
+
+def format_report(report):
+    total = len(report.passed) + len(report.failed) + len(report.errors)
+    lines = ["{} devices in {:.2f} s: {} passed, {} failed, {} errors".format(
+        total, report.elapsed, len(report.passed), len(report.failed), len(report.errors))]
+    for device in report.failed:
+        lines.append("FAIL  {}: {}: {}".format(device.host, device.failure[0], device.failure[1]))
+    for result in report.errors:
+        lines.append("ERROR {}: {}".format(result.host, result.error))
+    return "\n".join(lines)